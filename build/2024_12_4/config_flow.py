@@ -1,13 +1,23 @@
 """Config flow for TTLock."""
 import logging
 from typing import Any, Dict, Optional
-from .const import DOMAIN
+import voluptuous as vol
+from .const import (
+    CONF_CONNECTION_LIMIT,
+    CONF_SETUP_CONCURRENCY,
+    CONF_WRITE_DEBOUNCE,
+    DEFAULT_CONNECTION_LIMIT,
+    DEFAULT_SETUP_CONCURRENCY,
+    DEFAULT_WRITE_DEBOUNCE,
+    DOMAIN,
+)
 from .api import AUTH_SCHEMA, login
 
 
 
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, CONF_URL
 from homeassistant import config_entries
+from homeassistant.core import callback
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -47,3 +57,39 @@ class GithubCustomConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 "username": "e.g. email or +84987654321"
             },
         )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
+
+# option key, default, minimum, maximum
+OPTIONS = (
+    (CONF_WRITE_DEBOUNCE, DEFAULT_WRITE_DEBOUNCE, 0, 10000),
+    (CONF_SETUP_CONCURRENCY, DEFAULT_SETUP_CONCURRENCY, 1, 50),
+    (CONF_CONNECTION_LIMIT, DEFAULT_CONNECTION_LIMIT, 1, 100),
+)
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Tuning options, applied by reloading the entry."""
+
+    def __init__(self, config_entry):
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input: Optional[Dict[str, Any]] = None):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        # entries created before the options flow keep their values in data
+        current = {**self._entry.data, **self._entry.options}
+        schema = {
+            vol.Required(key, default=current.get(key, default)): vol.All(
+                vol.Coerce(int), vol.Range(min=low, max=high)
+            )
+            for key, default, low, high in OPTIONS
+        }
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(schema))
@@ -3,33 +3,96 @@
 from __future__ import annotations
 
 import asyncio
+from collections import Counter, deque
+from collections.abc import Awaitable, Callable
 from contextlib import contextmanager
-from copy import deepcopy
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, replace
 from datetime import datetime, timedelta
 import logging
+import time
+from typing import TypeVar
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo, Entity
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.components import persistent_notification
 from homeassistant.helpers import issue_registry as ir
 from homeassistant.util import dt
 
 from .api import TTLockApi
-from .const import DOMAIN, SIGNAL_NEW_DATA, TT_LOCKS
+from .const import (
+    DEFAULT_POLL_BUDGET,
+    DOMAIN,
+    TT_AUTO_LOCK,
+    TT_INDEX,
+    TT_LOCKS,
+    TT_ROUTER,
+)
 from .api import ComponentOutdatedError
-from .models import Features, PassageModeConfig, State, WebhookEvent
+from .models import (
+    AddPasscodeConfig,
+    Features,
+    PassageModeConfig,
+    PassageModeView,
+    Passcode,
+    State,
+    WebhookEvent,
+)
 from datetime import datetime
 
 _LOGGER = logging.getLogger(__name__)
+_T = TypeVar("_T")
 
+# lock/list rows are shared by every lock of an account for this long
+FLEET_MAX_AGE = timedelta(minutes=5)
+# lock/listKeyboardPwd is answered from memory for this long
+PASSCODE_CACHE_TTL = timedelta(minutes=10)
 
-@dataclass
+# a refresh keeps what it has when one of its calls takes longer than this
+REFRESH_DETAILS_TIMEOUT = timedelta(seconds=30)
+REFRESH_STATE_TIMEOUT = timedelta(seconds=20)  # goes through the gateway
+REFRESH_PASSAGE_MODE_TIMEOUT = timedelta(seconds=30)
+
+# adaptive polling, see PollScheduler
+POLL_ACTIVE_INTERVAL = timedelta(minutes=2)
+POLL_ACTIVE_WINDOW = timedelta(minutes=10)  # after a lock/unlock
+POLL_QUIET_INTERVAL = timedelta(minutes=15)  # webhooks look broken
+POLL_IDLE_INTERVAL = timedelta(hours=6)  # webhooks arrive, lock is idle
+POLL_MAX_INTERVAL = timedelta(hours=24)  # ceiling of a stretched interval
+WEBHOOK_QUIET_AFTER = timedelta(hours=6)
+# refreshes kept for the diagnostics histogram
+POLL_HISTORY = timedelta(hours=1)
+
+
+def poll_phase(lock_id: int) -> float:
+    """Return the fixed fraction of its interval at which a lock refreshes.
+
+    Fibonacci hashing spreads any set of lock ids evenly over [0, 1).
+    """
+    return (lock_id * 2654435769 % 2**32) / 2**32
+
+# lock/list key -> Lock field
+LOCK_LIST_FIELDS = {
+    "lockAlias": "name",
+    "lockMac": "mac",
+    "electricQuantity": "battery_level",
+    "featureValue": "featureValue",
+    "autoLockTime": "autoLockTime",
+    "modelNum": "model",
+    "hardwareRevision": "hardwareRevision",
+    "firmwareRevision": "firmwareRevision",
+}
+
+
+@dataclass(slots=True)
 class LockState:
-    """Internal state of the lock as managed by the co-oridinator."""
+    """Internal state of the lock as managed by the co-oridinator.
+
+    Treated as immutable: derive a new state with dataclasses.replace() so
+    that nested configs are shared instead of copied.
+    """
 
     name: str
     mac: str
@@ -44,7 +107,7 @@ class LockState:
     last_reason: str | None = None
 
     auto_lock_seconds: int = -1
-    passage_mode_config: PassageModeConfig | None = None
+    passage_mode_config: PassageModeConfig | PassageModeView | None = None
 
     def passage_mode_active(self, current_date: datetime = dt.now()) -> bool:
         """Check if passage mode is currently active."""
@@ -80,12 +143,12 @@ class LockState:
 def lock_action(controller: LockUpdateCoordinator):
     """Wrap a lock action so that in-progress state is managed correctly."""
 
-    controller.data.action_pending = True
+    controller.data = replace(controller.data, action_pending=True)
     controller.async_update_listeners()
     try:
         yield
     finally:
-        controller.data.action_pending = False
+        controller.data = replace(controller.data, action_pending=False)
         controller.async_update_listeners()
 
 
@@ -97,72 +160,599 @@ def lock_coordinators(hass: HomeAssistant, entry: ConfigEntry):
     yield from coordinators
 
 
+def all_coordinators(
+    hass: HomeAssistant, entry_id: str | None = None
+) -> list[LockUpdateCoordinator]:
+    """Return the co-ordinators of one config entry, or of every loaded entry."""
+    return [
+        coordinator
+        for key, entry_data in hass.data.get(DOMAIN, {}).items()
+        if isinstance(entry_data, dict) and entry_id in (None, key)
+        for coordinator in entry_data.get(TT_LOCKS, [])
+    ]
+
+
+class PasscodeCache:
+    """Last lock/listKeyboardPwd payload of a lock, kept in step with our edits."""
+
+    def __init__(self, ttl: timedelta = PASSCODE_CACHE_TTL) -> None:
+        """Initialize an empty cache."""
+        self.ttl = ttl
+        self._payload: dict | None = None
+        self._updated: float | None = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self) -> dict | None:
+        """Return the cached payload, or None when missing or expired."""
+        if self._payload is None or (
+            time.monotonic() - self._updated > self.ttl.total_seconds()
+        ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {**self._payload, "list": list(self._payload["list"])}
+
+    def set(self, payload: dict) -> None:
+        """Store a payload fetched from the cloud."""
+        self._payload = {**payload, "list": list(payload.get("list") or [])}
+        self._updated = time.monotonic()
+
+    def invalidate(self) -> None:
+        """Forget the payload, the next read goes to the cloud."""
+        self._payload = None
+
+    def added(self, config: AddPasscodeConfig, res: dict | None) -> None:
+        """Record a passcode created with keyboardPwd/get."""
+        if self._payload is None:
+            return
+        if not res or res.get("keyboardPwdId") is None:
+            self.invalidate()
+            return
+        self._payload["list"].append(
+            {
+                "keyboardPwdId": res["keyboardPwdId"],
+                "keyboardPwd": res.get("keyboardPwd"),
+                "keyboardPwdName": config.passcode_name,
+                "keyboardPwdType": int(config.type),
+                "startDate": config.start_minute,
+                "endDate": config.end_minute,
+            }
+        )
+
+    def changed(self, passcode_id: int, res: dict | None, **fields) -> None:
+        """Record a keyboardPwd/change of a passcode."""
+        if self._payload is None:
+            return
+        if not res:
+            self.invalidate()
+            return
+        fields = {key: value for key, value in fields.items() if value}
+        self._payload["list"] = [
+            {**code, **fields} if code.get("keyboardPwdId") == passcode_id else code
+            for code in self._payload["list"]
+        ]
+
+    def removed(self, passcode_id: int, res: dict | None) -> None:
+        """Record a keyboardPwd/delete of a passcode."""
+        if self._payload is None:
+            return
+        if not res:
+            self.invalidate()
+            return
+        self._payload["list"] = [
+            code
+            for code in self._payload["list"]
+            if code.get("keyboardPwdId") != passcode_id
+        ]
+
+
+class CoordinatorIndex:
+    """Lookup of co-ordinators by entity_id and lock_id across all entries."""
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self.by_entity_id: dict[str, LockUpdateCoordinator] = {}
+        self.by_lock_id: dict[int, LockUpdateCoordinator] = {}
+
+    @callback
+    def async_register(
+        self, coordinator: LockUpdateCoordinator
+    ) -> Callable[[], None]:
+        """Index a co-ordinator by its lock until the returned callback runs."""
+        self.by_lock_id[coordinator.lock_id] = coordinator
+
+        @callback
+        def unregister() -> None:
+            if self.by_lock_id.get(coordinator.lock_id) is coordinator:
+                del self.by_lock_id[coordinator.lock_id]
+
+        return unregister
+
+
+def coordinator_index(hass: HomeAssistant) -> CoordinatorIndex:
+    """Return the co-ordinator index, creating it on first use."""
+    return hass.data.setdefault(DOMAIN, {}).setdefault(TT_INDEX, CoordinatorIndex())
+
+
 def coordinator_for(
     hass: HomeAssistant, entity_id: str
 ) -> LockUpdateCoordinator | None:
     """Given an entity_id, return the coordinator for that entity."""
-    for entry in hass.config_entries.async_entries(DOMAIN):
-        for coordinator in lock_coordinators(hass, entry):
-            for entity in coordinator.entities:
-                _LOGGER.info("Checking %s", entity.entity_id)
-                if entity.entity_id == entity_id:
-                    return coordinator
-    return None
+    return coordinator_index(hass).by_entity_id.get(entity_id)
+
+
+class WebhookRouter:
+    """Route webhook events straight to the co-ordinator of their lock."""
+
+    def __init__(self, index: CoordinatorIndex) -> None:
+        """Initialize a router over the co-ordinator index."""
+        self.index = index
+        self.routed = 0
+        self.batches = 0
+        self.unmatched = 0
+        self.unmatched_locks: dict[int, int] = {}
+
+    @callback
+    def async_route_batch(self, events: list[WebhookEvent]) -> int:
+        """Group a batch of events by lock and hand each group over at once."""
+        by_lock: dict[int, list[WebhookEvent]] = {}
+        for event in events:
+            by_lock.setdefault(event.id, []).append(event)
+
+        self.batches += 1
+        routed = 0
+        for lock_id, lock_events in by_lock.items():
+            coordinator = self.index.by_lock_id.get(lock_id)
+            if coordinator is None:
+                _LOGGER.debug("No coordinator for webhook event of lock %s", lock_id)
+                self.unmatched += len(lock_events)
+                self.unmatched_locks[lock_id] = self.unmatched_locks.get(
+                    lock_id, 0
+                ) + len(lock_events)
+                continue
+
+            coordinator._process_webhook_events(lock_events)
+            routed += len(lock_events)
+
+        self.routed += routed
+        return routed
+
+    def as_dict(self) -> dict:
+        """Serialize for diagnostics."""
+        return {
+            "routed": self.routed,
+            "batches": self.batches,
+            "unmatched": self.unmatched,
+            "unmatched_locks": dict(self.unmatched_locks),
+        }
+
+
+def webhook_router(hass: HomeAssistant) -> WebhookRouter:
+    """Return the webhook router, creating it on first use."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if TT_ROUTER not in data:
+        data[TT_ROUTER] = WebhookRouter(coordinator_index(hass))
+    return data[TT_ROUTER]
+
+
+class AutoLockTimers:
+    """One pending auto-lock timer per lock, replaced by every newer event."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize without pending timers."""
+        self.hass = hass
+        self._timers: dict[int, Callable[[], None]] = {}
+        self.scheduled = 0
+        self.rescheduled = 0
+        self.fired = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of locks waiting to auto-lock."""
+        return len(self._timers)
+
+    @callback
+    def async_schedule(
+        self, lock_id: int, delay: float, action: Callable[[], None]
+    ) -> None:
+        """Run action after delay seconds, replacing the lock's pending timer."""
+        if self.async_cancel(lock_id):
+            self.rescheduled += 1
+        self.scheduled += 1
+
+        @callback
+        def _fire(_now=None) -> None:
+            self._timers.pop(lock_id, None)
+            self.fired += 1
+            action()
+
+        self._timers[lock_id] = async_call_later(self.hass, delay, _fire)
+
+    @callback
+    def async_cancel(self, lock_id: int) -> bool:
+        """Cancel the pending timer of a lock, if any."""
+        if (unsub := self._timers.pop(lock_id, None)) is None:
+            return False
+        unsub()
+        return True
+
+    def as_dict(self) -> dict:
+        """Serialize for diagnostics."""
+        return {
+            "pending": self.pending,
+            "scheduled": self.scheduled,
+            "rescheduled": self.rescheduled,
+            "fired": self.fired,
+        }
+
+
+def auto_lock_timers(hass: HomeAssistant) -> AutoLockTimers:
+    """Return the auto-lock timers, creating them on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if TT_AUTO_LOCK not in domain_data:
+        domain_data[TT_AUTO_LOCK] = AutoLockTimers(hass)
+    return domain_data[TT_AUTO_LOCK]
+
+
+class PollScheduler:
+    """Pick the refresh interval of each lock of an account.
+
+    A lock polls often right after a lock/unlock and while webhooks look
+    broken, i.e. none arrived for the account lately or a poll found a state
+    change no webhook reported. It backs off while webhooks arrive.
+
+    The `budget` of refreshes per hour goes to the active and quiet locks
+    first; if they want more, their intervals are stretched by the same
+    factor. Idle locks share what is left, stretched up to
+    POLL_MAX_INTERVAL. Locks are rescheduled sooner when a stretch falls.
+
+    Refreshes are aligned to a per-lock phase of the interval, counted on
+    the wall clock, so locks sharing an interval do not all refresh in the
+    same second and a lock keeps its slot across restarts.
+    """
+
+    def __init__(self, budget: float = DEFAULT_POLL_BUDGET) -> None:
+        """Initialize the scheduler of an account."""
+        self.budget = budget
+        self.last_webhook: float | None = None
+        self._last_action: dict[int, float] = {}
+        self._missed: set[int] = set()
+        self._wanted: dict[int, float] = {}
+        self._due: dict[int, float] = {}
+        self._reschedule: dict[int, Callable[[timedelta], None]] = {}
+        self._refreshes: deque[float] = deque()
+
+    def register(
+        self, lock_id: int, reschedule: Callable[[timedelta], None]
+    ) -> Callable[[], None]:
+        """Call `reschedule` with a new delay when a lock may refresh sooner.
+
+        Returns a callback that forgets the lock.
+        """
+        self._reschedule[lock_id] = reschedule
+        return lambda: self.remove(lock_id)
+
+    def note_refresh(self, lock_id: int) -> None:
+        """Record the start of a lock refresh."""
+        now = time.monotonic()
+        self._refreshes.append(now)
+        while self._refreshes[0] < now - POLL_HISTORY.total_seconds():
+            self._refreshes.popleft()
+
+    def note_action(self, lock_id: int) -> None:
+        """Record a lock/unlock of a lock that no webhook confirmed yet."""
+        self._last_action[lock_id] = time.monotonic()
+
+    def note_webhook(self, lock_id: int) -> None:
+        """Record a webhook event of a lock, which confirms its last action."""
+        self.last_webhook = time.monotonic()
+        self._last_action.pop(lock_id, None)
+        self._missed.discard(lock_id)
+
+    def note_missed_event(self, lock_id: int) -> None:
+        """Record that a poll found a change that no webhook reported."""
+        self._missed.add(lock_id)
+
+    def remove(self, lock_id: int) -> None:
+        """Forget a lock, e.g. on unload."""
+        stretches = self.stretch, self.idle_stretch
+        self._last_action.pop(lock_id, None)
+        self._missed.discard(lock_id)
+        self._wanted.pop(lock_id, None)
+        self._due.pop(lock_id, None)
+        self._reschedule.pop(lock_id, None)
+        self._async_reschedule_if_faster(stretches, time.time())
+
+    def _wanted_seconds(self, lock_id: int, now: float) -> float:
+        last_action = self._last_action.get(lock_id)
+        if (
+            last_action is not None
+            and now - last_action < POLL_ACTIVE_WINDOW.total_seconds()
+        ):
+            return POLL_ACTIVE_INTERVAL.total_seconds()
+        if (
+            lock_id in self._missed
+            or self.last_webhook is None
+            or now - self.last_webhook > WEBHOOK_QUIET_AFTER.total_seconds()
+        ):
+            return POLL_QUIET_INTERVAL.total_seconds()
+        return POLL_IDLE_INTERVAL.total_seconds()
+
+    def _rate(self, idle: bool) -> float:
+        """Refreshes per hour the idle or the other locks want."""
+        return sum(
+            3600 / seconds
+            for seconds in self._wanted.values()
+            if (seconds >= POLL_IDLE_INTERVAL.total_seconds()) == idle
+        )
+
+    @property
+    def refreshes_per_hour(self) -> float:
+        """Refreshes per hour the locks want, before the budget is applied."""
+        return self._rate(idle=False) + self._rate(idle=True)
+
+    @property
+    def stretch(self) -> float:
+        """Factor by which active and quiet intervals are stretched."""
+        return max(1.0, self._rate(idle=False) / self.budget)
+
+    @property
+    def idle_stretch(self) -> float:
+        """Factor by which idle intervals are stretched, up to the ceiling."""
+        ceiling = POLL_MAX_INTERVAL / POLL_IDLE_INTERVAL
+        left = self.budget - self._rate(idle=False)
+        if left <= 0:
+            return ceiling
+        return min(ceiling, max(1.0, self._rate(idle=True) / left))
+
+    def _stretched(self, seconds: float) -> float:
+        if seconds >= POLL_IDLE_INTERVAL.total_seconds():
+            seconds *= self.idle_stretch
+        else:
+            seconds *= self.stretch
+        return min(seconds, POLL_MAX_INTERVAL.total_seconds())
+
+    def _delay(self, lock_id: int, now: float) -> float:
+        interval = self._stretched(self._wanted[lock_id])
+        delay = (poll_phase(lock_id) * interval - now) % interval
+        if delay < interval / 2:
+            delay += interval
+        return min(delay, POLL_MAX_INTERVAL.total_seconds())
+
+    def _async_reschedule_if_faster(
+        self, stretches: tuple[float, float], now: float
+    ) -> None:
+        """Move refreshes forward after the budget was freed up."""
+        if self.stretch >= stretches[0] and self.idle_stretch >= stretches[1]:
+            return
+        now_monotonic = time.monotonic()
+        for lock_id, reschedule in list(self._reschedule.items()):
+            if lock_id not in self._wanted or lock_id not in self._due:
+                continue
+            delay = self._delay(lock_id, now)
+            if now_monotonic + delay < self._due[lock_id]:
+                self._due[lock_id] = now_monotonic + delay
+                reschedule(timedelta(seconds=delay))
+
+    def interval(self, lock_id: int, now: float | None = None) -> timedelta:
+        """Return the delay until the next refresh slot of a lock.
+
+        Slots are `poll_phase(lock_id)` into each interval since the Unix
+        epoch (`now` is a time.time() value); a slot less than half an
+        interval away is skipped so a lock never refreshes twice in quick
+        succession. The wanted intervals of all locks are refreshed, so
+        other locks move forward if this frees up budget.
+        """
+        if now is None:
+            now = time.time()
+        now_monotonic = time.monotonic()
+        stretches = self.stretch, self.idle_stretch
+        self._wanted[lock_id] = self._wanted_seconds(lock_id, now_monotonic)
+        for other in self._wanted:
+            self._wanted[other] = self._wanted_seconds(other, now_monotonic)
+        delay = self._delay(lock_id, now)
+        self._due[lock_id] = now_monotonic + delay
+        self._async_reschedule_if_faster(stretches, now)
+        return timedelta(seconds=delay)
+
+    def histogram(self) -> dict[int, int]:
+        """Return how many minutes of the last hour saw each refresh count."""
+        now = time.monotonic()
+        window = int(POLL_HISTORY.total_seconds() // 60)
+        per_minute = Counter(
+            int((now - started) // 60)
+            for started in self._refreshes
+            if now - started < window * 60
+        )
+        histogram = Counter(per_minute[minute] for minute in range(window))
+        return dict(sorted(histogram.items()))
+
+    def as_dict(self) -> dict:
+        """Serialize for diagnostics."""
+        return {
+            "budget": self.budget,
+            "refreshes_per_hour": round(self.refreshes_per_hour, 1),
+            "stretch": round(self.stretch, 2),
+            "idle_stretch": round(self.idle_stretch, 2),
+            "missed_events": sorted(self._missed),
+            "intervals": {
+                lock_id: round(self._stretched(seconds))
+                for lock_id, seconds in self._wanted.items()
+            },
+            # refreshes per minute -> minutes of the last hour with that rate
+            "refresh_rate_histogram": self.histogram(),
+        }
+
+
+class LockFleetCoordinator:
+    """Fetch lock/list once per account and fan the rows out per lock."""
+
+    def __init__(
+        self, hass: HomeAssistant, api: TTLockApi, max_age: timedelta = FLEET_MAX_AGE
+    ) -> None:
+        """Initialize the fleet co-ordinator for an account."""
+        self.hass = hass
+        self.api = api
+        self.max_age = max_age
+        self.rows: dict[int, dict] = {}
+        self.list_calls = 0
+        self._last_update: float | None = None
+        self._refresh_lock = asyncio.Lock()
+
+    @property
+    def age(self) -> float | None:
+        """Seconds since the last lock/list call, None before the first."""
+        if self._last_update is None:
+            return None
+        return time.monotonic() - self._last_update
+
+    @property
+    def is_fresh(self) -> bool:
+        """True if the last lock/list call is recent enough to be reused."""
+        return self.age is not None and self.age < self.max_age.total_seconds()
+
+    async def async_refresh(self) -> None:
+        """Refresh the rows, sharing one lock/list call between concurrent callers."""
+        async with self._refresh_lock:
+            if self.is_fresh:
+                return
+
+            self.list_calls += 1
+            try:
+                locks = await self.api.list_locks()
+                self.rows = {
+                    lock["lockId"]: {
+                        field: lock[key]
+                        for key, field in LOCK_LIST_FIELDS.items()
+                        if lock.get(key) is not None
+                    }
+                    for lock in locks
+                }
+            except Exception as err:
+                _LOGGER.warning("Failed to list locks: %s", err)
+                # stale rows would hide the failure, without rows every lock
+                # falls back to lock/detail
+                self.rows = {}
+            # also on failure, so that every co-ordinator does not retry lock/list
+            self._last_update = time.monotonic()
+
+    async def async_get_row(self, lock_id: int) -> dict | None:
+        """Return the Lock fields from lock/list for a single lock."""
+        if not self.is_fresh:
+            await self.async_refresh()
+        return self.rows.get(lock_id)
 
 
 class LockUpdateCoordinator(DataUpdateCoordinator[LockState]):
     """Class to manage fetching Toon data from single endpoint."""
 
-    def __init__(self, hass: HomeAssistant, api: TTLockApi, lock_id: int) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: TTLockApi,
+        lock_id: int,
+        fleet: LockFleetCoordinator | None = None,
+        write_debounce: float = 0,
+        scheduler: PollScheduler | None = None,
+    ) -> None:
         """Initialize the update co-ordinator for a single lock."""
         self.api = api
         self.lock_id = lock_id
+        self.fleet = fleet
+        # adapts update_interval after every refresh, fixed daily poll without
+        self.scheduler = scheduler
+        # seconds within which entity state writes are merged, 0 disables
+        self.write_debounce = write_debounce
+        self.setup_seconds: float | None = None
+        self._entities: dict[str, Entity] = {}
+        self.passcodes = PasscodeCache()
         self._outdated_notified = False  # spam guard: only notify once
 
         super().__init__(
-            hass, _LOGGER, name=DOMAIN, update_interval=timedelta(minutes=1440)
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=(
+                scheduler.interval(lock_id) if scheduler else timedelta(minutes=1440)
+            ),
         )
 
-        async_dispatcher_connect(self.hass, SIGNAL_NEW_DATA, self._process_webhook_data)
+        self._unsub_webhook = coordinator_index(hass).async_register(self)
+        self._unsub_scheduler = (
+            scheduler.register(lock_id, self._async_reschedule)
+            if scheduler
+            else lambda: None
+        )
 
     async def _async_update_data(self) -> LockState:
+        if self.scheduler:
+            self.scheduler.note_refresh(self.lock_id)
         try:
-            _LOGGER.debug("Updating lock %s", self.lock_id)
-            details = await self.api.get_lock(self.lock_id)
+            return await self._async_fetch_data()
+        finally:
+            if self.scheduler:
+                # used by DataUpdateCoordinator to schedule the next refresh
+                self.update_interval = self.scheduler.interval(self.lock_id)
 
-            new_data = deepcopy(self.data) or LockState(
-                name=details.name,
-                mac=details.mac,
-                model=details.model,
-                features=Features.from_feature_value(details.featureValue),
+    async def _async_fetch_data(self) -> LockState:
+        try:
+            _LOGGER.debug("Updating lock %s", self.lock_id)
+            details, state, passage_mode = await asyncio.gather(
+                self._async_fetch(
+                    "details", self._async_get_details(), REFRESH_DETAILS_TIMEOUT
+                ),
+                self._async_fetch(
+                    "lock state",
+                    self.api.get_lock_state(self.lock_id),
+                    REFRESH_STATE_TIMEOUT,
+                ),
+                self._async_fetch(
+                    "passage mode",
+                    self.api.get_lock_passage_mode_config(self.lock_id),
+                    REFRESH_PASSAGE_MODE_TIMEOUT,
+                ),
             )
+            # details are needed to create the state, then any result will do
+            if details is None and (
+                self.data is None or (state is None and passage_mode is None)
+            ):
+                raise UpdateFailed(f"Failed to refresh lock {self.lock_id}")
 
-            # update mutable attributes
-            new_data.name = details.name
-            new_data.battery_level = details.battery_level
-            new_data.hardware_version = details.hardwareRevision
-            new_data.firmware_version = details.firmwareRevision
+            # merge what arrived, keeping the previous value of failed calls
+            changes = {}
+            if details is not None:
+                changes["name"] = details.name
+                changes["battery_level"] = details.battery_level
+                changes["hardware_version"] = details.hardwareRevision
+                changes["firmware_version"] = details.firmwareRevision
+                changes["auto_lock_seconds"] = details.autoLockTime
 
-            _LOGGER.debug("Try to get lock %s lock state", self.lock_id)
-            try:
-                state = await self.api.get_lock_state(self.lock_id)
+            if state is not None:
                 _LOGGER.debug("Lock %s state: %s", self.lock_id, state)
-                new_data.locked = state.locked == State.locked
-            except asyncio.CancelledError as err:
-                _LOGGER.debug("Task cancelled for lock %s: %s", self.lock_id, err)
-                new_data.locked = False
-            except Exception as err:
-                _LOGGER.warning(
-                    "Failed to get lock %s lock state: %s", self.lock_id, err
-                )
-                new_data.locked = False
+                changes["locked"] = state.locked == State.locked
+                if (
+                    self.scheduler
+                    and self.data is not None
+                    and not self.data.action_pending
+                    and self.data.locked is not None
+                    and self.data.locked != changes["locked"]
+                ):
+                    self.scheduler.note_missed_event(self.lock_id)
+            elif self.data is None:
+                changes["locked"] = False
 
-            new_data.auto_lock_seconds = details.autoLockTime
-            new_data.passage_mode_config = await self.api.get_lock_passage_mode_config(
-                self.lock_id
-            )
+            if passage_mode is not None:
+                changes["passage_mode_config"] = passage_mode
 
-            return new_data
+            if self.data is None:
+                return LockState(
+                    mac=details.mac,
+                    model=details.model,
+                    features=Features.from_feature_value(details.featureValue),
+                    **changes,
+                )
+            return replace(self.data, **changes)
         except ComponentOutdatedError as err:
             if not self._outdated_notified:
                 self._outdated_notified = True
@@ -192,57 +782,152 @@ class LockUpdateCoordinator(DataUpdateCoordinator[LockState]):
             _LOGGER.warning("Failed to update lock %s: %s", self.lock_id, err)
             raise UpdateFailed(err) from err
 
-    @callback
-    def _process_webhook_data(self, event: WebhookEvent):
-        """Update data."""
-        if event.id != self.lock_id:
-            return
+    async def _async_fetch(
+        self, what: str, call: Awaitable[_T], timeout: timedelta
+    ) -> _T | None:
+        """Await one call of a refresh, None if it fails or times out."""
+        try:
+            return await asyncio.wait_for(call, timeout.total_seconds())
+        except ComponentOutdatedError:
+            raise
+        except asyncio.TimeoutError:
+            _LOGGER.warning(
+                "Timed out getting lock %s %s after %ss",
+                self.lock_id,
+                what,
+                timeout.total_seconds(),
+            )
+        except Exception as err:
+            _LOGGER.warning("Failed to get lock %s %s: %s", self.lock_id, what, err)
+        return None
+
+    async def _async_get_details(self):
+        """Get lock details, the fields that change come from lock/list.
 
-        _LOGGER.debug("Lock %s received %s", self.unique_id, event)
+        lock/detail is answered from the API's response cache, unless there
+        is no lock/list row to take the battery level from. The row is only
+        applied over a detail fetched before it.
+        """
+        row = None
+        if self.fleet is not None:
+            row = await self.fleet.async_get_row(self.lock_id)
+        if row is None:
+            return await self.api.get_lock(self.lock_id, fresh=True)
+        details = await self.api.get_lock(self.lock_id)
+        detail_age = self.api.responses.age("lock/detail", self.lock_id)
+        if detail_age is not None and detail_age < self.fleet.age:
+            return details
+        return details.copy(update=row)
 
-        if not event.success:
+    async def async_set_unavailable(self) -> None:
+        """Seed placeholder data from lock/list for a lock that failed to refresh."""
+        self.last_update_success = False
+        if self.data is not None or self.fleet is None:
             return
 
-        if not self.data:
+        row = await self.fleet.async_get_row(self.lock_id)
+        if row and row.get("mac"):
+            self.data = LockState(
+                name=row.get("name", f"Lock {self.lock_id}"),
+                mac=row["mac"],
+                battery_level=row.get("battery_level"),
+                features=Features.from_feature_value(row.get("featureValue")),
+            )
+
+    async def async_list_passcodes(self, is_parse=True, refresh=False):
+        """List passcodes of the lock, from the cache unless stale or refresh."""
+        if refresh:
+            self.passcodes.invalidate()
+        if (payload := self.passcodes.get()) is None:
+            payload = await self.api.list_passcodes(self.lock_id, is_parse=False)
+            if payload is None:
+                raise UpdateFailed(f"Failed to list passcodes of {self.lock_id}")
+            self.passcodes.set(payload)
+
+        if is_parse:
+            return [Passcode.parse_obj(code) for code in payload["list"]]
+        return payload
+
+    @callback
+    def async_unregister_webhook(self) -> None:
+        """Stop receiving webhook events and poll reschedules."""
+        self._unsub_webhook()
+        self._unsub_scheduler()
+
+    @callback
+    def _process_webhook_events(self, events: list[WebhookEvent]):
+        """Fold a batch of events for this lock into a single data update.
+
+        The pending state of the last event is published before the state
+        the batch ends in, so the locking/unlocking transition is kept; the
+        intermediate states of a burst are not published.
+        """
+        data = self.data
+        pending = None
+        applied = 0
+        for event in events:
+            if event.id != self.lock_id:
+                continue
+
+            _LOGGER.debug("Lock %s received %s", self.unique_id, event)
+            if self.scheduler:
+                # a webhook confirms the action, no need to poll for it
+                self.scheduler.note_webhook(self.lock_id)
+
+            if not event.success or not data:
+                continue
+
+            pending, data = self._apply_webhook_event(data, event)
+            applied += 1
+
+        if not applied:
             return
 
-        new_data = deepcopy(self.data)
-        new_data.battery_level = event.battery_level
+        if pending is not None:
+            self.async_set_updated_data(pending)
+        self.async_set_updated_data(data)
+
+    def _apply_webhook_event(
+        self, data: LockState, event: WebhookEvent
+    ) -> tuple[LockState | None, LockState]:
+        """Return the pending (if any) and final state after an event."""
+        pending = None
+        changes = {"battery_level": event.battery_level}
 
         if state := event.state:
-            auto_lock_delay = self.data.auto_lock_delay(event.lock_ts)
+            if state.locked == State.locked:
+                auto_lock_timers(self.hass).async_cancel(self.lock_id)
+
+            if state.locked is not None:
+                changes["last_user"] = event.user + datetime.now().strftime(
+                    "_%d%H%M%S"
+                )
+                changes["last_reason"] = event.event.description
+
+            auto_lock_delay = data.auto_lock_delay(event.lock_ts)
             if auto_lock_delay is None:
                 # Giả định trạng thái trái ngược với trạng thái mong muốn
                 if state.locked == State.locked:
-                    new_data.locked = False
+                    pending_locked = False
                 elif state.locked == State.unlocked:
-                    new_data.locked = True
-
-                if state.locked is not None:
-                    new_data.last_user = event.user + datetime.now().strftime(
-                        "_%d%H%M%S"
-                    )
-                    new_data.last_reason = event.event.description
+                    pending_locked = True
+                else:
+                    pending_locked = data.locked
 
-                new_data.action_pending = True
-                self.async_set_updated_data(new_data)
-                new_data.action_pending = False
-                new_data.locked = not new_data.locked
+                pending = replace(
+                    data, **changes, locked=pending_locked, action_pending=True
+                )
+                changes["action_pending"] = False
+                changes["locked"] = not pending_locked
 
             else:
                 if state.locked == State.locked:
-                    new_data.locked = True
+                    changes["locked"] = True
                 elif state.locked == State.unlocked:
-                    new_data.locked = False
+                    changes["locked"] = False
                     self._handle_auto_lock(event.lock_ts, event.server_ts)
 
-                if state.locked is not None:
-                    new_data.last_user = event.user + datetime.now().strftime(
-                        "_%d%H%M%S"
-                    )
-                    new_data.last_reason = event.event.description
-
-        self.async_set_updated_data(new_data)
+        return pending, replace(data, **changes)
 
     def _handle_auto_lock(self, lock_ts: datetime, server_ts: datetime):
         """Handle auto-locking the lock."""
@@ -254,18 +939,16 @@ class LockUpdateCoordinator(DataUpdateCoordinator[LockState]):
             _LOGGER.debug("Auto-lock is disabled")
             return
 
-        async def _auto_locked(seconds: int, offset: float = 0):
-            if seconds > 0 and (seconds - offset) > 0:
-                await asyncio.sleep(seconds - offset)
-
-            new_data = deepcopy(self.data)
-            new_data.locked = True
-            new_data.last_reason = "Auto Lock"
-
+        @callback
+        def _auto_locked() -> None:
             _LOGGER.debug("Assuming lock auto locked after %s seconds", auto_lock_delay)
-            self.async_set_updated_data(new_data)
+            self.async_set_updated_data(
+                replace(self.data, locked=True, last_reason="Auto Lock")
+            )
 
-        self.hass.create_task(_auto_locked(auto_lock_delay, computed_msg_delay))
+        auto_lock_timers(self.hass).async_schedule(
+            self.lock_id, max(0, auto_lock_delay - computed_msg_delay), _auto_locked
+        )
 
     @property
     def unique_id(self) -> str:
@@ -287,16 +970,32 @@ class LockUpdateCoordinator(DataUpdateCoordinator[LockState]):
     @property
     def entities(self) -> list[Entity]:
         """Entities belonging to this co-ordinator."""
-        return [
-            callback.__self__
-            for callback, _ in list(self._listeners.values())
-            if isinstance(callback.__self__, Entity)
-        ]
+        return list(self._entities.values())
+
+    @callback
+    def async_add_entity(self, entity: Entity) -> None:
+        """Index an entity that was added to hass."""
+        self._entities[entity.entity_id] = entity
+        coordinator_index(self.hass).by_entity_id[entity.entity_id] = self
+
+    @callback
+    def async_remove_entity(self, entity: Entity) -> None:
+        """Drop an entity that is being removed from hass."""
+        self._entities.pop(entity.entity_id, None)
+        index = coordinator_index(self.hass)
+        if index.by_entity_id.get(entity.entity_id) is self:
+            del index.by_entity_id[entity.entity_id]
 
     def as_dict(self) -> dict:
         """Serialize for diagnostics."""
         return {
             "unique_id": self.unique_id,
+            "available": self.last_update_success,
+            "setup_seconds": self.setup_seconds,
+            "passcode_cache": {
+                "hits": self.passcodes.hits,
+                "misses": self.passcodes.misses,
+            },
             "device": asdict(self.data),
             "entities": [
                 self.hass.states.get(entity.entity_id).as_dict()
@@ -309,11 +1008,30 @@ class LockUpdateCoordinator(DataUpdateCoordinator[LockState]):
         with lock_action(self):
             res = await self.api.lock(self.lock_id)
             if res:
-                self.data.locked = True
+                auto_lock_timers(self.hass).async_cancel(self.lock_id)
+                self.data = replace(self.data, locked=True)
+                self._async_note_action()
 
     async def unlock(self) -> None:
         """Try to unlock the lock."""
         with lock_action(self):
             res = await self.api.unlock(self.lock_id)
             if res:
-                self.data.locked = False
+                self.data = replace(self.data, locked=False)
+                self._async_note_action()
+
+    @callback
+    def _async_note_action(self) -> None:
+        """Poll sooner after the lock was locked or unlocked."""
+        if not self.scheduler:
+            return
+        self.scheduler.note_action(self.lock_id)
+        interval = self.scheduler.interval(self.lock_id)
+        if self.update_interval is None or interval < self.update_interval:
+            self._async_reschedule(interval)
+
+    @callback
+    def _async_reschedule(self, interval: timedelta) -> None:
+        """Move the next refresh to `interval` from now."""
+        self.update_interval = interval
+        self._schedule_refresh()
@@ -4,10 +4,19 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 
 from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .coordinator import LockUpdateCoordinator
 
+# changes of these are written at once, all others are debounced
+STATE_ATTRS = (
+    "available",
+    "_attr_is_locked",
+    "_attr_is_locking",
+    "_attr_is_unlocking",
+)
+
 
 class BaseLockEntity(CoordinatorEntity[LockUpdateCoordinator], ABC):
     """Abstract base class for lock entity."""
@@ -24,7 +33,10 @@ class BaseLockEntity(CoordinatorEntity[LockUpdateCoordinator], ABC):
         self._attr_unique_id = (
             f"{coordinator.unique_id}-{self.__class__.__name__.lower()}"
         )
+        self._unsub_write = None
         self._update_from_coordinator()
+        # written when the entity is added
+        self._written_state = self._state_values()
 
         # self.entity_description = description
 
@@ -32,8 +44,54 @@ class BaseLockEntity(CoordinatorEntity[LockUpdateCoordinator], ABC):
     def _update_from_coordinator(self) -> None:
         pass
 
+    async def async_added_to_hass(self) -> None:
+        """Register the entity with its coordinator."""
+        await super().async_added_to_hass()
+        self.coordinator.async_add_entity(self)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Unregister the entity from its coordinator."""
+        await super().async_will_remove_from_hass()
+        self._cancel_debounced_write()
+        self.coordinator.async_remove_entity(self)
+
     @callback
     def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
+        """Handle updated data from the coordinator.
+
+        With a debounce window, attribute-only changes within the window are
+        merged into one write, e.g. a burst of battery and operator updates.
+        A changed availability or lock state (see STATE_ATTRS) and pending
+        actions are written at once, so automations see every transition.
+        """
         self._update_from_coordinator()
+        data = self.coordinator.data
+        if (
+            not self.coordinator.write_debounce
+            or (data and data.action_pending)
+            or self._state_values() != self._written_state
+        ):
+            self._cancel_debounced_write()
+            self._write_state()
+        elif self._unsub_write is None:
+            self._unsub_write = async_call_later(
+                self.hass, self.coordinator.write_debounce, self._async_debounced_write
+            )
+
+    @callback
+    def _async_debounced_write(self, _now=None) -> None:
+        """Write the state merged during the debounce window."""
+        self._unsub_write = None
+        self._write_state()
+
+    def _state_values(self) -> tuple:
+        return tuple(getattr(self, name, None) for name in STATE_ATTRS)
+
+    def _write_state(self) -> None:
+        self._written_state = self._state_values()
         self.async_write_ha_state()
+
+    def _cancel_debounced_write(self) -> None:
+        if self._unsub_write is not None:
+            self._unsub_write()
+            self._unsub_write = None
@@ -1,10 +1,13 @@
 """Models for parsing the TTLock API data."""
 
+from array import array
 from collections import namedtuple
 from datetime import datetime
 from enum import Enum, IntEnum, IntFlag, auto
+import time
+from typing import Any
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, ValidationError, validator
 
 from homeassistant.util import dt
 
@@ -78,11 +81,122 @@ class Lock(BaseModel):
     noKeyPwd: str = Field(alias="adminPwd")
 
 
+_UNSET = object()
+
+
+def _view_field(name: str) -> property:
+    def get(self: "ModelView") -> Any:
+        value = self._values.get(name, _UNSET)
+        return self._load(name) if value is _UNSET else value
+
+    return property(get)
+
+
+class ModelView:
+    """Read-only view of a raw API payload, validated per field on access.
+
+    Fields are validated with the fields of `_model`, so they match what
+    _model.parse_obj() would return, but only the fields actually read are
+    converted. Plain int/str values, lists of them and enums skip the
+    pydantic validator.
+    """
+
+    __slots__ = ("_raw", "_values")
+    _model: type[BaseModel]
+    _plain_types: dict[str, type] = {}
+    _list_types: dict[str, type] = {}
+    _enum_types: dict[str, type[Enum]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Add a property per model field."""
+        super().__init_subclass__(**kwargs)
+        cls._plain_types, cls._list_types, cls._enum_types = {}, {}, {}
+        for name, field in cls._model.__fields__.items():
+            setattr(cls, name, _view_field(name))
+            if field.class_validators:
+                continue
+            if field.outer_type_ == list[field.type_] and field.type_ in (int, str):
+                cls._list_types[name] = field.type_
+            elif field.outer_type_ is not field.type_:
+                continue
+            elif field.type_ in (int, str):
+                cls._plain_types[name] = field.type_
+            elif isinstance(field.type_, type) and issubclass(field.type_, Enum):
+                cls._enum_types[name] = field.type_
+
+    def __init__(self, raw: dict[str, Any]) -> None:
+        """Initialize from the raw payload."""
+        self._raw = raw
+        self._values: dict[str, Any] = {}
+
+    def _load(self, name: str) -> Any:
+        field = self._model.__fields__[name]
+        if field.alias in self._raw:
+            value = self._raw[field.alias]
+            if value is None and field.allow_none:
+                self._values[name] = value
+                return value
+            if type(value) is self._plain_types.get(name):
+                self._values[name] = value
+                return value
+            if type(value) is list and (item_type := self._list_types.get(name)):
+                if all(type(item) is item_type for item in value):
+                    value = self._values[name] = list(value)
+                    return value
+            if (enum_type := self._enum_types.get(name)) is not None:
+                try:
+                    value = self._values[name] = enum_type(value)
+                    return value
+                except ValueError:
+                    pass  # let pydantic report it
+        elif field.required:
+            raise ValueError(f"{self._model.__name__}.{field.alias} is missing")
+        elif not field.validate_always:
+            value = self._values[name] = field.get_default()
+            return value
+        else:
+            value = field.get_default()
+
+        value, error = field.validate(value, {}, loc=field.alias, cls=self._model)
+        if error:
+            raise ValidationError([error], self._model)
+        self._values[name] = value
+        return value
+
+    def copy(self, update: dict[str, Any] | None = None) -> "ModelView":
+        """Return a view of the same payload with fields overridden by name."""
+        view = type(self)(self._raw)
+        view._values.update(self._values)
+        view._values.update(update or {})
+        return view
+
+    def __repr__(self) -> str:
+        """Show the raw payload keys."""
+        return f"{type(self).__name__}({sorted(self._raw)})"
+
+
+class LockView(ModelView):
+    """Lazy view of a lock/detail payload."""
+
+    __slots__ = ()
+    _model = Lock
+
+
 class LockState(BaseModel):
     """Lock state."""
 
     locked: State | None = Field(State.unknown, alias="state")
 
+    class Config:
+        """Shared instances below must not be changed."""
+
+        allow_mutation = False
+
+
+LOCKED = LockState(state=State.locked)
+UNLOCKED = LockState(state=State.unlocked)
+UNKNOWN_STATE = LockState(state=None)
+
 
 class PassageModeConfig(BaseModel):
     """The passage mode configuration of the lock."""
@@ -103,6 +217,13 @@ class PassageModeConfig(BaseModel):
         return end_minute or 0
 
 
+class PassageModeView(ModelView):
+    """Lazy view of a lock/getPassageModeConfig payload."""
+
+    __slots__ = ()
+    _model = PassageModeConfig
+
+
 class PasscodeType(IntEnum):
     """Type of passcode."""
 
@@ -140,6 +261,53 @@ class Passcode(BaseModel):
         return False
 
 
+# passcode types that stop being valid at endDate
+EXPIRING_PASSCODE_TYPES = frozenset({PasscodeType.onetime, PasscodeType.period})
+_NEVER_MS = 2**63 - 1
+
+
+class PasscodeTable:
+    """Columnar view of a raw lock/listKeyboardPwd payload.
+
+    Ids, types and validity are kept as arrays of epoch ms so expiry is one
+    pass over plain integers; Passcode models are only built on request.
+    """
+
+    __slots__ = ("ids", "types", "start_ms", "end_ms", "_rows")
+
+    def __init__(self, rows: list[dict]) -> None:
+        """Initialize from the rows of the payload's "list"."""
+        self._rows = rows
+        self.ids = array("q", [row.get("keyboardPwdId") or 0 for row in rows])
+        self.types = array("b", [row.get("keyboardPwdType") or 0 for row in rows])
+        self.start_ms = array("q", [row.get("startDate") or 0 for row in rows])
+        # a code without endDate never expires
+        self.end_ms = array("q", [row.get("endDate") or _NEVER_MS for row in rows])
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "PasscodeTable":
+        """Build the table of a list_passcodes(is_parse=False) payload."""
+        return cls(payload.get("list", []))
+
+    def __len__(self) -> int:
+        """Return the number of passcodes."""
+        return len(self.ids)
+
+    def expired(self, now_ms: int | None = None) -> list[int]:
+        """Return the row indexes of codes whose endDate is before now_ms."""
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+        return [
+            index
+            for index, (code_type, end_ms) in enumerate(zip(self.types, self.end_ms))
+            if end_ms < now_ms and code_type in EXPIRING_PASSCODE_TYPES
+        ]
+
+    def passcode(self, index: int) -> Passcode:
+        """Return the Passcode model of a row."""
+        return Passcode.parse_obj(self._rows[index])
+
+
 class AddPasscodeConfig(BaseModel):
     """The passcode creation configuration."""
 
@@ -156,14 +324,24 @@ class Action(Enum):
 
 
 EventDescription = namedtuple("EventDescription", ["action", "description"])
+# what a recordType does, and the lock state after it succeeded
+EventInfo = namedtuple("EventInfo", ["action", "description", "state"])
+
+_ACTION_STATES = {Action.lock: LOCKED, Action.unlock: UNLOCKED}
+UNKNOWN_EVENT = EventInfo(Action.unknown, "unknown", UNKNOWN_STATE)
 
 
 class Event:
     """Event description for lock events."""
 
+    __slots__ = ("_value_", "_info")
+
     def __init__(self, event_id: int):
         """Initialize from int event id."""
         self._value_ = event_id
+        self._info = (
+            EVENT_TABLE[event_id] if 0 <= event_id < len(EVENT_TABLE) else None
+        ) or UNKNOWN_EVENT
 
     EVENTS: dict[int, EventDescription] = {
         1: EventDescription(Action.unlock, "unlock by app"),
@@ -213,12 +391,6 @@ class Event:
         63: EventDescription(Action.unlock, "auto unlock at passage mode"),
     }
 
-    @property
-    def _info(self) -> EventDescription:
-        return self.EVENTS.get(
-            self._value_, EventDescription(Action.unknown, "unknown")
-        )
-
     @property
     def action(self) -> Action:
         """The action this event represents."""
@@ -243,13 +415,28 @@ class Event:
         if v not in cls.EVENTS:
             raise ValueError("invalid record")
 
-        return cls(v)
+        return _EVENTS_BY_ID[v]
 
     def __repr__(self):
         """Representation of the event."""
         return f"Event({self._info})"
 
 
+def _event_table() -> list[EventInfo | None]:
+    table: list[EventInfo | None] = [None] * (max(Event.EVENTS) + 1)
+    for event_id, (action, description) in Event.EVENTS.items():
+        table[event_id] = EventInfo(
+            action, description, _ACTION_STATES.get(action, UNKNOWN_STATE)
+        )
+    return table
+
+
+# flat lookup by recordType, None where the id is not a known record type
+EVENT_TABLE = _event_table()
+# events are immutable, validation hands out one instance per recordType
+_EVENTS_BY_ID = {event_id: Event(event_id) for event_id in Event.EVENTS}
+
+
 class WebhookEvent(BaseModel):
     """Event from the API (via webhook)."""
 
@@ -266,13 +453,8 @@ class WebhookEvent(BaseModel):
 
     @property
     def state(self) -> LockState:
-        """The end state of the lock after this event."""
-        if self.success and self.event.action == Action.lock:
-            return LockState(state=State.locked)
-        elif self.success and self.event.action == Action.unlock:
-            return LockState(state=State.unlocked)
-
-        return LockState(state=None)
+        """The end state of the lock after this event (a shared instance)."""
+        return self.event._info.state if self.success else UNKNOWN_STATE
 
 
 class Features(IntFlag):
@@ -0,0 +1,257 @@
+"""Local append-only history of TTLock unlock records."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .api import TTLockApi
+from .const import DOMAIN, RECORD_STORE_FILE, RECORD_SYNC_OVERLAP, TT_RECORDS
+
+_LOGGER = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    lock_id INTEGER NOT NULL,
+    record_id INTEGER NOT NULL,
+    lock_ts INTEGER NOT NULL,
+    server_ts INTEGER,
+    record_type INTEGER,
+    username TEXT,
+    success INTEGER,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (lock_id, record_id)
+);
+CREATE TABLE IF NOT EXISTS high_water (
+    lock_id INTEGER PRIMARY KEY,
+    lock_ts INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_by_lock ON records (lock_id, lock_ts);
+CREATE INDEX IF NOT EXISTS records_by_user ON records (username, lock_ts);
+CREATE INDEX IF NOT EXISTS records_by_type ON records (record_type, lock_ts);
+CREATE INDEX IF NOT EXISTS records_by_time ON records (lock_ts, lock_id, record_id);
+"""
+
+# newest first; (lock_ts, lock_id, record_id) is unique and used as cursor
+ORDER = " ORDER BY lock_ts DESC, lock_id DESC, record_id DESC"
+
+# rows sampled per index by ANALYZE, keeps PRAGMA optimize cheap
+ANALYSIS_LIMIT = 400
+
+
+def _parse_cursor(cursor: str) -> tuple[int, int, int]:
+    """Return the sort key of a next_cursor, see ORDER."""
+    parts = cursor.split(":")
+    try:
+        if len(parts) != 3:
+            raise ValueError
+        return tuple(int(part) for part in parts)
+    except ValueError:
+        raise ValueError(f"invalid cursor {cursor!r}") from None
+
+
+def _row(lock_id: int, record: dict) -> tuple:
+    return (
+        lock_id,
+        record.get("recordId"),
+        record.get("lockDate", 0),
+        record.get("serverDate"),
+        record.get("recordType"),
+        record.get("username"),
+        record.get("success"),
+        json.dumps(record, separators=(",", ":")),
+    )
+
+
+class UnlockRecordStore:
+    """SQLite store of unlock records with a per-lock high-water mark.
+
+    Records are only ever inserted; a record already stored is ignored, so a
+    sync that is interrupted can simply be run again.
+    """
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        """Initialize the store, the database is opened on first use."""
+        self.hass = hass
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        # one database call at a time, one sync at a time
+        self._db_lock = asyncio.Lock()
+        self._sync_lock = asyncio.Lock()
+
+    async def _run(self, func, *args):
+        async with self._db_lock:
+            return await self.hass.async_add_executor_job(func, *args)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(SCHEMA)
+            # index statistics for the planner, only refreshed when stale
+            self._conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+            self._conn.execute("PRAGMA optimize = 0x10002")
+        return self._conn
+
+    def _high_water(self, lock_id: int) -> int:
+        row = (
+            self._connection()
+            .execute("SELECT lock_ts FROM high_water WHERE lock_id = ?", (lock_id,))
+            .fetchone()
+        )
+        return row[0] if row else 0
+
+    def _append(self, lock_id: int, records: list[dict]) -> int:
+        conn = self._connection()
+        before = conn.total_changes
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [_row(lock_id, record) for record in records],
+            )
+        return conn.total_changes - before
+
+    def _set_high_water(self, lock_id: int, lock_ts: int) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO high_water VALUES (?, ?) ON CONFLICT(lock_id)"
+                " DO UPDATE SET lock_ts = MAX(lock_ts, excluded.lock_ts)",
+                (lock_id, lock_ts),
+            )
+
+    def _query(
+        self,
+        lock_ids: list[int] | None,
+        username: str | None,
+        record_types: list[int] | None,
+        start_ts: int | None,
+        end_ts: int | None,
+        limit: int,
+        cursor: tuple[int, int, int] | None,
+    ) -> dict:
+        where, params = [], []
+        if lock_ids:
+            where.append(f"lock_id IN ({', '.join('?' * len(lock_ids))})")
+            params.extend(lock_ids)
+        if username is not None:
+            where.append("username = ?")
+            params.append(username)
+        if record_types:
+            where.append(f"record_type IN ({', '.join('?' * len(record_types))})")
+            params.extend(record_types)
+        if start_ts is not None:
+            where.append("lock_ts >= ?")
+            params.append(start_ts)
+        if end_ts is not None:
+            where.append("lock_ts < ?")
+            params.append(end_ts)
+        if cursor:
+            where.append("(lock_ts, lock_id, record_id) < (?, ?, ?)")
+            params.extend(cursor)
+
+        sql = "SELECT lock_ts, lock_id, record_id, payload FROM records"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        rows = (
+            self._connection()
+            .execute(sql + ORDER + " LIMIT ?", (*params, limit + 1))
+            .fetchall()
+        )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = ":".join(str(part) for part in rows[-1][:3])
+        return {
+            "records": [json.loads(row[3]) for row in rows],
+            "next_cursor": next_cursor,
+        }
+
+    async def async_query(
+        self,
+        lock_ids: list[int] | None = None,
+        username: str | None = None,
+        record_types: list[int] | None = None,
+        start_ts: int | None = None,
+        end_ts: int | None = None,
+        limit: int = 100,
+        cursor: str | None = None,
+    ) -> dict:
+        """Return stored records matching the filters, newest first.
+
+        Times are lockDate epoch ms, end_ts is exclusive. Pass next_cursor of
+        a result as cursor to get the following page.
+        """
+        return await self._run(
+            self._query,
+            lock_ids,
+            username,
+            record_types,
+            start_ts,
+            end_ts,
+            limit,
+            _parse_cursor(cursor) if cursor else None,
+        )
+
+    async def async_high_water(self, lock_id: int) -> int:
+        """Return lockDate (ms) of the newest stored record of a lock, or 0."""
+        return await self._run(self._high_water, lock_id)
+
+    async def async_sync(self, api: TTLockApi, lock_id: int) -> dict:
+        """Fetch records newer than the high-water mark and append them.
+
+        lockRecord/list filters on lockDate, and a lock that was offline
+        uploads its records later, dated before the mark. The sync starts
+        RECORD_SYNC_OVERLAP below the mark so those still arrive; records
+        already stored are ignored.
+
+        The mark only moves once every page was stored, since lockRecord/list
+        returns the newest records first.
+        """
+        async with self._sync_lock:
+            high_water = await self._run(self._high_water, lock_id)
+            start = max(0, high_water - RECORD_SYNC_OVERLAP) if high_water else 0
+            fetched = added = 0
+            newest = high_water
+            async for records in api.iter_unlock_records(lock_id, start):
+                fetched += len(records)
+                added += await self._run(self._append, lock_id, records)
+                newest = max(
+                    newest, *(record.get("lockDate", 0) for record in records)
+                )
+
+            if newest > high_water:
+                await self._run(self._set_high_water, lock_id, newest)
+
+        _LOGGER.debug(
+            "Lock %s records synced: %s fetched, %s new", lock_id, fetched, added
+        )
+        return {"fetched": fetched, "added": added, "high_water": newest}
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            # stores statistics for the queries run since the database opened
+            self._conn.execute("PRAGMA optimize")
+            self._conn.close()
+            self._conn = None
+
+    async def async_close(self, event: Event | None = None) -> None:
+        """Close the database once the database calls in flight are done."""
+        await self._run(self._close)
+
+
+def record_store(hass: HomeAssistant) -> UnlockRecordStore:
+    """Return the unlock record store, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if TT_RECORDS not in domain_data:
+        store = UnlockRecordStore(
+            hass, hass.config.path(STORAGE_DIR, RECORD_STORE_FILE)
+        )
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, store.async_close)
+        domain_data[TT_RECORDS] = store
+    return domain_data[TT_RECORDS]
@@ -0,0 +1,367 @@
+"""Account-wide request scheduling, coalescing and caching for TTLockApi."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Hashable,
+    Iterator,
+    Mapping,
+)
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+import time
+from typing import Any, TypeVar
+
+from .const import (
+    AIMD_BACKOFF_INTERVAL,
+    AIMD_DECREASE,
+    AIMD_INITIAL_WINDOW,
+    AIMD_LATENCY_LIMIT,
+    AIMD_LATENCY_SAMPLES,
+    AIMD_MIN_SAMPLES,
+)
+
+# request lanes of the account scheduler, highest priority first
+LANE_INTERACTIVE = "interactive"  # lock and unlock
+LANE_SERVICE = "service"  # service calls
+LANE_BACKGROUND = "background"  # polling and everything else
+LANE_BULK = "bulk"  # passcode provisioning and cleanup sweeps
+REQUEST_LANES = (LANE_INTERACTIVE, LANE_SERVICE, LANE_BACKGROUND, LANE_BULK)
+
+_request_lane: ContextVar[str] = ContextVar("request_lane", default=LANE_BACKGROUND)
+
+
+@contextmanager
+def request_lane(lane: str) -> Iterator[None]:
+    """Send the requests made inside the block in the given lane."""
+    token = _request_lane.set(lane)
+    try:
+        yield
+    finally:
+        _request_lane.reset(token)
+
+
+class LaneStats:
+    """Queue depth and wait times of one request lane."""
+
+    __slots__ = ("queue", "requests", "delayed", "total_wait", "max_wait")
+
+    def __init__(self) -> None:
+        """Initialize the lane."""
+        self.queue: deque[asyncio.Future] = deque()
+        self.requests = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        self.requests += 1
+        if wait > 0:
+            self.delayed += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self) -> dict:
+        return {
+            "queued": len(self.queue),
+            "requests": self.requests,
+            "delayed": self.delayed,
+            "mean_wait_ms": round(self.total_wait / self.requests * 1000, 1)
+            if self.requests
+            else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+        }
+
+
+class AdaptiveWindow:
+    """AIMD limit on the requests of an account in flight at once.
+
+    The limit grows by one per window of healthy responses and is cut by
+    AIMD_DECREASE when the cloud pushes back: HTTP 429/5xx, a throttling
+    errcode, a timeout, or a p90 latency above AIMD_LATENCY_LIMIT. It is
+    cut at most once per AIMD_BACKOFF_INTERVAL, so one burst of failures
+    counts once.
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1) -> None:
+        """Initialize the window."""
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.decreases = 0
+        self._backed_off = -AIMD_BACKOFF_INTERVAL
+        self._latencies: deque[float] = deque(maxlen=AIMD_LATENCY_SAMPLES)
+
+    @property
+    def size(self) -> int:
+        """Number of requests allowed in flight."""
+        return int(self.limit)
+
+    def percentile(self, fraction: float) -> float | None:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def record(self, latency: float | None, overloaded: bool = False) -> None:
+        """Grow or shrink the window after a response."""
+        if latency is not None:
+            self._latencies.append(latency)
+        slow = (
+            len(self._latencies) >= AIMD_MIN_SAMPLES
+            and self.percentile(0.9) > AIMD_LATENCY_LIMIT
+        )
+        if overloaded or slow:
+            self.back_off()
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def back_off(self) -> None:
+        """Shrink the window multiplicatively."""
+        now = time.monotonic()
+        if now - self._backed_off < AIMD_BACKOFF_INTERVAL:
+            return
+        self._backed_off = now
+        self.limit = max(self.minimum, self.limit * AIMD_DECREASE)
+        self.decreases += 1
+
+    def as_dict(self) -> dict:
+        p50, p90 = self.percentile(0.5), self.percentile(0.9)
+        return {
+            "size": self.size,
+            "limit": round(self.limit, 2),
+            "maximum": self.maximum,
+            "decreases": self.decreases,
+            "p50_ms": None if p50 is None else round(p50 * 1000),
+            "p90_ms": None if p90 is None else round(p90 * 1000),
+        }
+
+
+class RequestScheduler:
+    """Token bucket and concurrency window shared by all requests of an account.
+
+    Tokens refill at `rate` per second up to `burst`, and at most
+    `window.size` requests are in flight at once. A request that cannot
+    start queues in its lane; a freed token or slot goes to the oldest
+    request of the highest priority lane, so lock and unlock never wait
+    behind a backlog of polls.
+    """
+
+    def __init__(
+        self, rate: float, burst: int, window: AdaptiveWindow | None = None
+    ) -> None:
+        """Initialize the scheduler with a full bucket."""
+        self.rate = rate
+        self.burst = burst
+        self.window = window or AdaptiveWindow(AIMD_INITIAL_WINDOW, burst)
+        self.in_flight = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._timer: asyncio.TimerHandle | None = None
+        self.lanes = {lane: LaneStats() for lane in REQUEST_LANES}
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        refilled = self._tokens + (now - self._updated) * self.rate
+        self._tokens = min(self.burst, refilled)
+        self._updated = now
+
+    def _can_start(self) -> bool:
+        return self._tokens >= 1 and self.in_flight < self.window.size
+
+    def _start(self) -> None:
+        self._tokens -= 1
+        self.in_flight += 1
+
+    def _queued_ahead(self, lane: str) -> bool:
+        """Whether requests of this or a higher priority lane are waiting."""
+        for name in REQUEST_LANES:
+            if self.lanes[name].queue:
+                return True
+            if name == lane:
+                return False
+        return False
+
+    @asynccontextmanager
+    async def slot(self, lane: str | None = None) -> AsyncIterator[None]:
+        """Hold a token and an in-flight slot for one request."""
+        await self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, lane: str | None = None) -> None:
+        """Wait until a request may be sent in the lane, see release()."""
+        lane = lane or _request_lane.get()
+        stats = self.lanes[lane]
+        self._refill()
+        if self._can_start() and not self._queued_ahead(lane):
+            self._start()
+            stats.record(0.0)
+            return
+
+        start = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        stats.queue.append(waiter)
+        self._schedule()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # granted just before the cancel arrived, hand the token back
+                self._tokens += 1
+                self.release()
+            elif waiter in stats.queue:
+                stats.queue.remove(waiter)
+            raise
+        stats.record(time.monotonic() - start)
+
+    def release(self) -> None:
+        """Free the in-flight slot of a finished request."""
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _schedule(self) -> None:
+        """Wake up when the next token is available."""
+        if self._timer is not None or self.in_flight >= self.window.size:
+            # a finishing request dispatches the queue
+            return
+        self._refill()
+        delay = max(0.0, (1 - self._tokens) / self.rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Start queued requests in lane priority order."""
+        self._refill()
+        for lane in REQUEST_LANES:
+            queue = self.lanes[lane].queue
+            while queue and self._can_start():
+                waiter = queue.popleft()
+                if not waiter.done():
+                    self._start()
+                    waiter.set_result(None)
+        if any(stats.queue for stats in self.lanes.values()):
+            self._schedule()
+
+    def as_dict(self) -> dict:
+        self._refill()
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "in_flight": self.in_flight,
+            "window": self.window.as_dict(),
+            "lanes": {lane: stats.as_dict() for lane, stats in self.lanes.items()},
+        }
+
+
+_T = TypeVar("_T")
+
+
+class RequestCoalescer:
+    """Share one in-flight call between concurrent callers with the same key.
+
+    Callers joining a call in flight get the same result object, so they
+    must not mutate it. A cancelled caller does not cancel the call for
+    the others.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the coalescer."""
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[_T]]) -> _T:
+        """Await call(), or the call already in flight for the key."""
+        task = self._in_flight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.hits += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # every caller may be gone, don't log the error as unretrieved
+            task.exception()
+
+    def as_dict(self) -> dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class ResponseCache:
+    """Payloads of slow-changing GET endpoints, kept for a TTL per path.
+
+    Writes invalidate the entries they change. A payload fetched while an
+    invalidation happened is not stored, it may predate the write.
+    """
+
+    def __init__(self, ttls: Mapping[str, float]) -> None:
+        """Initialize an empty cache."""
+        self.ttls = dict(ttls)
+        self.generation = 0
+        self._entries: dict[tuple[str, str], tuple[float, Any, Mapping]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple[str, str]) -> Mapping | None:
+        """Return the cached payload, or None when missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[2]
+
+    def set(
+        self, key: tuple[str, str], lock_id: Any, payload: Mapping, generation: int
+    ) -> None:
+        """Store a payload fetched when the cache was at `generation`."""
+        if generation == self.generation:
+            expires = time.monotonic() + self.ttls[key[0]]
+            self._entries[key] = (expires, lock_id, payload)
+
+    def age(self, path: str, lock_id: Any) -> float | None:
+        """Seconds since the cached payload of a path and lock was fetched."""
+        now = time.monotonic()
+        for (entry_path, _), (expires, entry_lock_id, _) in self._entries.items():
+            if entry_path == path and entry_lock_id == lock_id and expires >= now:
+                return now - (expires - self.ttls[path])
+        return None
+
+    def invalidate(self, path: str | None = None, lock_id: Any = None) -> None:
+        """Forget the entries of a path and/or lock, all entries without both."""
+        self.generation += 1
+        self._entries = {
+            key: entry
+            for key, entry in self._entries.items()
+            if (path is not None and key[0] != path)
+            or (lock_id is not None and entry[1] != lock_id)
+        }
+
+    def as_dict(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,435 @@
+"""The TTLock integration."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import secrets
+import time
+
+from aiohttp.web import Request
+import yaml
+from homeassistant.components import cloud, persistent_notification, webhook
+from homeassistant.components.webhook import (
+    async_register as webhook_register,
+    async_unregister as webhook_unregister,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    CONF_WEBHOOK_ID,
+    EVENT_HOMEASSISTANT_STARTED,
+    EVENT_HOMEASSISTANT_STOP,
+    Platform,
+)
+from homeassistant.core import CoreState, Event, HomeAssistant
+from homeassistant.helpers import (
+    aiohttp_client,
+    config_entry_oauth2_flow,
+    issue_registry as ir,
+)
+from homeassistant.const import __version__ as ha_version
+from homeassistant.helpers.network import NoURLAvailableError
+import uuid
+from .api import TTLockApi, ComponentOutdatedError
+from .const import (
+    CONF_CONNECTION_LIMIT,
+    CONF_SETUP_CONCURRENCY,
+    CONF_WRITE_DEBOUNCE,
+    CONF_WEBHOOK_STATUS,
+    CONF_WEBHOOK_URL,
+    COMPONENT_VERSION,
+    DEFAULT_CONNECTION_LIMIT,
+    DEFAULT_SETUP_CONCURRENCY,
+    DEFAULT_WRITE_DEBOUNCE,
+    DOMAIN,
+    TT_API,
+    TT_LOCKS,
+    TT_POLL,
+    TT_SETUP,
+    SERVER_URL,
+)
+from .coordinator import (
+    LockFleetCoordinator,
+    LockUpdateCoordinator,
+    PollScheduler,
+    auto_lock_timers,
+    webhook_router,
+)
+from .models import WebhookEvent
+from .services import Services
+import traceback
+
+PLATFORMS: list[Platform] = [Platform.LOCK, Platform.SENSOR, Platform.BINARY_SENSOR]
+# content types whose body is a JSON array or newline-delimited JSON of records
+WEBHOOK_JSON_TYPES = ("application/json", "application/x-ndjson")
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def get_mac():
+    mac = uuid.UUID(int=uuid.getnode()).hex[-12:]
+    mac_dec = int(mac, 16)
+    return mac_dec
+
+
+async def refactor_webhook_url(webhook_url, mac, host):
+    base_url = f"https://{mac}.{host}/api/webhook"
+    new_webhook_url = base_url + webhook_url.split("/api/webhook")[1]
+    return new_webhook_url
+
+
+def parse_webhook_records(raw: str) -> list[dict]:
+    """Parse a JSON array, a single JSON object or newline-delimited JSON.
+
+    Corrupt lines of newline-delimited JSON are logged and skipped, so one
+    bad record does not drop the rest of the batch.
+    """
+    raw = raw.strip()
+    if not raw:
+        return []
+    try:
+        records = json.loads(raw)
+    except ValueError:
+        records = []
+        for number, line in enumerate(raw.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError as err:
+                _LOGGER.warning("Skipping webhook line %s: %s", number, err)
+        return records
+    return records if isinstance(records, list) else [records]
+
+
+def is_new_version():
+    year, version = ha_version.split(".")[:2]
+    if int(year) >= 2024 and int(version) >= 7:
+        return True
+    return False
+
+
+def setup(hass: HomeAssistant, config: ConfigEntry) -> bool:
+    """Set up the TTLock component."""
+    if is_new_version():
+        Services(hass).register_new()
+    else:
+        Services(hass).register_old()
+    return True
+
+
+def _entry_option(entry: ConfigEntry, key: str, default: int) -> int:
+    """Options flow value, falling back to the one stored at setup."""
+    return entry.options.get(key, entry.data.get(key, default))
+
+
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def _async_abort_setup(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    client: TTLockApi | None,
+    locks: list[LockUpdateCoordinator],
+) -> None:
+    """Undo what a failed setup registered, unload is not called for it."""
+    hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
+    for coordinator in locks:
+        coordinator.async_unregister_webhook()
+    if client is not None:
+        await client.async_close()
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    client = None
+    locks: list[LockUpdateCoordinator] = []
+    try:
+        username = entry.data.get("username")
+        password = entry.data.get("password")
+        if SERVER_URL == "https://improved-liger-tops.ngrok-free.app":
+            url = SERVER_URL
+        else:
+            url = SERVER_URL + entry.data.get("url")
+
+        _LOGGER.info(f"Setting up TTLock with url: {url}")
+        client = TTLockApi(
+            hass,
+            aiohttp_client.async_get_clientsession(hass),
+            username,
+            password,
+            url,
+            _entry_option(entry, CONF_CONNECTION_LIMIT, DEFAULT_CONNECTION_LIMIT),
+        )
+        entry.async_on_unload(
+            hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, client.async_close)
+        )
+
+        lock_ids = await client.get_locks()
+        if not lock_ids:
+            _LOGGER.error("No locks found for this account")
+            await client.async_close()
+            return False
+        webhook_gen = WebhookHandler(hass, entry, client, url, lock_ids)
+        await webhook_gen.setup()
+        scheduler = PollScheduler()
+        hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
+            TT_API: client,
+            TT_POLL: scheduler,
+        }
+
+        fleet = LockFleetCoordinator(hass, client)
+        write_debounce = (
+            _entry_option(entry, CONF_WRITE_DEBOUNCE, DEFAULT_WRITE_DEBOUNCE) / 1000
+        )
+        locks = [
+            LockUpdateCoordinator(
+                hass, client, lock_id, fleet, write_debounce, scheduler
+            )
+            for lock_id in lock_ids
+        ]
+        concurrency = _entry_option(
+            entry, CONF_SETUP_CONCURRENCY, DEFAULT_SETUP_CONCURRENCY
+        )
+        semaphore = asyncio.Semaphore(concurrency)
+        setup_start = time.monotonic()
+
+        async def first_refresh(coordinator: LockUpdateCoordinator) -> None:
+            async with semaphore:
+                start = time.monotonic()
+                try:
+                    await coordinator.async_config_entry_first_refresh()
+                except Exception as e:
+                    _LOGGER.error(f"Lỗi khi cập nhật khóa {coordinator.lock_id}: {e}")
+                    await coordinator.async_set_unavailable()
+                finally:
+                    coordinator.setup_seconds = round(time.monotonic() - start, 3)
+
+        await asyncio.gather(*(first_refresh(coordinator) for coordinator in locks))
+
+        failed = [c.lock_id for c in locks if not c.last_update_success]
+        skipped = [c.lock_id for c in locks if c.data is None]
+        if skipped:
+            _LOGGER.error("Skipping locks without any known data: %s", skipped)
+            for coordinator in locks:
+                if coordinator.data is None:
+                    coordinator.async_unregister_webhook()
+
+        hass.data[DOMAIN][entry.entry_id][TT_LOCKS] = [
+            coordinator for coordinator in locks if coordinator.data is not None
+        ]
+        hass.data[DOMAIN][entry.entry_id][TT_SETUP] = {
+            "concurrency": concurrency,
+            "total_seconds": round(time.monotonic() - setup_start, 3),
+            "unavailable": failed,
+        }
+
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+        entry.async_on_unload(entry.add_update_listener(_async_options_updated))
+        _LOGGER.info("TTLock setup complete")
+    except ComponentOutdatedError:
+        _LOGGER.error("Component version is outdated — server rejected the request.")
+        persistent_notification.async_create(
+            hass,
+            "## ⚠️ Javis Lock cần cập nhật\n\n"
+            "Server đã từ chối kết nối vì phiên bản **Javis Lock** đang dùng quá cũ.\n\n"
+            "Vui lòng cập nhật integration lên phiên bản mới nhất qua **HACS** "
+            "hoặc tải thủ công từ repository.",
+            title="Javis Lock — Cần cập nhật",
+            notification_id=f"{DOMAIN}_outdated",
+        )
+        ir.async_create_issue(
+            hass,
+            DOMAIN,
+            "component_outdated",
+            is_fixable=False,
+            severity=ir.IssueSeverity.ERROR,
+            translation_key="component_outdated",
+        )
+        await _async_abort_setup(hass, entry, client, locks)
+        return False
+    except Exception as ex:
+        _LOGGER.error(f"async_setup_new: {traceback.format_exc()}\n")
+        await _async_abort_setup(hass, entry, client, locks)
+        return False
+
+    return True
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Unload a config entry."""
+    if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        for coordinator in entry_data.get(TT_LOCKS, []):
+            coordinator.async_unregister_webhook()
+            auto_lock_timers(hass).async_cancel(coordinator.lock_id)
+        await entry_data[TT_API].async_close()
+
+    return unload_ok
+
+
+class WebhookHandler:
+    """Responsible for setting up/processing webhook data."""
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, client, url, lock_ids
+    ) -> None:
+        """Init the thing."""
+        self.hass = hass
+        self.entry = entry
+        self.client = client
+        self.url = url
+        self.lock_ids = lock_ids
+
+    async def setup(self) -> None:
+        _LOGGER.debug("Setting up webhook")
+        """Actually register the webhook."""
+        if self.hass.state == CoreState.running:
+            return await self.register_webhook()
+
+        self.hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STARTED, self.register_webhook
+        )
+
+    async def get_url(self) -> str:
+        _LOGGER.debug("Getting webhook url")
+        """Get the webhook url depending on the cloud."""
+        if cloud.async_active_subscription(self.hass):
+            if CONF_WEBHOOK_URL not in self.entry.data:
+                try:
+                    return await cloud.async_create_cloudhook(
+                        self.hass, self.entry.data[CONF_WEBHOOK_ID]
+                    )
+                except cloud.CloudNotConnected:
+                    return webhook.async_generate_url(
+                        self.hass, self.entry.data[CONF_WEBHOOK_ID]
+                    )
+            else:
+                return self.entry.data[CONF_WEBHOOK_URL]
+
+        return webhook.async_generate_url(
+            self.hass, self.entry.data[CONF_WEBHOOK_ID]
+        )
+
+    async def register_webhook(self, event: Event | None = None) -> None:
+        """Set up a webhook to receive pushed data."""
+        _LOGGER.debug("Registering webhook")
+        if CONF_WEBHOOK_ID not in self.entry.data:
+            _LOGGER.debug("Webhook not found in config entry, creating new one")
+            data = {**self.entry.data, CONF_WEBHOOK_ID: secrets.token_hex()}
+            self.hass.config_entries.async_update_entry(self.entry, data=data)
+
+        try:
+            webhook_url = await self.get_url()
+            mac = await get_mac()
+            new_webhook_url = await refactor_webhook_url(
+                webhook_url, mac, self.entry.data.get("url")
+            )
+            websession = aiohttp_client.async_get_clientsession(self.hass)
+            _LOGGER.debug("Registering webhook at old url %s", webhook_url)
+            _LOGGER.debug("Registering webhook at new url %s", new_webhook_url)
+            async with websession.post(
+                f"{self.url}/api/add_webhook",
+                json={
+                    "webhook_url": new_webhook_url,
+                    "mac": mac,
+                    "lock_ids": self.lock_ids,
+                },
+                headers={"X-Component-Version": COMPONENT_VERSION},
+            ) as response:
+                if response.status == 200:
+                    _LOGGER.info("Webhook registered")
+                else:
+                    _LOGGER.error(
+                        f"Webhook registration error: {str(await response.text())}"
+                    )
+            data = {**self.entry.data, CONF_WEBHOOK_URL: webhook_url}
+            self.hass.config_entries.async_update_entry(self.entry, data=data)
+        except NoURLAvailableError:
+            _LOGGER.exception("Could not find base URL for installation")
+            ir.async_create_issue(
+                self.hass,
+                DOMAIN,
+                "no_webhook_url",
+                is_fixable=False,
+                severity=ir.IssueSeverity.ERROR,
+                translation_key="no_webhook_url",
+            )
+            return
+
+        ir.async_delete_issue(self.hass, DOMAIN, "no_webhook_url")
+
+        if CONF_WEBHOOK_STATUS not in self.entry.data:
+            self.async_show_setup_message(webhook_url)
+
+        webhook_unregister(self.hass, self.entry.data[CONF_WEBHOOK_ID])
+
+        webhook_register(
+            self.hass,
+            DOMAIN,
+            "TTLock",
+            self.entry.data[CONF_WEBHOOK_ID],
+            self.handle_webhook,
+        )
+
+        self.hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, self.unregister_webhook
+        )
+
+    async def handle_webhook(
+        self, hass: HomeAssistant, webhook_id: str, request: Request
+    ) -> None:
+        """Handle webhook callback."""
+        _LOGGER.debug("Handling webhook")
+
+        success = False
+        if request.content_type in WEBHOOK_JSON_TYPES:
+            raw_batches = [await request.text()]
+        elif data := await request.post():
+            raw_batches = data.getall("records", [])
+        else:
+            raw_batches = []
+
+        events = []
+        for raw_records in raw_batches:
+            try:
+                records = parse_webhook_records(raw_records)
+            except ValueError as ex:
+                _LOGGER.warning("Exception parsing webhook data: %s", ex)
+                continue
+            # a bad record is skipped, the rest of the batch is still routed
+            for record in records:
+                try:
+                    events.append(WebhookEvent.parse_obj(record))
+                except ValueError as ex:
+                    _LOGGER.warning("Skipping webhook record %s: %s", record, ex)
+
+        if events:
+            _LOGGER.debug("Webhook payload received with %s records", len(events))
+            webhook_router(hass).async_route_batch(events)
+            success = True
+        else:
+            _LOGGER.debug("handle_webhook empty payload")
+
+        if success and CONF_WEBHOOK_STATUS not in self.entry.data:
+            self.async_dismiss_setup_message()
+
+    async def unregister_webhook(self, event: Event | None = None) -> None:
+        _LOGGER.debug("Unregistering webhook")
+        """Remove the webhook (usually on shutdown)."""
+        webhook_unregister(self.hass, self.entry.data[CONF_WEBHOOK_ID])
+
+    def async_show_setup_message(self, uri: str) -> None:
+        _LOGGER.debug("Showing setup message")
+        """Show persistent notification with the webhook url."""
+        persistent_notification.async_create(
+            self.hass, f"Webhook url: {uri}", "TTLock Setup", self.entry.entry_id
+        )
+
+    def async_dismiss_setup_message(self) -> None:
+        _LOGGER.debug("Dismissing setup message")
+        """Dismiss persistent notification."""
+        data = {**self.entry.data, CONF_WEBHOOK_STATUS: True}
+        self.hass.config_entries.async_update_entry(self.entry, data=data)
+        persistent_notification.async_dismiss(self.hass, self.entry.entry_id)
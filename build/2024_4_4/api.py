@@ -0,0 +1,641 @@
+"""API for TTLock bound to Home Assistant OAuth."""
+
+import asyncio
+from collections.abc import AsyncIterator, Hashable, Mapping
+from contextlib import nullcontext
+from hashlib import md5
+import json
+import logging
+from secrets import token_hex
+import time
+from typing import Any, cast
+from urllib.parse import urljoin
+from aiohttp import ClientResponse, ClientSession, ClientTimeout
+import traceback
+from aiohttp_retry import RetryClient, ExponentialRetry
+
+import homeassistant.helpers.config_validation as cv
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, CONF_URL
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.helpers.event import async_call_later
+import voluptuous as vol
+import aiohttp
+
+from .const import (
+    AIMD_INITIAL_WINDOW,
+    COMPONENT_VERSION,
+    DEFAULT_ACCOUNT_BURST,
+    DEFAULT_ACCOUNT_QPS,
+    DEFAULT_CONNECTION_LIMIT,
+    GATEWAY_CACHE_TTL,
+    HOST1,
+    HOST2,
+    HOST3,
+    LOCK_DETAIL_CACHE_TTL,
+    PASSAGE_MODE_CACHE_TTL,
+    RECORD_PAGE_SIZE,
+    SERVER_URL,
+    THROTTLE_ERRCODES,
+    TOKEN_REFRESH_MARGIN,
+    TOKEN_REFRESH_MAX_RETRY,
+    TOKEN_REFRESH_RETRY,
+)
+from .models import (
+    AddPasscodeConfig,
+    Features,
+    LockState,
+    LockView,
+    PassageModeConfig,
+    PassageModeView,
+    Passcode,
+)
+from .scheduling import (
+    LANE_INTERACTIVE,
+    AdaptiveWindow,
+    RequestCoalescer,
+    RequestScheduler,
+    ResponseCache,
+    request_lane,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# GETs that send a command rather than read, never shared between callers
+UNCOALESCED_PATHS = frozenset({"lock/lock", "lock/unlock"})
+
+# GET endpoints that rarely change, answered from memory for this many seconds
+RESPONSE_CACHE_TTLS = {
+    "gateway/listByLock": GATEWAY_CACHE_TTL,
+    "lock/detail": LOCK_DETAIL_CACHE_TTL,
+    "lock/getPassageModeConfig": PASSAGE_MODE_CACHE_TTL,
+}
+
+# Shared by GET and POST: retry bad requests, 5xx and dropped connections
+RETRY_OPTIONS = ExponentialRetry(
+    attempts=3,
+    start_timeout=2,
+    statuses={400},
+    exceptions={aiohttp.ClientConnectionError, asyncio.TimeoutError},
+)
+
+AUTH_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_USERNAME): cv.string,
+        vol.Required(CONF_PASSWORD): cv.string,
+        vol.Required(CONF_URL, default=HOST3): vol.In([HOST1, HOST2, HOST3]),
+    }
+)
+
+
+async def login(username: str, password: str, url_cloud: str):
+    if SERVER_URL == "https://improved-liger-tops.ngrok-free.app":
+        url_login = SERVER_URL + "/api/login"
+    else:
+        url_login = SERVER_URL + url_cloud + "/api/login"
+    data = {"username": username, "password": password}
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(
+                url_login, json=data, headers={"X-Component-Version": COMPONENT_VERSION}
+            ) as response:
+                is_error = (await response.json()).get("errcode")
+                if is_error is None:
+                    return {"error": "", "is_success": True}
+                return {
+                    "error": "Invalid username or password",
+                    "is_success": False,
+                }
+    except Exception as e:
+        _LOGGER.error(f"login error 1: {traceback.format_exc()}\n")
+        return {"error": "Server disconected", "is_success": False}
+
+
+class RequestFailed(Exception):
+    """Exception when TTLock API returns an error."""
+
+    pass
+
+
+class ComponentOutdatedError(Exception):
+    """Raised when the server rejects the request due to an outdated component version."""
+
+    pass
+
+
+class TTLockApi:
+    """Provide TTLock authentication tied to an OAuth2 based config entry."""
+
+    def __init__(
+        self,
+        hass,
+        websession: ClientSession,
+        username,
+        password,
+        url,
+        connection_limit: int = DEFAULT_CONNECTION_LIMIT,
+    ) -> None:
+        """Initialize TTLock auth."""
+        self.hass = hass
+        self._web_session = websession
+        self.username = username
+        self.password = password
+        self.base_url = f"{url}/api/"
+        self._version_headers = {"X-Component-Version": COMPONENT_VERSION}
+        self.connection_limit = connection_limit
+        self._session: ClientSession | None = None
+        self._retry_client: RetryClient | None = None
+        self._unsub_token_refresh = None
+        self._token_refresh_failures = 0
+        self._login_task: asyncio.Future[bool] | None = None
+        # every request of the account, by priority lane, the only limiter
+        self.scheduler = RequestScheduler(
+            DEFAULT_ACCOUNT_QPS,
+            DEFAULT_ACCOUNT_BURST,
+            AdaptiveWindow(AIMD_INITIAL_WINDOW, connection_limit),
+        )
+        self.coalescer = RequestCoalescer()
+        self.responses = ResponseCache(RESPONSE_CACHE_TTLS)
+        # commands through the same gateway are sent one at a time
+        self._gateway_locks: dict[Hashable, asyncio.Lock] = {}
+
+    def _client(self) -> RetryClient:
+        """Return the pooled keep-alive client, creating it on first use.
+
+        The session uses the connector pool of Home Assistant, requests in
+        flight are bounded by the scheduler window. async_close closes it.
+        """
+        if self._retry_client is None:
+            self._session = async_create_clientsession(
+                self.hass, auto_cleanup=False, timeout=ClientTimeout(total=180)
+            )
+            self._retry_client = RetryClient(
+                self._session, retry_options=RETRY_OPTIONS, raise_for_status=False
+            )
+        return self._retry_client
+
+    async def async_close(self, event=None) -> None:
+        """Close the pooled client and stop refreshing the token."""
+        if self._unsub_token_refresh is not None:
+            self._unsub_token_refresh()
+            self._unsub_token_refresh = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._retry_client = None
+
+    async def login(self) -> bool:
+        """Log in and schedule the next login, True on success."""
+        url_login = self.base_url + "login"
+        data = {"username": self.username, "password": self.password}
+        try:
+            async with self._web_session.post(
+                url_login, json=data, headers=self._version_headers
+            ) as response:
+                if response.status == 200:
+                    self.token = (await response.json())["access_token"]
+                    self.start_time = int(time.time() * 1000)
+                    self.expires_in = (await response.json())["expires_in"]
+                    _LOGGER.info("login success")
+                    self._token_refresh_failures = 0
+                    self._schedule_token_refresh()
+                    return True
+                _LOGGER.error(f"login error: {str(await response.text())}")
+        except Exception as e:
+            _LOGGER.error(f"login error 1: {traceback.format_exc()}\n")
+        return False
+
+    def _token_valid(self) -> bool:
+        return (
+            hasattr(self, "token")
+            and int(time.time() * 1000) - self.start_time <= self.expires_in
+        )
+
+    async def _shared_login(self) -> bool:
+        """Log in, concurrent callers share the attempt in flight and its result.
+
+        A cancelled caller does not cancel the login for the others.
+        """
+        if self._login_task is None or self._login_task.done():
+            self._login_task = asyncio.ensure_future(self.login())
+        return await asyncio.shield(self._login_task)
+
+    async def ensure_valid_token(self):
+        if not self._token_valid():
+            await self._shared_login()
+
+    def _schedule_token_refresh(self, delay: float | None = None) -> None:
+        """Log in again shortly before the token expires, or after `delay`."""
+        if self._unsub_token_refresh is not None:
+            self._unsub_token_refresh()
+        if delay is None:
+            expires_in = self.expires_in / 1000
+            delay = max(expires_in - TOKEN_REFRESH_MARGIN, expires_in / 2)
+        self._unsub_token_refresh = async_call_later(
+            self.hass, delay, self._async_refresh_token
+        )
+
+    async def _async_refresh_token(self, _now=None) -> None:
+        self._unsub_token_refresh = None
+        _LOGGER.debug("Refreshing token before it expires")
+        if await self._shared_login():
+            return
+        self._token_refresh_failures += 1
+        delay = min(
+            TOKEN_REFRESH_RETRY * 2 ** (self._token_refresh_failures - 1),
+            TOKEN_REFRESH_MAX_RETRY,
+        )
+        _LOGGER.warning("Token refresh failed, retrying in %ss", delay)
+        self._schedule_token_refresh(delay)
+
+    async def _parse_resp(
+        self, resp: ClientResponse, log_id: str, started: float | None = None
+    ) -> Mapping[str, Any]:
+        latency = None if started is None else time.monotonic() - started
+        if resp.status == 426:
+            body = await resp.text()
+            _LOGGER.error(
+                "[%s] Component version outdated (HTTP 426): %s", log_id, body
+            )
+            raise ComponentOutdatedError(
+                "Component version outdated. Please update javis_lock to the latest version."
+            )
+        if resp.status >= 400:
+            body = await resp.text()
+            _LOGGER.debug(
+                "[%s] Request failed: status=%s, body=%s", log_id, resp.status, body
+            )
+            self.scheduler.window.record(
+                latency, resp.status == 429 or resp.status >= 500
+            )
+        else:
+            body = await resp.json()
+            _LOGGER.debug(
+                "[%s] Received response: status=%s: body=%s", log_id, resp.status, body
+            )
+
+        resp.raise_for_status()
+
+        res = cast(dict, await resp.json())
+        self.scheduler.window.record(latency, res.get("errcode") in THROTTLE_ERRCODES)
+        if res.get("errcode", 0) != 0:
+            _LOGGER.debug("[%s] API returned: %s", log_id, res)
+            raise RequestFailed(f"API returned: {res}")
+
+        return cast(dict, await resp.json())
+
+    async def get(self, path: str, **kwargs: Any) -> Mapping[str, Any]:
+        """GET a path, identical concurrent reads share one request.
+
+        Paths in RESPONSE_CACHE_TTLS are answered from the response cache
+        while it is fresh.
+        """
+        return await self._shared_get(path, kwargs)
+
+    async def _shared_get(
+        self, path: str, params: dict[str, Any], lock: asyncio.Lock | None = None
+    ) -> Mapping[str, Any]:
+        """GET through the response cache and the coalescer.
+
+        Only the caller actually sending the request takes `lock`, callers
+        joining it don't queue behind the lock for a request of their own.
+        """
+        if path in UNCOALESCED_PATHS:
+            return await self._scheduled_get(path, params, lock)
+        key = (path, json.dumps(params, sort_keys=True, default=str))
+        cached = path in self.responses.ttls
+        if cached:
+            if (res := self.responses.get(key)) is not None:
+                return res
+            generation = self.responses.generation
+        res = await self.coalescer.run(
+            key, lambda: self._scheduled_get(path, params, lock)
+        )
+        if cached and res is not None:
+            self.responses.set(key, params.get("lockId"), res, generation)
+        return res
+
+    async def _scheduled_get(
+        self, path: str, params: dict[str, Any], lock: asyncio.Lock | None = None
+    ) -> Mapping[str, Any]:
+        # queue for a slot first, holding `lock` only while the request runs
+        async with self.scheduler.slot():
+            async with lock or nullcontext():
+                return await self._get(path, **params)
+
+    async def _get(self, path: str, **kwargs: Any) -> Mapping[str, Any]:
+        await self.ensure_valid_token()
+        kwargs["access_token"] = self.token
+        log_id = token_hex(2)
+
+        url = urljoin(self.base_url, path)
+        _LOGGER.debug("[%s] Sending request to %s with args=%s", log_id, url, kwargs)
+
+        started = time.monotonic()
+        try:
+            async with self._client().get(
+                url,
+                params=kwargs,
+                headers={
+                    "Content-Type": "application/x-www-form-urlencoded",
+                    **self._version_headers,
+                },
+            ) as resp:
+                return await self._parse_resp(resp, log_id, started)
+        except ComponentOutdatedError:
+            raise
+        except Exception as e:
+            if isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+                self.scheduler.window.back_off()
+            _LOGGER.error("[%s] Exception occurred after retries: %s", log_id, str(e))
+            return None
+        except asyncio.CancelledError as err:
+            _LOGGER.error("[%s] Exception occurred after retries: %s", log_id, str(err))
+            return None
+
+    async def post(self, path: str, **kwargs: Any) -> Mapping[str, Any]:
+        async with self.scheduler.slot():
+            return await self._post(path, **kwargs)
+
+    async def _gateway_post(
+        self, lock_id: int, path: str, **kwargs: Any
+    ) -> Mapping[str, Any]:
+        """POST a command for a lock, one at a time per gateway.
+
+        The gateway lock is only taken once the request has a slot, so
+        commands queued in a low priority lane do not hold up the gateway.
+        """
+        gateway = await self.gateway_lock(lock_id)
+        async with self.scheduler.slot():
+            async with gateway:
+                return await self._post(path, lockId=lock_id, **kwargs)
+
+    async def _post(self, path: str, **kwargs: Any) -> Mapping[str, Any]:
+        await self.ensure_valid_token()
+        kwargs["access_token"] = self.token
+
+        log_id = token_hex(2)
+        url = urljoin(self.base_url, path)
+        _LOGGER.debug(
+            "[%s] Sending request to %s with arg_keys=%s",
+            log_id,
+            url,
+            list(kwargs.keys()),
+        )
+
+        started = time.monotonic()
+        try:
+            async with self._client().post(
+                url, json=kwargs, headers=self._version_headers
+            ) as resp:
+                return await self._parse_resp(resp, log_id, started)
+        except ComponentOutdatedError:
+            raise
+        except Exception as e:
+            if isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+                self.scheduler.window.back_off()
+            _LOGGER.error("[%s] Exception occurred after retries: %s", log_id, str(e))
+            return None
+        except asyncio.CancelledError:
+            _LOGGER.error("[%s] Request was cancelled!", log_id)
+            return None
+
+    async def gateway_lock(self, lock_id: int) -> asyncio.Lock:
+        """Return the lock serializing commands through the gateway of a lock.
+
+        Locks on the same gateway share it. A lock without a gateway (wifi)
+        has its own, and so has a lock whose gateway could not be looked up,
+        so one failed lookup does not serialize unrelated locks.
+        """
+        res = await self.get("gateway/listByLock", lockId=lock_id)
+        if res is not None and (
+            gateway_ids := [
+                gateway["gatewayId"]
+                for gateway in res.get("list") or []
+                if gateway.get("gatewayId") is not None
+            ]
+        ):
+            # the cloud may use any gateway in range, take the same one always
+            key = ("gateway", min(gateway_ids))
+        else:
+            key = ("lock", lock_id)
+        if key not in self._gateway_locks:
+            self._gateway_locks[key] = asyncio.Lock()
+        return self._gateway_locks[key]
+
+    async def list_locks(self) -> list[dict]:
+        """Get the raw lock/list rows of the account."""
+        res = await self.get("lock/list")
+        return res["list"]
+
+    async def get_locks(self) -> list[int]:
+        """Enumerate all locks in the account."""
+        locks = await self.list_locks()
+
+        def lock_connectable(lock) -> bool:
+            has_gateway = lock.get("hasGateway") != 0
+            has_wifi = Features.wifi in Features.from_feature_value(
+                lock.get("featureValue")
+            )
+            return has_gateway or has_wifi
+
+        return [lock["lockId"] for lock in locks if lock_connectable(lock)]
+
+    async def get_lock(self, lock_id: int, fresh: bool = False) -> LockView:
+        """Get a lock by ID, fields are parsed when first read.
+
+        The payload comes from the response cache unless fresh is set.
+        """
+        if fresh:
+            self.responses.invalidate("lock/detail", lock_id)
+        res = await self.get("lock/detail", lockId=lock_id)
+        if res is None:
+            raise RequestFailed(f"Failed to get lock {lock_id} details")
+        return LockView(res)
+
+    async def get_lock_state(self, lock_id: int) -> LockState:
+        """Get the state of a lock, concurrent callers share one gateway query."""
+        gateway = await self.gateway_lock(lock_id)
+        res = await self._shared_get(
+            "lock/queryOpenState", {"lockId": lock_id}, gateway
+        )
+        return LockState.parse_obj(res)
+
+    async def get_lock_passage_mode_config(self, lock_id: int) -> PassageModeView:
+        """Get the passage mode configuration of a lock."""
+        res = await self.get("lock/getPassageModeConfig", lockId=lock_id)
+        if res is None:
+            raise RequestFailed(f"Failed to get lock {lock_id} passage mode")
+        return PassageModeView(res)
+
+    async def lock(self, lock_id: int) -> bool:
+        """Try to lock the lock."""
+        with request_lane(LANE_INTERACTIVE):
+            res = await self._shared_get(
+                "lock/lock", {"lockId": lock_id}, await self.gateway_lock(lock_id)
+            )
+
+        if res and res.get("errcode") != 0:
+            msg = f"❌ Failed to lock {lock_id}: {res.get('errmsg', 'Unknown error')}"
+            _LOGGER.error(msg)
+            return False
+
+        if not res:
+            msg = f"❌ Failed to lock {lock_id}"
+            _LOGGER.error(msg)
+            return False
+        return True
+
+    async def unlock(self, lock_id: int) -> bool:
+        """Try to unlock the lock."""
+        with request_lane(LANE_INTERACTIVE):
+            res = await self._shared_get(
+                "lock/unlock", {"lockId": lock_id}, await self.gateway_lock(lock_id)
+            )
+
+        if res and res.get("errcode") != 0:
+            msg = f"❌ Failed to lock {lock_id}: {res.get('errmsg', 'Unknown error')}"
+            _LOGGER.error(msg)
+            return False
+
+        if not res:
+            msg = f"❌ Failed to lock {lock_id}"
+            _LOGGER.error(msg)
+            return False
+        return True
+
+    async def set_passage_mode(self, lock_id: int, config: PassageModeConfig) -> bool:
+        """Configure passage mode."""
+
+        res = await self._gateway_post(
+            lock_id,
+            "lock/configPassageMode",
+            type=2,  # via gateway
+            passageMode=1 if config.enabled else 2,
+            autoUnlock=1 if config.auto_unlock else 2,
+            isAllDay=1 if config.all_day else 2,
+            startDate=config.start_minute,
+            endDate=config.end_minute,
+            weekDays=json.dumps(config.week_days),
+        )
+        self.responses.invalidate("lock/getPassageModeConfig", lock_id)
+
+        if res and res.get("errcode") != 0:
+            _LOGGER.error("Failed to unlock %s: %s", lock_id, res["errmsg"])
+            return False
+
+        return res is not None
+
+    async def add_passcode(self, lock_id: int, config: AddPasscodeConfig) -> bool:
+        """Add new passcode."""
+        _LOGGER.debug("Passcode start create for %s", lock_id)
+        res = await self._gateway_post(
+            lock_id,
+            "keyboardPwd/get",
+            keyboardPwdName=config.passcode_name,
+            keyboardPwdType=config.type,
+            startDate=config.start_minute,
+            endDate=config.end_minute,
+        )
+
+        if res and res.get("errcode") != 0:
+            _LOGGER.error(
+                "Failed to create passcode for %s: %s", lock_id, res["errmsg"]
+            )
+            return False
+        _LOGGER.debug("Passcode created for %s", lock_id)
+        return res
+
+    async def list_passcodes(self, lock_id: int, is_parse=True) -> list[Passcode]:
+        """Get currently configured passcodes from lock."""
+
+        res = await self.get("lock/listKeyboardPwd", lockId=lock_id)
+        if is_parse:
+            return [Passcode.parse_obj(passcode) for passcode in res["list"]]
+
+        _LOGGER.debug("res list passcode count=%s", len(res.get("list", [])))
+        return res
+
+    async def list_unlock_records(
+        self, lock_id: int, page_no: int, page_size: int, is_parse=False
+    ):
+        """Get currently configured passcodes from lock."""
+
+        res = await self.get(
+            "lockRecord/list", lockId=lock_id, pageNo=page_no, pageSize=page_size
+        )
+        if is_parse:
+            return [Passcode.parse_obj(passcode) for passcode in res["list"]]
+
+        _LOGGER.debug("res list unlock records count=%s", len(res.get("list", [])))
+        return res
+
+    async def iter_unlock_records(
+        self, lock_id: int, start_date: int = 0, page_size: int = RECORD_PAGE_SIZE
+    ) -> AsyncIterator[list[dict]]:
+        """Yield lockRecord/list pages, fetching the next page while one is used."""
+
+        def fetch(page_no: int) -> asyncio.Future:
+            kwargs = {"startDate": start_date} if start_date else {}
+            return asyncio.ensure_future(
+                self.get(
+                    "lockRecord/list",
+                    lockId=lock_id,
+                    pageNo=page_no,
+                    pageSize=page_size,
+                    **kwargs,
+                )
+            )
+
+        page_no = 1
+        next_page = fetch(page_no)
+        try:
+            while next_page is not None:
+                res = await next_page
+                next_page = None
+                if res is None:
+                    raise RequestFailed(f"lockRecord/list page {page_no} failed")
+
+                records = res.get("list") or []
+                if "pages" in res:
+                    has_more = page_no < res["pages"]
+                else:
+                    has_more = len(records) >= page_size
+                if records and has_more:
+                    page_no += 1
+                    next_page = fetch(page_no)
+                if records:
+                    yield records
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def delete_passcode(self, lock_id: int, passcode_id: int):
+        """Delete a passcode from lock."""
+
+        resDel = await self._gateway_post(
+            lock_id,
+            "keyboardPwd/delete",
+            deleteType=2,
+            keyboardPwdId=passcode_id,
+        )
+
+        return resDel
+
+    async def change_passcode(
+        self,
+        lock_id: int,
+        keyboardPwdId: int,
+        newKeyboardPwd: str,
+        keyboardPwdName: str,
+    ):
+        """Delete a passcode from lock."""
+
+        resDel = await self._gateway_post(
+            lock_id,
+            "keyboardPwd/change",
+            keyboardPwdId=keyboardPwdId,
+            keyboardPwdName=keyboardPwdName,
+            newKeyboardPwd=newKeyboardPwd,
+        )
+
+        return resDel
@@ -0,0 +1,87 @@
+"""Constants for the TTLock integration."""
+import json
+import pathlib
+
+_manifest = json.loads(
+    (pathlib.Path(__file__).parent / "manifest.json").read_text(encoding="utf-8")
+)
+COMPONENT_VERSION = str(_manifest.get("version", "0"))
+
+DOMAIN = "javis_lock"
+TT_API = "api"
+TT_LOCKS = "locks"
+TT_SETUP = "setup"
+TT_INDEX = "index"
+TT_ROUTER = "router"
+TT_AUTO_LOCK = "auto_lock"
+TT_RECORDS = "records"
+TT_POLL = "poll"
+
+OAUTH2_TOKEN = "https://euapi.ttlock.com/oauth2/token"
+CONF_WEBHOOK_URL = "webhook_url"
+CONF_WEBHOOK_STATUS = "webhook_status"
+CONF_SETUP_CONCURRENCY = "setup_concurrency"
+
+DEFAULT_SETUP_CONCURRENCY = 10
+CONF_WRITE_DEBOUNCE = "write_debounce_ms"
+DEFAULT_WRITE_DEBOUNCE = 0  # milliseconds, 0 writes entity state on every update
+
+# requests of TTLockApi in flight at once
+CONF_CONNECTION_LIMIT = "connection_limit"
+DEFAULT_CONNECTION_LIMIT = 20
+DEFAULT_ACCOUNT_QPS = 10  # requests per second per account
+DEFAULT_ACCOUNT_BURST = 20  # requests sent without waiting after a lull
+AIMD_INITIAL_WINDOW = 4  # requests in flight per account before adapting
+AIMD_DECREASE = 0.5  # window factor when the cloud pushes back
+AIMD_BACKOFF_INTERVAL = 2  # seconds between two window decreases
+AIMD_LATENCY_LIMIT = 10  # seconds, a p90 latency above this is pushback
+AIMD_LATENCY_SAMPLES = 50
+AIMD_MIN_SAMPLES = 10
+# errcodes of an overloaded cloud or gateway: internal error, gateway busy
+THROTTLE_ERRCODES = frozenset({90000, -3003})
+DEFAULT_POLL_BUDGET = 120  # lock refreshes per hour per account
+TOKEN_REFRESH_MARGIN = 300  # seconds before expiry
+TOKEN_REFRESH_RETRY = 60  # seconds after a failed refresh, doubled per failure
+TOKEN_REFRESH_MAX_RETRY = 1800  # seconds, cap of the doubled retry delay
+LOCK_DETAIL_CACHE_TTL = 3600  # seconds, bounds staleness of fields not in lock/list
+GATEWAY_CACHE_TTL = 24 * 3600  # seconds, gateways of a lock rarely change
+PASSAGE_MODE_CACHE_TTL = 3600  # seconds, our own changes invalidate it at once
+
+CONF_AUTO_UNLOCK = "auto_unlock"
+CONF_ALL_DAY = "all_day"
+CONF_START_TIME = "start_time"
+CONF_END_TIME = "end_time"
+CONF_WEEK_DAYS = "days"
+
+SVC_CONFIG_PASSAGE_MODE = "configure_passage_mode"
+SVC_CREATE_PASSCODE = "create_passcode"
+SVC_CLEANUP_PASSCODES = "cleanup_passcodes"
+SVC_LIST_PASSCODES = "list_passcodes"
+SVC_LIST_UNLOCK_RECORDS = "list_unlock_records"
+SVC_DELETE_PASSCODE = "delete_passcode"
+SVC_CHANGE_PASSCODE = "change_passcode"
+SVC_UPDATE_LOCK = "update_lock"
+SVC_SYNC_UNLOCK_RECORDS = "sync_unlock_records"
+SVC_QUERY_UNLOCK_RECORDS = "query_unlock_records"
+SVC_BULK_CREATE_PASSCODE = "bulk_create_passcode"
+
+# bulk passcode provisioning
+BULK_PASSCODE_CONCURRENCY = 4
+BULK_PASSCODE_MAX_CONCURRENCY = 16
+BULK_PASSCODE_ATTEMPTS = 3
+BULK_PASSCODE_RETRY_DELAY = 2  # seconds, multiplied by the attempt number
+
+# local unlock record history
+RECORD_PAGE_SIZE = 100
+RECORD_STORE_FILE = "javis_lock_records.db"
+# ms below the high-water mark fetched again, for records uploaded late
+RECORD_SYNC_OVERLAP = 24 * 3600 * 1000
+RECORD_QUERY_LIMIT = 100
+RECORD_QUERY_MAX_LIMIT = 1000
+
+HOST1 = "javisco.com"
+HOST2 = "javishome.io"
+HOST3 = "javiscloud.com"
+
+
+SERVER_URL = "https://lock-api."
@@ -7,7 +7,8 @@ from homeassistant.components.diagnostics import async_redact_data
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN, TT_LOCKS
+from .const import DOMAIN, TT_API, TT_LOCKS, TT_POLL, TT_SETUP
+from .coordinator import auto_lock_timers, webhook_router
 
 TO_REDACT = {
     "token",
@@ -25,14 +26,19 @@ async def async_get_config_entry_diagnostics(
     hass: HomeAssistant, config_entry: ConfigEntry
 ) -> dict[str, Any]:
     """Return diagnostics for a config entry."""
+    entry_data = hass.data[DOMAIN][config_entry.entry_id]
 
     diagnostics_data = async_redact_data(
         {
             "config_entry": config_entry.as_dict(),
-            "locks": [
-                coordinator.as_dict()
-                for coordinator in hass.data[DOMAIN][config_entry.entry_id][TT_LOCKS]
-            ],
+            "setup": entry_data.get(TT_SETUP),
+            "webhooks": webhook_router(hass).as_dict(),
+            "auto_lock": auto_lock_timers(hass).as_dict(),
+            "polling": entry_data[TT_POLL].as_dict(),
+            "requests": entry_data[TT_API].scheduler.as_dict(),
+            "coalesced_requests": entry_data[TT_API].coalescer.as_dict(),
+            "cached_responses": entry_data[TT_API].responses.as_dict(),
+            "locks": [coordinator.as_dict() for coordinator in entry_data[TT_LOCKS]],
         },
         TO_REDACT,
     )
@@ -2,8 +2,11 @@
 
 """Services for javis_lock integration."""
 
+import asyncio
 from datetime import datetime, time
+from functools import wraps
 import logging
+from time import monotonic
 
 import voluptuous as vol
 
@@ -15,31 +18,54 @@ from homeassistant.core import (
     SupportsResponse,
 )
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.update_coordinator import UpdateFailed
 from homeassistant.util.dt import as_utc
 
+from .scheduling import LANE_BULK, LANE_SERVICE, request_lane
 from .const import (
+    BULK_PASSCODE_ATTEMPTS,
+    BULK_PASSCODE_CONCURRENCY,
+    BULK_PASSCODE_MAX_CONCURRENCY,
+    BULK_PASSCODE_RETRY_DELAY,
     CONF_ALL_DAY,
     CONF_AUTO_UNLOCK,
     CONF_END_TIME,
     CONF_START_TIME,
     CONF_WEEK_DAYS,
     DOMAIN,
+    RECORD_QUERY_LIMIT,
+    RECORD_QUERY_MAX_LIMIT,
+    SVC_BULK_CREATE_PASSCODE,
     SVC_CLEANUP_PASSCODES,
     SVC_CONFIG_PASSAGE_MODE,
     SVC_CREATE_PASSCODE,
     SVC_LIST_PASSCODES,
     SVC_LIST_UNLOCK_RECORDS,
+    SVC_QUERY_UNLOCK_RECORDS,
     SVC_DELETE_PASSCODE,
     SVC_CHANGE_PASSCODE,
+    SVC_SYNC_UNLOCK_RECORDS,
     SVC_UPDATE_LOCK,
 )
-from .coordinator import LockUpdateCoordinator, coordinator_for
-from .models import AddPasscodeConfig, OnOff, PassageModeConfig
+from .coordinator import LockUpdateCoordinator, all_coordinators, coordinator_for
+from .models import AddPasscodeConfig, OnOff, PassageModeConfig, PasscodeTable
+from .record_store import record_store
 import traceback
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def service_lane(handler):
+    """Send the cloud requests of a service handler in the service lane."""
+
+    @wraps(handler)
+    async def wrapper(*args, **kwargs):
+        with request_lane(LANE_SERVICE):
+            return await handler(*args, **kwargs)
+
+    return wrapper
+
+
 class Services:
     """Wraps service handlers."""
 
@@ -66,6 +92,25 @@ class Services:
             supports_response=SupportsResponse.OPTIONAL,
         )
 
+        # Tạo cùng một passcode trên nhiều khóa
+        self.hass.services.async_register(
+            DOMAIN,
+            SVC_BULK_CREATE_PASSCODE,
+            self.handle_bulk_create_passcode,
+            schema=vol.Schema(
+                {
+                    vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+                    vol.Optional("config_entry_id"): cv.string,
+                    vol.Required("passcode_name"): cv.string,
+                    vol.Required("type"): cv.string,
+                    vol.Optional("start_time"): cv.datetime,
+                    vol.Optional("end_time"): cv.datetime,
+                    vol.Optional("concurrency"): cv.string,
+                }
+            ),
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
         # Xóa mã hết hạn
         self.hass.services.async_register(
             DOMAIN,
@@ -73,7 +118,7 @@ class Services:
             self.handle_cleanup_passcodes,
             schema=vol.Schema(
                 {
-                    vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+                    vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
                 }
             ),
             supports_response=SupportsResponse.OPTIONAL,
@@ -87,6 +132,7 @@ class Services:
             schema=vol.Schema(
                 {
                     vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+                    vol.Optional("refresh"): cv.boolean,
                 }
             ),
             supports_response=SupportsResponse.OPTIONAL,
@@ -107,6 +153,38 @@ class Services:
             supports_response=SupportsResponse.OPTIONAL,
         )
 
+        # đồng bộ unlock record về kho cục bộ
+        self.hass.services.async_register(
+            DOMAIN,
+            SVC_SYNC_UNLOCK_RECORDS,
+            self.handle_sync_unlock_records,
+            schema=vol.Schema(
+                {
+                    vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+                }
+            ),
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+        # tra cứu unlock record trong kho cục bộ
+        self.hass.services.async_register(
+            DOMAIN,
+            SVC_QUERY_UNLOCK_RECORDS,
+            self.handle_query_unlock_records,
+            schema=vol.Schema(
+                {
+                    vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+                    vol.Optional("username"): cv.string,
+                    vol.Optional("record_type"): cv.string,
+                    vol.Optional("start_time"): cv.datetime,
+                    vol.Optional("end_time"): cv.datetime,
+                    vol.Optional("limit"): cv.string,
+                    vol.Optional("cursor"): cv.string,
+                }
+            ),
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
         # delete passcode
         self.hass.services.async_register(
             DOMAIN,
@@ -169,6 +247,25 @@ class Services:
             supports_response=SupportsResponse.OPTIONAL,
         )
 
+        # Tạo cùng một passcode trên nhiều khóa
+        self.hass.services.register(
+            DOMAIN,
+            SVC_BULK_CREATE_PASSCODE,
+            self.handle_bulk_create_passcode,
+            schema=vol.Schema(
+                {
+                    vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+                    vol.Optional("config_entry_id"): cv.string,
+                    vol.Required("passcode_name"): cv.string,
+                    vol.Required("type"): cv.string,
+                    vol.Optional("start_time"): cv.datetime,
+                    vol.Optional("end_time"): cv.datetime,
+                    vol.Optional("concurrency"): cv.string,
+                }
+            ),
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
         # Xóa mã hết hạn
         self.hass.services.register(
             DOMAIN,
@@ -176,7 +273,7 @@ class Services:
             self.handle_cleanup_passcodes,
             schema=vol.Schema(
                 {
-                    vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+                    vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
                 }
             ),
             supports_response=SupportsResponse.OPTIONAL,
@@ -190,6 +287,7 @@ class Services:
             schema=vol.Schema(
                 {
                     vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+                    vol.Optional("refresh"): cv.boolean,
                 }
             ),
             supports_response=SupportsResponse.OPTIONAL,
@@ -210,6 +308,38 @@ class Services:
             supports_response=SupportsResponse.OPTIONAL,
         )
 
+        # đồng bộ unlock record về kho cục bộ
+        self.hass.services.register(
+            DOMAIN,
+            SVC_SYNC_UNLOCK_RECORDS,
+            self.handle_sync_unlock_records,
+            schema=vol.Schema(
+                {
+                    vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+                }
+            ),
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+        # tra cứu unlock record trong kho cục bộ
+        self.hass.services.register(
+            DOMAIN,
+            SVC_QUERY_UNLOCK_RECORDS,
+            self.handle_query_unlock_records,
+            schema=vol.Schema(
+                {
+                    vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+                    vol.Optional("username"): cv.string,
+                    vol.Optional("record_type"): cv.string,
+                    vol.Optional("start_time"): cv.datetime,
+                    vol.Optional("end_time"): cv.datetime,
+                    vol.Optional("limit"): cv.string,
+                    vol.Optional("cursor"): cv.string,
+                }
+            ),
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
         # delete passcode
         self.hass.services.register(
             DOMAIN,
@@ -263,8 +393,26 @@ class Services:
             coordinator = coordinator_for(self.hass, entity_id)
         return coordinator
 
+    def _get_coordinators(self, call: ServiceCall) -> list[LockUpdateCoordinator]:
+        """Coordinators of all given entities, or of every lock if none given.
+
+        Without entities, config_entry_id limits the locks to one entry.
+        """
+        entity_ids = call.data.get(ATTR_ENTITY_ID)
+        if not entity_ids:
+            return all_coordinators(self.hass, call.data.get("config_entry_id"))
+
+        coordinators = {}
+        for entity_id in entity_ids:
+            if coordinator := coordinator_for(self.hass, entity_id):
+                coordinators.setdefault(coordinator.lock_id, coordinator)
+        return list(coordinators.values())
+
+    @service_lane
     async def update_lock_state(self, call: ServiceCall):
         coordinator = self._get_coordinator(call)
+        # an explicit update also refetches the cached lock/detail and passage mode
+        coordinator.api.responses.invalidate(lock_id=coordinator.lock_id)
         await coordinator.async_request_refresh()
 
     # async def handle_configure_passage_mode(self, call: ServiceCall):
@@ -287,79 +435,222 @@ class Services:
     #             coordinator.data.passage_mode_config = config
     #             coordinator.async_update_listeners()
 
+    def _passcode_config(self, call: ServiceCall) -> AddPasscodeConfig:
+        """Build the passcode of a create call, validity rounded to the hour."""
+        if int(call.data.get("type")) <= 2:
+            start_time = 0
+            end_time = 0
+        elif int(call.data.get("type")) == 3:
+            if (
+                call.data.get("start_time") is None
+                or call.data.get("end_time") is None
+            ):
+                raise ValueError(
+                    "Need start time and end time with period passcode."
+                )
+            start_time_val = call.data.get("start_time")
+            start_time_utc = as_utc(start_time_val)
+            start_time_ts = int(start_time_utc.timestamp() / 3600) * 3600
+            start_time = start_time_ts * 1000
+
+            end_time_val = call.data.get("end_time")
+            end_time_utc = as_utc(end_time_val)
+            end_time_ts = int(end_time_utc.timestamp() / 3600) * 3600
+            end_time = end_time_ts * 1000
+            if start_time >= end_time:
+                raise ValueError("Start time must be less than end time.")
+        else:
+            if (
+                call.data.get("start_time") is None
+                or call.data.get("end_time") is None
+            ):
+                raise ValueError(
+                    "Need start time and end time with cyclic passcode."
+                )
+            start_time_val = call.data.get("start_time")
+            start_time_val = datetime.now().replace(
+                hour=start_time_val.hour,
+                minute=start_time_val.minute,
+                second=start_time_val.second,
+            )
+            start_time_utc = as_utc(start_time_val)
+            start_time_ts = int(start_time_utc.timestamp() / 3600) * 3600
+            start_time = start_time_ts * 1000
+
+            end_time_val = call.data.get("end_time")
+            end_time_val = datetime.now().replace(
+                hour=end_time_val.hour,
+                minute=end_time_val.minute,
+                second=end_time_val.second,
+            )
+            end_time_utc = as_utc(end_time_val)
+            end_time_ts = int(end_time_utc.timestamp() / 3600) * 3600
+            end_time = end_time_ts * 1000
+            if start_time >= end_time:
+                raise ValueError("Start time must be less than end time.")
+
+        return AddPasscodeConfig(
+            type=call.data.get("type"),
+            passcodeName=call.data.get("passcode_name"),
+            startDate=start_time,
+            endDate=end_time,
+        )
+
+    @service_lane
     async def handle_create_passcode(self, call: ServiceCall):
         """Create a new passcode for the given entities."""
         try:
             _LOGGER.debug("Creating passcode for %s", call.data.get("passcode_name"))
 
-            if int(call.data.get("type")) <= 2:
-                start_time = 0
-                end_time = 0
-            elif int(call.data.get("type")) == 3:
-                if (
-                    call.data.get("start_time") is None
-                    or call.data.get("end_time") is None
-                ):
-                    return {
-                        "error": "Need start time and end time with period passcode."
-                    }
-                start_time_val = call.data.get("start_time")
-                start_time_utc = as_utc(start_time_val)
-                start_time_ts = int(start_time_utc.timestamp() / 3600) * 3600
-                start_time = start_time_ts * 1000
-
-                end_time_val = call.data.get("end_time")
-                end_time_utc = as_utc(end_time_val)
-                end_time_ts = int(end_time_utc.timestamp() / 3600) * 3600
-                end_time = end_time_ts * 1000
-                if start_time >= end_time:
-                    return {"error": "Start time must be less than end time."}
-            else:
-                if (
-                    call.data.get("start_time") is None
-                    or call.data.get("end_time") is None
-                ):
-                    return {
-                        "error": "Need start time and end time with cyclic passcode."
-                    }
-                start_time_val = call.data.get("start_time")
-                start_time_val = datetime.now().replace(
-                    hour=start_time_val.hour,
-                    minute=start_time_val.minute,
-                    second=start_time_val.second,
-                )
-                start_time_utc = as_utc(start_time_val)
-                start_time_ts = int(start_time_utc.timestamp() / 3600) * 3600
-                start_time = start_time_ts * 1000
-
-                end_time_val = call.data.get("end_time")
-                end_time_val = datetime.now().replace(
-                    hour=end_time_val.hour,
-                    minute=end_time_val.minute,
-                    second=end_time_val.second,
-                )
-                end_time_utc = as_utc(end_time_val)
-                end_time_ts = int(end_time_utc.timestamp() / 3600) * 3600
-                end_time = end_time_ts * 1000
-                if start_time >= end_time:
-                    return {"error": "Start time must be less than end time."}
-
-            config = AddPasscodeConfig(
-                type=call.data.get("type"),
-                passcodeName=call.data.get("passcode_name"),
-                startDate=start_time,
-                endDate=end_time,
-            )
+            try:
+                config = self._passcode_config(call)
+            except ValueError as err:
+                return {"error": str(err)}
             _LOGGER.debug("Passcode start create for %s", config.passcode_name)
             coordinator = self._get_coordinator(call)
             if not coordinator:
                 return {"error": "No coordinator found for the given entity."}
             responce = await coordinator.api.add_passcode(coordinator.lock_id, config)
+            coordinator.passcodes.added(config, responce)
             return responce
         except Exception as e:
             _LOGGER.error(f"Error creating passcode: {traceback.format_exc()}")
             return {"error": f"Error creating passcode: {traceback.format_exc()}"}
 
+    @service_lane
+    async def handle_bulk_create_passcode(self, call: ServiceCall) -> ServiceResponse:
+        """Create the same passcode on many locks, a few locks at a time."""
+        try:
+            config = self._passcode_config(call)
+            concurrency = int(call.data.get("concurrency", BULK_PASSCODE_CONCURRENCY))
+        except ValueError as err:
+            return {"error": str(err)}
+        if not 1 <= concurrency <= BULK_PASSCODE_MAX_CONCURRENCY:
+            return {
+                "error": "concurrency must be between 1 and "
+                f"{BULK_PASSCODE_MAX_CONCURRENCY}."
+            }
+        coordinators = self._get_coordinators(call)
+        if not coordinators:
+            return {"error": "No coordinator found for the given entity."}
+
+        started = monotonic()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def provision(coordinator: LockUpdateCoordinator) -> dict:
+            async with semaphore:
+                return await self._provision_passcode(coordinator, config)
+
+        results = await asyncio.gather(
+            *(provision(coordinator) for coordinator in coordinators)
+        )
+        return {
+            "created": sum(1 for result in results if result["ok"]),
+            "failed": sum(1 for result in results if not result["ok"]),
+            "seconds": round(monotonic() - started, 3),
+            "locks": {
+                coordinator.lock_id: result
+                for coordinator, result in zip(coordinators, results)
+            },
+        }
+
+    async def _provision_passcode(
+        self, coordinator: LockUpdateCoordinator, config: AddPasscodeConfig
+    ) -> dict:
+        """Create a passcode on one lock, retrying failed attempts.
+
+        A failed keyboardPwd/get may still have created the code, so before
+        each retry the lock's passcodes are checked for it.
+        """
+        known_ids = None
+        if not config.start_minute and not config.end_minute:
+            # without a validity window to compare, codes that existed before
+            # the first attempt are told apart by id
+            try:
+                payload = await coordinator.async_list_passcodes(is_parse=False)
+                known_ids = {
+                    code.get("keyboardPwdId") for code in payload.get("list", [])
+                }
+            except UpdateFailed as err:
+                _LOGGER.debug(
+                    "Listing passcodes of %s failed: %s", coordinator.lock_id, err
+                )
+
+        error = None
+        for attempt in range(1, BULK_PASSCODE_ATTEMPTS + 1):
+            if attempt > 1:
+                await asyncio.sleep(BULK_PASSCODE_RETRY_DELAY * (attempt - 1))
+                try:
+                    existing = await self._find_passcode(
+                        coordinator, config, known_ids
+                    )
+                except UpdateFailed as err:
+                    error = str(err)
+                    continue
+                if existing:
+                    return {
+                        "ok": True,
+                        "keyboardPwdId": existing.get("keyboardPwdId"),
+                        "keyboardPwd": existing.get("keyboardPwd"),
+                        "attempts": attempt - 1,
+                    }
+
+            try:
+                with request_lane(LANE_BULK):
+                    res = await coordinator.api.add_passcode(
+                        coordinator.lock_id, config
+                    )
+            except Exception as err:
+                return {"ok": False, "error": str(err), "attempts": attempt}
+            coordinator.passcodes.added(config, res)
+            if res:
+                return {
+                    "ok": True,
+                    "keyboardPwdId": res.get("keyboardPwdId"),
+                    "keyboardPwd": res.get("keyboardPwd"),
+                    "attempts": attempt,
+                }
+            error = "Create passcode fail."
+            _LOGGER.debug(
+                "Creating passcode on %s failed, attempt %s",
+                coordinator.lock_id,
+                attempt,
+            )
+
+        return {"ok": False, "error": error, "attempts": BULK_PASSCODE_ATTEMPTS}
+
+    async def _find_passcode(
+        self,
+        coordinator: LockUpdateCoordinator,
+        config: AddPasscodeConfig,
+        known_ids: set | None,
+    ) -> dict | None:
+        """Find the code an earlier attempt created, not an older namesake.
+
+        Codes with a validity window must match it. Codes without one must
+        be missing from known_ids, the ids listed before the first attempt;
+        if those are unknown no code counts as ours.
+        """
+        windowed = bool(config.start_minute or config.end_minute)
+        if not windowed and known_ids is None:
+            return None
+        payload = await coordinator.async_list_passcodes(is_parse=False, refresh=True)
+        for passcode in payload.get("list", []):
+            if passcode.get("keyboardPwdName") != config.passcode_name or str(
+                passcode.get("keyboardPwdType")
+            ) != str(config.type):
+                continue
+            if windowed:
+                if (
+                    passcode.get("startDate") == config.start_minute
+                    and passcode.get("endDate") == config.end_minute
+                ):
+                    return passcode
+            elif passcode.get("keyboardPwdId") not in known_ids:
+                return passcode
+        return None
+
+    @service_lane
     async def handle_list_passcodes(self, call: ServiceCall) -> ServiceResponse:
         """List passcode"""
         res = {"list": []}
@@ -367,23 +658,87 @@ class Services:
         _LOGGER.debug("handle_list_passcodes")
         if not coordinator:
             return {"error": "No coordinator found for the given entity."}
-        res = await coordinator.api.list_passcodes(coordinator.lock_id, is_parse=False)
+        try:
+            res = await coordinator.async_list_passcodes(
+                is_parse=False, refresh=call.data.get("refresh", False)
+            )
+        except UpdateFailed as err:
+            return {"error": str(err)}
 
         return res
 
+    @service_lane
     async def handle_cleanup_passcodes(self, call: ServiceCall) -> ServiceResponse:
-        """Clean up expired passcodes for the given entities."""
-        removed = []
-        coordinator = self._get_coordinator(call)
-        if not coordinator:
+        """Clean up expired passcodes of the given locks, or of all locks.
+
+        Locks are swept concurrently; deletions go through the account's
+        rate limiter.
+        """
+        coordinators = self._get_coordinators(call)
+        if not coordinators:
             return {"error": "No coordinator found for the given entity."}
-        codes = await coordinator.api.list_passcodes(coordinator.lock_id)
-        for code in codes:
-            if code.expired:
-                await coordinator.api.delete_passcode(coordinator.lock_id, code.id)
+
+        started = monotonic()
+        now_ms = int(datetime.now().timestamp() * 1000)
+        results = await asyncio.gather(
+            *(self._cleanup_lock(coordinator, now_ms) for coordinator in coordinators)
+        )
+        locks = {
+            coordinator.lock_id: result
+            for coordinator, result in zip(coordinators, results)
+        }
+        return {
+            "removed": [name for result in results for name in result["removed"]],
+            "failed": sum(len(result["failed"]) for result in results),
+            "seconds": round(monotonic() - started, 3),
+            "locks": locks,
+        }
+
+    async def _cleanup_lock(
+        self, coordinator: LockUpdateCoordinator, now_ms: int
+    ) -> dict:
+        started = monotonic()
+        removed, failed = [], []
+        try:
+            payload = await coordinator.async_list_passcodes(is_parse=False)
+        except Exception as err:
+            _LOGGER.warning(
+                "Failed to list passcodes of %s: %s", coordinator.lock_id, err
+            )
+            return {
+                "removed": removed,
+                "failed": [{"error": str(err)}],
+                "seconds": round(monotonic() - started, 3),
+            }
+
+        async def delete(code) -> None:
+            try:
+                with request_lane(LANE_BULK):
+                    res = await coordinator.api.delete_passcode(
+                        coordinator.lock_id, code.id
+                    )
+            except Exception as err:
+                res, error = None, str(err)
+            else:
+                error = None if res else "Delete passcode fail."
+            coordinator.passcodes.removed(code.id, res)
+            if error:
+                failed.append({"id": code.id, "name": code.name, "error": error})
+            else:
                 removed.append(code.name)
-        return {"removed": removed}
 
+        # expiry is checked on the raw columns, models only for deleted codes
+        table = PasscodeTable.from_payload(payload)
+        await asyncio.gather(
+            *(delete(table.passcode(index)) for index in table.expired(now_ms))
+        )
+        return {
+            "removed": removed,
+            "failed": failed,
+            "seconds": round(monotonic() - started, 3),
+        }
+
+    @service_lane
     async def handle_list_unlock_records(self, call: ServiceCall) -> ServiceResponse:
         coordinator = self._get_coordinator(call)
         _LOGGER.debug("handle_list_unlock_records")
@@ -395,16 +750,75 @@ class Services:
             )
         return {"error": "No coordinator found for the given entity."}
 
+    @service_lane
+    async def handle_sync_unlock_records(self, call: ServiceCall) -> ServiceResponse:
+        """Store new unlock records of the given locks in the local history."""
+        _LOGGER.debug("handle_sync_unlock_records")
+        store = record_store(self.hass)
+        locks = {}
+        for entity_id in call.data.get(ATTR_ENTITY_ID) or []:
+            coordinator = coordinator_for(self.hass, entity_id)
+            if not coordinator or coordinator.lock_id in locks:
+                continue
+            try:
+                locks[coordinator.lock_id] = await store.async_sync(
+                    coordinator.api, coordinator.lock_id
+                )
+            except Exception as err:
+                _LOGGER.warning(
+                    "Failed to sync records of lock %s: %s", coordinator.lock_id, err
+                )
+                locks[coordinator.lock_id] = {"error": str(err)}
+        if not locks:
+            return {"error": "No coordinator found for the given entity."}
+        return {"locks": locks}
+
+    @service_lane
+    async def handle_query_unlock_records(self, call: ServiceCall) -> ServiceResponse:
+        """Query the local unlock record history, newest first."""
+        _LOGGER.debug("handle_query_unlock_records")
+        lock_ids = None
+        if entity_ids := call.data.get(ATTR_ENTITY_ID):
+            coordinators = [coordinator_for(self.hass, e) for e in entity_ids]
+            lock_ids = sorted({c.lock_id for c in coordinators if c})
+            if not lock_ids:
+                return {"error": "No coordinator found for the given entity."}
+
+        def epoch_ms(key: str) -> int | None:
+            value = call.data.get(key)
+            return None if value is None else int(as_utc(value).timestamp() * 1000)
+
+        try:
+            record_types = call.data.get("record_type")
+            limit = int(call.data.get("limit") or RECORD_QUERY_LIMIT)
+            return await record_store(self.hass).async_query(
+                lock_ids=lock_ids,
+                username=call.data.get("username"),
+                record_types=[int(t) for t in record_types.split(",")]
+                if record_types
+                else None,
+                start_ts=epoch_ms("start_time"),
+                end_ts=epoch_ms("end_time"),
+                limit=max(1, min(limit, RECORD_QUERY_MAX_LIMIT)),
+                cursor=call.data.get("cursor"),
+            )
+        except ValueError as err:
+            return {"error": f"Invalid query: {err}"}
+
+    @service_lane
     async def handle_delete_passcode(self, call: ServiceCall) -> ServiceResponse:
         coordinator = self._get_coordinator(call)
         _LOGGER.debug("handle_delete_passcode")
         res = {"error": "Delete passcode fail."}
         if coordinator:
+            passcode_id = int(call.data.get("keyboardPwdId"))
             res = await coordinator.api.delete_passcode(
-                coordinator.lock_id, int(call.data.get("keyboardPwdId"))
+                coordinator.lock_id, passcode_id
             )
+            coordinator.passcodes.removed(passcode_id, res)
         return res
 
+    @service_lane
     async def handle_change_passcode(self, call: ServiceCall) -> ServiceResponse:
         coordinator = self._get_coordinator(call)
         _LOGGER.debug("handle_change_passcode")
@@ -415,9 +829,10 @@ class Services:
         ):
             return {"error": "New passcode or passcode name is required."}
         if coordinator:
+            passcode_id = int(call.data.get("keyboardPwdId"))
             res = await coordinator.api.change_passcode(
                 coordinator.lock_id,
-                int(call.data.get("keyboardPwdId")),
+                passcode_id,
                 call.data.get("newKeyboardPwd")
                 if call.data.get("newKeyboardPwd")
                 else "",
@@ -425,4 +840,10 @@ class Services:
                 if call.data.get("keyboardPwdName")
                 else "",
             )
+            coordinator.passcodes.changed(
+                passcode_id,
+                res,
+                keyboardPwd=call.data.get("newKeyboardPwd"),
+                keyboardPwdName=call.data.get("keyboardPwdName"),
+            )
         return res
@@ -1,3 +1,4 @@
+import contextlib
 import importlib.util
 import os
 import sys
@@ -39,6 +40,9 @@ def stub_voluptuous():
     vol.Optional = lambda x, **kwargs: x
     vol.Schema = lambda x: x
     vol.In = lambda choices: (lambda value: value)
+    vol.All = lambda *validators: validators
+    vol.Coerce = lambda kind: kind
+    vol.Range = lambda **kwargs: kwargs
     sys.modules["voluptuous"] = vol
 
 
@@ -85,6 +89,7 @@ def stub_homeassistant_minimal():
     ha_cv = types.ModuleType("homeassistant.helpers.config_validation")
     ha_cv.entity_ids = lambda x: x
     ha_cv.string = str
+    ha_cv.boolean = bool
     ha_cv.datetime = datetime
     sys.modules["homeassistant.helpers.config_validation"] = ha_cv
 
@@ -97,6 +102,17 @@ def stub_homeassistant_minimal():
     ha_issue.async_create_issue = lambda *args, **kwargs: None
     sys.modules["homeassistant.helpers.issue_registry"] = ha_issue
 
+    ha_event = types.ModuleType("homeassistant.helpers.event")
+    ha_event.scheduled = []
+
+    def async_call_later(hass, delay, action):
+        handle = {"delay": delay, "action": action, "cancelled": False}
+        ha_event.scheduled.append(handle)
+        return lambda: handle.update(cancelled=True)
+
+    ha_event.async_call_later = async_call_later
+    sys.modules["homeassistant.helpers.event"] = ha_event
+
     ha_dispatcher = types.ModuleType("homeassistant.helpers.dispatcher")
     ha_dispatcher.async_dispatcher_connect = lambda *args, **kwargs: None
     sys.modules["homeassistant.helpers.dispatcher"] = ha_dispatcher
@@ -122,8 +138,14 @@ def stub_homeassistant_minimal():
         def __init__(self, *args, **kwargs):
             self.hass = args[0] if args else None
             self.data = None
+            self.last_update_success = True
+            self.update_interval = kwargs.get("update_interval")
+            self.schedule_calls = 0
             self._listeners = {}
 
+        def _schedule_refresh(self):
+            self.schedule_calls += 1
+
         def async_update_listeners(self):
             return None
 
@@ -141,9 +163,19 @@ def stub_homeassistant_minimal():
             self.coordinator = coordinator
             self._write_called = False
 
+        @property
+        def available(self):
+            return getattr(self.coordinator, "last_update_success", True)
+
         def async_write_ha_state(self):
             self._write_called = True
 
+        async def async_added_to_hass(self):
+            return None
+
+        async def async_will_remove_from_hass(self):
+            return None
+
     ha_update.DataUpdateCoordinator = DataUpdateCoordinator
     ha_update.UpdateFailed = UpdateFailed
     ha_update.CoordinatorEntity = CoordinatorEntity
@@ -183,10 +215,18 @@ def stub_homeassistant_minimal():
                 "description_placeholders": description_placeholders,
             }
 
+    class OptionsFlow:
+        def async_create_entry(self, title, data):
+            return {"type": "create_entry", "title": title, "data": data}
+
+        def async_show_form(self, step_id, data_schema):
+            return {"type": "form", "step_id": step_id, "data_schema": data_schema}
+
     class ConfigEntry:
         pass
 
     ha_config_entries.ConfigFlow = ConfigFlow
+    ha_config_entries.OptionsFlow = OptionsFlow
     ha_config_entries.ConfigEntry = ConfigEntry
     sys.modules["homeassistant.config_entries"] = ha_config_entries
 
@@ -217,8 +257,33 @@ def stub_component_modules_for_services():
     const.SVC_DELETE_PASSCODE = "delete_passcode"
     const.SVC_CHANGE_PASSCODE = "change_passcode"
     const.SVC_UPDATE_LOCK = "update_lock"
+    const.SVC_SYNC_UNLOCK_RECORDS = "sync_unlock_records"
+    const.SVC_QUERY_UNLOCK_RECORDS = "query_unlock_records"
+    const.RECORD_QUERY_LIMIT = 100
+    const.RECORD_QUERY_MAX_LIMIT = 1000
+    const.SVC_BULK_CREATE_PASSCODE = "bulk_create_passcode"
+    const.BULK_PASSCODE_ATTEMPTS = 3
+    const.BULK_PASSCODE_CONCURRENCY = 4
+    const.BULK_PASSCODE_MAX_CONCURRENCY = 16
+    const.BULK_PASSCODE_RETRY_DELAY = 0
     sys.modules[f"{PKG}.const"] = const
 
+    scheduling = types.ModuleType(f"{PKG}.scheduling")
+    scheduling.LANE_SERVICE = "service"
+    scheduling.LANE_BULK = "bulk"
+    scheduling.lanes_entered = []
+
+    def request_lane(lane):
+        scheduling.lanes_entered.append(lane)
+        return contextlib.nullcontext()
+
+    scheduling.request_lane = request_lane
+    sys.modules[f"{PKG}.scheduling"] = scheduling
+
+    record_store = types.ModuleType(f"{PKG}.record_store")
+    record_store.record_store = lambda hass: None
+    sys.modules[f"{PKG}.record_store"] = record_store
+
     coordinator = types.ModuleType(f"{PKG}.coordinator")
 
     class LockUpdateCoordinator:
@@ -226,6 +291,7 @@ def stub_component_modules_for_services():
 
     coordinator.LockUpdateCoordinator = LockUpdateCoordinator
     coordinator.coordinator_for = lambda hass, entity_id: None
+    coordinator.all_coordinators = lambda hass, entry_id=None: []
     sys.modules[f"{PKG}.coordinator"] = coordinator
 
     models = types.ModuleType(f"{PKG}.models")
@@ -244,15 +310,43 @@ def stub_component_modules_for_services():
     class PassageModeConfig:
         pass
 
+    class PasscodeTable:
+        def __init__(self, rows):
+            self.rows = rows
+
+        @classmethod
+        def from_payload(cls, payload):
+            return cls(payload.get("list", []))
+
+        def expired(self, now_ms=None):
+            return [
+                index
+                for index, row in enumerate(self.rows)
+                if row.get("keyboardPwdType") in (1, 3) and row["endDate"] < now_ms
+            ]
+
+        def passcode(self, index):
+            row = self.rows[index]
+            return types.SimpleNamespace(
+                id=row["keyboardPwdId"], name=row["keyboardPwdName"]
+            )
+
     models.AddPasscodeConfig = AddPasscodeConfig
     models.OnOff = OnOff
     models.PassageModeConfig = PassageModeConfig
+    models.PasscodeTable = PasscodeTable
     sys.modules[f"{PKG}.models"] = models
 
 
 def stub_component_modules_for_config_flow():
     const = types.ModuleType(f"{PKG}.const")
     const.DOMAIN = "javis_lock"
+    const.CONF_WRITE_DEBOUNCE = "write_debounce_ms"
+    const.DEFAULT_WRITE_DEBOUNCE = 0
+    const.CONF_SETUP_CONCURRENCY = "setup_concurrency"
+    const.DEFAULT_SETUP_CONCURRENCY = 10
+    const.CONF_CONNECTION_LIMIT = "connection_limit"
+    const.DEFAULT_CONNECTION_LIMIT = 20
     sys.modules[f"{PKG}.const"] = const
 
     api = types.ModuleType(f"{PKG}.api")
@@ -268,8 +362,11 @@ def stub_component_modules_for_config_flow():
 def stub_component_modules_for_coordinator():
     const = types.ModuleType(f"{PKG}.const")
     const.DOMAIN = "javis_lock"
-    const.SIGNAL_NEW_DATA = "signal_new_data"
     const.TT_LOCKS = "locks"
+    const.TT_INDEX = "index"
+    const.TT_ROUTER = "router"
+    const.TT_AUTO_LOCK = "auto_lock"
+    const.DEFAULT_POLL_BUDGET = 120
     sys.modules[f"{PKG}.const"] = const
 
     api = types.ModuleType(f"{PKG}.api")
@@ -294,6 +391,14 @@ def stub_component_modules_for_coordinator():
     class PassageModeConfig:
         pass
 
+    class AddPasscodeConfig:
+        pass
+
+    class Passcode:
+        @classmethod
+        def parse_obj(cls, obj):
+            return dict(obj)
+
     class State:
         locked = 0
         unlocked = 1
@@ -301,8 +406,11 @@ def stub_component_modules_for_coordinator():
     class WebhookEvent:
         pass
 
+    models.AddPasscodeConfig = AddPasscodeConfig
     models.Features = Features
     models.PassageModeConfig = PassageModeConfig
+    models.PassageModeView = PassageModeConfig
+    models.Passcode = Passcode
     models.State = State
     models.WebhookEvent = WebhookEvent
     sys.modules[f"{PKG}.models"] = models
@@ -324,6 +432,9 @@ def stub_aiohttp_retry():
         def get(self, *args, **kwargs):
             return self.websession.get(*args, **kwargs)
 
+        def post(self, *args, **kwargs):
+            return self.websession.post(*args, **kwargs)
+
     module.ExponentialRetry = ExponentialRetry
     module.RetryClient = RetryClient
     sys.modules["aiohttp_retry"] = module
@@ -0,0 +1,120 @@
+"""Micro-benchmark for parsing lock/detail and passage mode payloads.
+
+Compares Lock/PassageModeConfig.parse_obj() with the lazy LockView and
+PassageModeView, reading the fields a coordinator refresh reads.
+Not part of run_all.py.
+
+Run: python tests/bench_lock_parsing.py [locks]
+"""
+
+import sys
+import timeit
+import types
+from datetime import datetime
+
+from _component_test_stubs import PKG, clear_modules, install_package_root, load_module
+
+
+def _lock_payload(lock_id):
+    return {
+        "lockId": lock_id,
+        "lockName": f"S31_{lock_id:04x}",
+        "lockAlias": f"Door {lock_id}",
+        "lockMac": f"AA:BB:CC:DD:{lock_id // 256:02X}:{lock_id % 256:02X}",
+        "electricQuantity": 20 + lock_id % 80,
+        "featureValue": "F44354CD5F3",
+        "timezoneRawOffset": 25200000,
+        "modelNum": "SN9161_PV53",
+        "hardwareRevision": "1.6",
+        "firmwareRevision": "6.4.0.240313",
+        "autoLockTime": 10,
+        "lockSound": 1,
+        "privacyLock": 2,
+        "tamperAlert": 1,
+        "resetButton": 1,
+        "openDirection": 0,
+        "passageMode": 2,
+        "passageModeAutoUnlock": 2,
+        "date": 1767225600000,
+        "adminPwd": "secret",
+        "lockKey": "secret",
+        "aesKeyStr": "secret",
+    }
+
+
+def _passage_payload(lock_id):
+    return {
+        "passageMode": 1 + lock_id % 2,
+        "startDate": 480,
+        "endDate": 1080,
+        "isAllDay": 2,
+        "weekDays": [1, 2, 3, 4, 5],
+        "autoUnlock": 2,
+    }
+
+
+def _refresh_reads(details, passage):
+    # what LockUpdateCoordinator._async_update_data and passage_mode_active read
+    return (
+        details.name,
+        details.battery_level,
+        details.hardwareRevision,
+        details.firmwareRevision,
+        details.autoLockTime,
+        details.mac,
+        details.model,
+        details.featureValue,
+        passage.enabled,
+        passage.week_days,
+        passage.all_day,
+        passage.start_minute,
+        passage.end_minute,
+    )
+
+
+def main():
+    locks = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    clear_modules(PKG)
+    install_package_root()
+    ha = types.ModuleType("homeassistant")
+    sys.modules["homeassistant"] = ha
+    ha_util = types.ModuleType("homeassistant.util")
+    sys.modules["homeassistant.util"] = ha_util
+    ha_dt = types.ModuleType("homeassistant.util.dt")
+    ha_dt.as_local = lambda dt_value: dt_value
+    ha_dt.utc_from_timestamp = lambda ts: datetime.fromtimestamp(ts)
+    ha_dt.now = lambda: datetime.now()
+    sys.modules["homeassistant.util.dt"] = ha_dt
+    models = load_module("models", "models.py")
+
+    payloads = [(_lock_payload(i), _passage_payload(i)) for i in range(locks)]
+
+    def parse_models():
+        for lock, passage in payloads:
+            _refresh_reads(
+                models.Lock.parse_obj(lock),
+                models.PassageModeConfig.parse_obj(passage),
+            )
+
+    def parse_views():
+        for lock, passage in payloads:
+            _refresh_reads(models.LockView(lock), models.PassageModeView(passage))
+
+    print("\n" + "=" * 64)
+    print(f"BENCH LOCK PARSING ({locks} lock payloads per refresh)")
+    print("=" * 64)
+    results = {}
+    for label, func in (("parse_obj", parse_models), ("view", parse_views)):
+        seconds = min(timeit.repeat(func, number=1, repeat=5))
+        results[label] = seconds
+        print(
+            f"  {label:<10} {seconds * 1e3:8.2f} ms/refresh"
+            f" {seconds / locks * 1e6:8.2f} us/lock"
+        )
+    print(f"  speedup    {results['parse_obj'] / results['view']:8.1f}x")
+    print("=" * 64 + "\n")
+
+
+if __name__ == "__main__":
+    main()
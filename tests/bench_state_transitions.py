@@ -0,0 +1,85 @@
+"""Micro-benchmark for per-event LockState transitions.
+
+Compares the old deepcopy-and-mutate transition with dataclasses.replace().
+Not part of run_all.py.
+
+Run: python tests/bench_state_transitions.py [events]
+"""
+
+import sys
+import timeit
+from copy import deepcopy
+from dataclasses import replace
+from datetime import datetime
+
+from _component_test_stubs import (
+    PKG,
+    clear_modules,
+    install_package_root,
+    load_module,
+    stub_component_modules_for_coordinator,
+    stub_homeassistant_minimal,
+)
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    clear_modules(PKG)
+    install_package_root()
+    stub_homeassistant_minimal()
+    stub_component_modules_for_coordinator()
+    coord_mod = load_module("coordinator", "coordinator.py")
+    # the real pydantic model, its deepcopy is most of the old cost
+    models = load_module("models", "models.py")
+
+    state = coord_mod.LockState(
+        name="Front Door",
+        mac="AA:BB:CC:DD:EE:FF",
+        model="SN9161",
+        battery_level=80,
+        auto_lock_seconds=10,
+        passage_mode_config=models.PassageModeConfig.parse_obj(
+            {
+                "passageMode": 1,
+                "startDate": 480,
+                "endDate": 1080,
+                "isAllDay": 2,
+                "weekDays": [1, 2, 3, 4, 5],
+                "autoUnlock": 2,
+            }
+        ),
+    )
+    last_user = "user1" + datetime.now().strftime("_%d%H%M%S")
+
+    def copy_and_mutate():
+        new_data = deepcopy(state)
+        new_data.battery_level = 79
+        new_data.locked = True
+        new_data.last_user = last_user
+        new_data.last_reason = "lock by app"
+        return new_data
+
+    def copy_free():
+        return replace(
+            state,
+            battery_level=79,
+            locked=True,
+            last_user=last_user,
+            last_reason="lock by app",
+        )
+
+    print("\n" + "=" * 64)
+    print(f"BENCH STATE TRANSITIONS ({events} events)")
+    print("=" * 64)
+    results = {}
+    for label, func in (("deepcopy", copy_and_mutate), ("replace", copy_free)):
+        seconds = min(timeit.repeat(func, number=events, repeat=3))
+        results[label] = seconds
+        print(f"  {label:<10} {seconds / events * 1e6:8.2f} us/event")
+    print(f"  speedup    {results['deepcopy'] / results['replace']:8.1f}x")
+    print("=" * 64 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,8 @@ import sys
 import types
 from types import SimpleNamespace
 
+import aiohttp
+
 from _component_test_stubs import (
     PKG,
     clear_modules,
@@ -95,8 +97,35 @@ def _install_component_stubs_for_api():
     const.HOST2 = "h2"
     const.HOST3 = "h3"
     const.COMPONENT_VERSION = "v1"
+    const.DEFAULT_CONNECTION_LIMIT = 20
+    const.DEFAULT_ACCOUNT_QPS = 10
+    const.DEFAULT_ACCOUNT_BURST = 20
+    const.AIMD_INITIAL_WINDOW = 4
+    const.AIMD_DECREASE = 0.5
+    const.AIMD_BACKOFF_INTERVAL = 2
+    const.AIMD_LATENCY_LIMIT = 10
+    const.AIMD_LATENCY_SAMPLES = 50
+    const.AIMD_MIN_SAMPLES = 10
+    const.THROTTLE_ERRCODES = frozenset({90000, -3003})
+    const.TOKEN_REFRESH_MARGIN = 300
+    const.TOKEN_REFRESH_RETRY = 60
+    const.TOKEN_REFRESH_MAX_RETRY = 1800
+    const.LOCK_DETAIL_CACHE_TTL = 3600
+    const.GATEWAY_CACHE_TTL = 24 * 3600
+    const.PASSAGE_MODE_CACHE_TTL = 3600
+    const.RECORD_PAGE_SIZE = 100
     sys.modules[f"{PKG}.const"] = const
 
+    aiohttp_client = types.ModuleType("homeassistant.helpers.aiohttp_client")
+    aiohttp_client.created = []
+
+    def async_create_clientsession(hass, verify_ssl=True, auto_cleanup=True, **kwargs):
+        aiohttp_client.created.append(auto_cleanup)
+        return aiohttp.ClientSession(**kwargs)
+
+    aiohttp_client.async_create_clientsession = async_create_clientsession
+    sys.modules["homeassistant.helpers.aiohttp_client"] = aiohttp_client
+
     models = types.ModuleType(f"{PKG}.models")
 
     class Features:
@@ -115,14 +144,16 @@ def _install_component_stubs_for_api():
 
     models.Features = Features
     models.AddPasscodeConfig = Dummy
-    models.Lock = Dummy
     models.LockState = Dummy
+    models.LockView = dict
     models.PassageModeConfig = Dummy
+    models.PassageModeView = dict
     models.Passcode = Dummy
     sys.modules[f"{PKG}.models"] = models
 
 
 async def _run_async_tests(api_mod):
+    scheduling = sys.modules[f"{PKG}.scheduling"]
     api = api_mod.TTLockApi(
         hass=SimpleNamespace(),
         websession=SimpleNamespace(),
@@ -158,6 +189,7 @@ async def _run_async_tests(api_mod):
     await expect_raises(
         "_parse_resp raises HTTP error for status>=400", RuntimeError, _raise_http_error
     )
+    check("HTTP 5xx shrinks the request window", api.scheduler.window.size, 2)
 
     get_calls = []
 
@@ -170,6 +202,7 @@ async def _run_async_tests(api_mod):
             return _AsyncCM(FakeResp(200, {"errcode": 0, "ok": True}))
 
     api_mod.RetryClient = FakeRetryClient
+    api._retry_client = FakeRetryClient(None)
 
     api.ensure_valid_token = types.MethodType(lambda self: _noop_async(), api)
     api.token = "token-1"
@@ -187,22 +220,23 @@ async def _run_async_tests(api_mod):
         )
         check("get adds access_token", params.get("access_token"), "token-1")
 
-    class FakeWebSession:
+    class FakePostClient:
         def __init__(self):
             self.post_calls = []
 
-        async def post(self, url, json=None, headers=None):
+        def post(self, url, json=None, headers=None):
             self.post_calls.append({"url": url, "json": json, "headers": headers})
-            return FakeResp(200, {"errcode": 0, "posted": True})
+            return _AsyncCM(FakeResp(200, {"errcode": 0, "posted": True}))
 
-    post_session = FakeWebSession()
+    post_session = FakePostClient()
     api_post = api_mod.TTLockApi(
         hass=SimpleNamespace(),
-        websession=post_session,
+        websession=SimpleNamespace(),
         username="u",
         password="p",
         url="https://server",
     )
+    api_post._retry_client = post_session
     api_post.ensure_valid_token = types.MethodType(lambda self: _noop_async(), api_post)
     api_post.token = "token-2"
     post_result = await api_post.post("lock/unlock", lockId=99)
@@ -247,6 +281,103 @@ async def _run_async_tests(api_mod):
     await api_token.ensure_valid_token()
     check("ensure_valid_token calls login when expired", login_calls["count"], 2)
 
+    # concurrent callers share one in-flight login
+    api_burst = api_mod.TTLockApi(
+        hass=SimpleNamespace(),
+        websession=SimpleNamespace(),
+        username="u",
+        password="p",
+        url="https://server",
+    )
+    burst_logins = {"count": 0}
+
+    async def slow_login():
+        burst_logins["count"] += 1
+        await asyncio.sleep(0.01)
+        api_burst.token = "burst-token"
+        api_burst.start_time = int(api_mod.time.time() * 1000)
+        api_burst.expires_in = 3600 * 1000
+
+    api_burst.login = slow_login
+    await asyncio.gather(*(api_burst.ensure_valid_token() for _ in range(20)))
+    check("concurrent ensure_valid_token logs in once", burst_logins["count"], 1)
+    check(
+        "shared login stays out of GET coalescer stats",
+        api_burst.coalescer.as_dict(),
+        {"in_flight": 0, "hits": 0, "misses": 0},
+    )
+    api_burst.expires_in = -1
+    await api_burst.ensure_valid_token()
+    check("expired token logs in again", burst_logins["count"], 2)
+
+    # waiters share a failed login instead of each trying again
+    failed_logins = {"count": 0}
+
+    async def failing_login():
+        failed_logins["count"] += 1
+        await asyncio.sleep(0.01)
+        return False
+
+    api_failing = api_mod.TTLockApi(
+        hass=SimpleNamespace(),
+        websession=SimpleNamespace(),
+        username="u",
+        password="p",
+        url="https://server",
+    )
+    api_failing.login = failing_login
+    await asyncio.gather(*(api_failing.ensure_valid_token() for _ in range(5)))
+    check("failed login is shared by waiters", failed_logins["count"], 1)
+
+    # a successful login schedules the next one before expiry
+    class FakeLoginSession:
+        def post(self, url, json=None, headers=None):
+            return _AsyncCM(
+                FakeResp(200, {"access_token": "fresh", "expires_in": 7200 * 1000})
+            )
+
+    event_mod = sys.modules["homeassistant.helpers.event"]
+    event_mod.scheduled.clear()
+    api_refresh = api_mod.TTLockApi(
+        hass=SimpleNamespace(),
+        websession=FakeLoginSession(),
+        username="u",
+        password="p",
+        url="https://server",
+    )
+    await api_refresh.login()
+    check("login schedules proactive refresh", len(event_mod.scheduled), 1)
+    check(
+        "refresh fires before expiry", event_mod.scheduled[0]["delay"], 7200 - 300
+    )
+    await event_mod.scheduled[0]["action"](None)
+    check("proactive refresh reschedules", len(event_mod.scheduled), 2)
+    check_true("new refresh timer is active", not event_mod.scheduled[1]["cancelled"])
+    await api_refresh.async_close()
+    check_true("async_close cancels refresh timer", event_mod.scheduled[1]["cancelled"])
+
+    # a failed refresh is retried with a growing delay, reset by a success
+    class FailingLoginSession:
+        def post(self, url, json=None, headers=None):
+            return _AsyncCM(FakeResp(500, text_body="down"))
+
+    event_mod.scheduled.clear()
+    api_refresh._web_session = FailingLoginSession()
+    await api_refresh._async_refresh_token()
+    await event_mod.scheduled[-1]["action"](None)
+    check(
+        "failed refresh backs off",
+        [handle["delay"] for handle in event_mod.scheduled],
+        [60, 120],
+    )
+    api_refresh._web_session = FakeLoginSession()
+    await event_mod.scheduled[-1]["action"](None)
+    check("successful refresh resets backoff", api_refresh._token_refresh_failures, 0)
+    check(
+        "refresh after success waits for expiry", event_mod.scheduled[-1]["delay"], 6900
+    )
+    await api_refresh.async_close()
+
     # get_locks keeps only gateway/wifi-capable locks
     async def fake_get(path, **kwargs):
         return {
@@ -261,37 +392,336 @@ async def _run_async_tests(api_mod):
     locks = await api_token.get_locks()
     check("get_locks filters non-connectable locks", locks, [1, 2])
 
-    # post retries after transient failure
-    class FlakyPostSession:
+    # iter_unlock_records pages through lockRecord/list and prefetches
+    record_calls = []
+
+    async def fake_record_get(path, **kwargs):
+        record_calls.append(kwargs)
+        page = kwargs["pageNo"]
+        return {"list": [{"recordId": page}], "pages": 3}
+
+    api_token.get = fake_record_get
+    pages = []
+    async for records in api_token.iter_unlock_records(9, start_date=1000):
+        pages.append(records)
+        if len(pages) == 1:
+            await asyncio.sleep(0)
+            check("next page fetched while consuming", len(record_calls), 2)
+    check("all record pages yielded", [p[0]["recordId"] for p in pages], [1, 2, 3])
+    check("no page past the last", len(record_calls), 3)
+    check("start date forwarded", record_calls[0]["startDate"], 1000)
+
+    async def failing_record_get(path, **kwargs):
+        return None
+
+    api_token.get = failing_record_get
+
+    async def consume_failing_pages():
+        async for _records in api_token.iter_unlock_records(9):
+            pass
+
+    await expect_raises(
+        "failed record page raises", api_mod.RequestFailed, consume_failing_pages
+    )
+
+    # post returns None once the shared retry policy gives up
+    class FailingPostClient:
         def __init__(self):
             self.calls = 0
 
-        async def post(self, url, json=None, headers=None):
+        def post(self, url, json=None, headers=None):
             self.calls += 1
-            if self.calls == 1:
-                raise RuntimeError("temporary")
-            return FakeResp(200, {"errcode": 0, "ok": True})
+            raise RuntimeError("retries exhausted")
 
-    flaky_session = FlakyPostSession()
-    flaky_api = api_mod.TTLockApi(
+    failing_client = FailingPostClient()
+    failing_api = api_mod.TTLockApi(
         hass=SimpleNamespace(),
-        websession=flaky_session,
+        websession=SimpleNamespace(),
         username="u",
         password="p",
         url="https://server",
     )
-    flaky_api.ensure_valid_token = types.MethodType(
-        lambda self: _noop_async(), flaky_api
+    failing_api._retry_client = failing_client
+    failing_api.ensure_valid_token = types.MethodType(
+        lambda self: _noop_async(), failing_api
+    )
+    failing_api.token = "retry-token"
+    failed_post_result = await failing_api.post("lock/unlock", lockId=7)
+    check("post returns None after retries", failed_post_result, None)
+    check("post leaves retrying to the client", failing_client.calls, 1)
+
+    # one pooled client per api instance, shared by get and post
+    api_mod.RetryClient = sys.modules["aiohttp_retry"].RetryClient
+    pooled_api = api_mod.TTLockApi(
+        hass=SimpleNamespace(),
+        websession=SimpleNamespace(),
+        username="u",
+        password="p",
+        url="https://server",
+        connection_limit=7,
+    )
+    pooled_client = pooled_api._client()
+    check_true("pooled client is reused", pooled_api._client() is pooled_client)
+    check_true(
+        "pooled client uses shared retry policy",
+        pooled_client.retry_options is api_mod.RETRY_OPTIONS,
+    )
+    check(
+        "pooled session is closed by the api only",
+        sys.modules["homeassistant.helpers.aiohttp_client"].created,
+        [False],
+    )
+    check("connection limit bounds the window", pooled_api.scheduler.window.maximum, 7)
+    pooled_session = pooled_api._session
+    await pooled_api.async_close()
+    check_true("async_close closes pooled session", pooled_session.closed)
+
+    gateways = {1: [{"gatewayId": 7}], 2: [{"gatewayId": 9}, {"gatewayId": 7}]}
+
+    async def _list_gateways(path, lockId):
+        if lockId in (5, 6):
+            return None
+        return {"list": gateways.get(lockId, [])}
+
+    pooled_api.get = _list_gateways
+    gateway_1, gateway_2, wifi_3, wifi_4, unknown_5, again_5, unknown_6 = [
+        await pooled_api.gateway_lock(lock_id) for lock_id in (1, 2, 3, 4, 5, 5, 6)
+    ]
+    check_true("locks on one gateway share a lock", gateway_1 is gateway_2)
+    check_true("wifi locks have their own", wifi_3 is not wifi_4)
+    check_true("unknown gateways are per lock", unknown_5 is not unknown_6)
+    check_true("unknown gateway lock is kept per lock", unknown_5 is again_5)
+    check_true("gateway locks are per api", not hasattr(api_mod, "GW_LOCKS"))
+    del pooled_api.get
+    check_true("scheduler is the only limiter", not hasattr(pooled_api, "rate_limiter"))
+
+    scheduler = scheduling.RequestScheduler(rate=100, burst=1)
+    order = []
+
+    async def request(lane, name):
+        async with scheduler.slot(lane):
+            order.append(name)
+
+    await request(scheduling.LANE_BACKGROUND, "first")
+    with scheduling.request_lane(scheduling.LANE_SERVICE):
+        tasks = [
+            asyncio.ensure_future(request(scheduling.LANE_BULK, "bulk")),
+            asyncio.ensure_future(request(scheduling.LANE_BACKGROUND, "poll")),
+            asyncio.ensure_future(request(None, "service")),
+            asyncio.ensure_future(request(scheduling.LANE_INTERACTIVE, "unlock")),
+        ]
+    await asyncio.sleep(0)
+    lanes = scheduler.as_dict()["lanes"]
+    check("scheduler queues per lane", lanes["background"]["queued"], 1)
+    await asyncio.gather(*tasks)
+    check(
+        "scheduler serves lanes by priority",
+        order,
+        ["first", "unlock", "service", "poll", "bulk"],
+    )
+    lanes = scheduler.as_dict()["lanes"]
+    check("scheduler counts lane requests", lanes["background"]["requests"], 2)
+    check("scheduler counts delayed requests", lanes["background"]["delayed"], 1)
+    check_true(
+        "scheduler records lane wait",
+        lanes["background"]["max_wait_ms"] >= lanes["interactive"]["max_wait_ms"] > 0,
+    )
+
+    waiter = asyncio.ensure_future(request(scheduling.LANE_SERVICE, "cancelled"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    check("cancelled request leaves queue", len(scheduler.lanes["service"].queue), 0)
+    check("finished requests free their slots", scheduler.in_flight, 0)
+
+    window = scheduling.AdaptiveWindow(initial=2, maximum=3)
+    gated = scheduling.RequestScheduler(rate=1000, burst=10, window=window)
+    running = []
+    peak = []
+
+    async def hold(name):
+        async with gated.slot(scheduling.LANE_BACKGROUND):
+            running.append(name)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(name)
+
+    await asyncio.gather(*(hold(i) for i in range(5)))
+    check("window caps requests in flight", max(peak), 2)
+
+    for _ in range(2):
+        window.record(0.1)
+    check("healthy responses grow the window slowly", window.limit, 2.9)
+    window.record(0.1)
+    check("healthy responses grow the window additively", window.size, 3)
+    for _ in range(5):
+        window.record(0.1)
+    check("window stops at its maximum", window.limit, 3)
+    window.record(0.1, overloaded=True)
+    check("pushback halves the window", window.limit, 1.5)
+    window.record(0.1, overloaded=True)
+    check("window shrinks once per backoff interval", window.limit, 1.5)
+    window._backed_off -= 2
+    window.back_off()
+    check("window never drops below the minimum", window.size, 1)
+
+    slow = scheduling.AdaptiveWindow(initial=8, maximum=8)
+    for _ in range(10):
+        slow.record(20.0)
+    check("slow p90 latency shrinks the window", slow.size, 4)
+    check("window reports latency percentiles", slow.as_dict()["p90_ms"], 20000)
+    check("api has an account scheduler", pooled_api.scheduler.burst, 20)
+
+    coalescer = scheduling.RequestCoalescer()
+    calls = []
+
+    async def slow_read(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return {"value": value}
+
+    first, second, other = await asyncio.gather(
+        coalescer.run("a", lambda: slow_read(1)),
+        coalescer.run("a", lambda: slow_read(2)),
+        coalescer.run("b", lambda: slow_read(3)),
+    )
+    check("coalesced callers share one call", calls, [1, 3])
+    check_true("coalesced callers share the result", first is second)
+    check(
+        "coalescer counts hits and misses",
+        coalescer.as_dict(),
+        {"in_flight": 0, "hits": 1, "misses": 2},
+    )
+
+    leader = asyncio.ensure_future(coalescer.run("c", lambda: slow_read(4)))
+    follower = asyncio.ensure_future(coalescer.run("c", lambda: slow_read(5)))
+    await asyncio.sleep(0)
+    leader.cancel()
+    check("cancelled caller leaves the call running", await follower, {"value": 4})
+
+    sent = []
+
+    async def fake_get(path, **kwargs):
+        sent.append(path)
+        await asyncio.sleep(0.01)
+        return {"errcode": 0}
+
+    pooled_api._get = fake_get
+    await asyncio.gather(
+        pooled_api.get("lock/queryOpenState", lockId=1),
+        pooled_api.get("lock/queryOpenState", lockId=1),
+        pooled_api.get("lock/queryOpenState", lockId=2),
+        pooled_api.get("lock/unlock", lockId=1),
+        pooled_api.get("lock/unlock", lockId=1),
+    )
+    check(
+        "identical reads are coalesced, commands are not",
+        sorted(sent),
+        ["lock/queryOpenState", "lock/queryOpenState", "lock/unlock", "lock/unlock"],
+    )
+
+    sent.clear()
+    hits = pooled_api.coalescer.hits
+    await asyncio.gather(pooled_api.get_lock_state(1), pooled_api.get_lock_state(1))
+    check(
+        "concurrent state queries share one request",
+        [path for path in sent if path.startswith("lock/")],
+        ["lock/queryOpenState"],
+    )
+    check_true("state query joins the one in flight", pooled_api.coalescer.hits > hits)
+
+    # queued polls do not hold the gateway, an unlock through it overtakes them
+    shared_gateway = asyncio.Lock()
+
+    async def one_gateway(lock_id):
+        return shared_gateway
+
+    account_scheduler = pooled_api.scheduler
+    pooled_api.scheduler = scheduling.RequestScheduler(rate=200, burst=1)
+    pooled_api.gateway_lock = one_gateway
+    sent.clear()
+    polls = [
+        asyncio.ensure_future(pooled_api.get_lock_state(lock_id))
+        for lock_id in range(100, 130)
+    ]
+    await asyncio.sleep(0.02)
+    await pooled_api.unlock(1)
+    unlocked_after = sent.index("lock/unlock")
+    await asyncio.gather(*polls)
+    check_true("unlock overtakes polls queued on its gateway", unlocked_after < 10)
+    check("queued polls all complete", len(sent), 31)
+    del pooled_api.gateway_lock
+    pooled_api.scheduler = account_scheduler
+
+    pooled_api.responses.invalidate()
+    sent.clear()
+    for _ in range(2):
+        await pooled_api.get("lock/getPassageModeConfig", lockId=1)
+        await pooled_api.get("lock/getPassageModeConfig", lockId=2)
+        await pooled_api.get("lock/queryOpenState", lockId=1)
+    check(
+        "slow-changing endpoints are cached",
+        sent,
+        ["lock/getPassageModeConfig"] * 2 + ["lock/queryOpenState"] * 2,
+    )
+    pooled_api.responses.invalidate("lock/getPassageModeConfig", 1)
+    check("invalidation is per lock", pooled_api.responses.as_dict()["entries"], 1)
+    await pooled_api.get("lock/getPassageModeConfig", lockId=1)
+    check("invalidated entry is refetched", len(sent), 5)
+    check_true(
+        "cache reports payload age",
+        0 <= pooled_api.responses.age("lock/getPassageModeConfig", 1) < 1,
+    )
+    check(
+        "no age without payload", pooled_api.responses.age("lock/detail", 1), None
+    )
+
+    generation = pooled_api.responses.generation
+    pooled_api.responses.invalidate(lock_id=2)
+    key = ("lock/detail", "{}")
+    pooled_api.responses.set(key, 2, {"errcode": 0}, generation)
+    check("write drops in-flight payload", pooled_api.responses.get(key), None)
+
+    async def fake_post(path, **kwargs):
+        return {"errcode": 0}
+
+    pooled_api._post = fake_post
+    configured = await pooled_api.set_passage_mode(
+        1,
+        SimpleNamespace(
+            enabled=True,
+            auto_unlock=False,
+            all_day=True,
+            start_minute=0,
+            end_minute=0,
+            week_days=[1],
+        ),
+    )
+    check("set_passage_mode succeeds", configured, True)
+    check(
+        "set_passage_mode invalidates",
+        pooled_api.responses.get(("lock/getPassageModeConfig", '{"lockId": 1}')),
+        None,
+    )
+
+    async def _no_payload(path, **kwargs):
+        return None
+
+    async def _lock_payload(path, **kwargs):
+        return {"lockId": kwargs["lockId"], "lockAlias": "Front"}
+
+    pooled_api.get = _no_payload
+    await expect_raises(
+        "get_lock raises RequestFailed without payload",
+        api_mod.RequestFailed,
+        lambda: pooled_api.get_lock(1),
+    )
+    pooled_api.get = _lock_payload
+    check(
+        "get_lock wraps payload in a view",
+        await pooled_api.get_lock(1),
+        {"lockId": 1, "lockAlias": "Front"},
     )
-    flaky_api.token = "retry-token"
-    original_sleep = api_mod.asyncio.sleep
-    api_mod.asyncio.sleep = lambda _seconds: _noop_async()
-    try:
-        retry_post_result = await flaky_api.post("lock/unlock", lockId=7)
-    finally:
-        api_mod.asyncio.sleep = original_sleep
-    check("post retries then succeeds", retry_post_result, {"errcode": 0, "ok": True})
-    check("post retried exactly once", flaky_session.calls, 2)
 
 
 async def _noop_async():
@@ -4,6 +4,7 @@ Run: python tests/test_config_flow.py
 """
 
 import asyncio
+from types import SimpleNamespace
 
 from _component_test_stubs import (
     PKG,
@@ -12,6 +13,7 @@ from _component_test_stubs import (
     load_module,
     stub_component_modules_for_config_flow,
     stub_homeassistant_minimal,
+    stub_voluptuous,
 )
 
 
@@ -39,6 +41,7 @@ async def main():
     clear_modules(PKG)
     install_package_root()
     stub_homeassistant_minimal()
+    stub_voluptuous()
     stub_component_modules_for_config_flow()
 
     cfg = load_module("config_flow", "config_flow.py")
@@ -73,6 +76,28 @@ async def main():
     )
     check("valueerror maps to auth", result_value_error["errors"].get("base"), "auth")
 
+    # options default to the values stored at setup, then the built-in ones
+    cfg.vol.Required = lambda key, default=None: (key, default)
+    entry = SimpleNamespace(
+        options={"write_debounce_ms": 250}, data={"setup_concurrency": 4}
+    )
+    options_flow = cfg.GithubCustomConfigFlow.async_get_options_flow(entry)
+    form = await options_flow.async_step_init()
+    check("options flow shows form", form["type"], "form")
+    check(
+        "options defaults",
+        sorted(form["data_schema"]),
+        [
+            ("connection_limit", 20),
+            ("setup_concurrency", 4),
+            ("write_debounce_ms", 250),
+        ],
+    )
+    saved = await options_flow.async_step_init(
+        {"write_debounce_ms": 500, "setup_concurrency": 4, "connection_limit": 20}
+    )
+    check("options are saved", saved["data"]["write_debounce_ms"], 500)
+
     print("\n" + "=" * 64)
     if tests_failed == 0:
         print(f"ALL {tests_run} TESTS PASSED")
@@ -4,6 +4,9 @@ Run: python tests/test_coordinator_runtime.py
 """
 
 import asyncio
+from dataclasses import replace
+import sys
+import time
 from datetime import datetime, timedelta
 from types import SimpleNamespace
 
@@ -67,7 +70,9 @@ async def main():
             self.unlock_calls += 1
             return True
 
-    hass = SimpleNamespace(create_task=lambda coro: asyncio.create_task(coro))
+    hass = SimpleNamespace(
+        create_task=lambda coro: asyncio.create_task(coro), data={}
+    )
     coordinator = coord_mod.LockUpdateCoordinator(hass, FakeApi(), 101)
     coordinator.data = coord_mod.LockState(name="Door", mac="AA:BB", locked=False)
 
@@ -88,24 +93,24 @@ async def main():
     await coordinator.unlock()
     check("unlock() sets locked False", coordinator.data.locked, False)
 
-    # _process_webhook_data should ignore unrelated event id
+    # _process_webhook_events should ignore unrelated event id
     before_locked = coordinator.data.locked
     unrelated_event = SimpleNamespace(id=999, success=True)
-    coordinator._process_webhook_data(unrelated_event)
+    coordinator._process_webhook_events([unrelated_event])
     check(
         "unrelated webhook does not change state",
         coordinator.data.locked,
         before_locked,
     )
 
-    # _process_webhook_data should ignore failed event
+    # _process_webhook_events should ignore failed event
     failed_event = SimpleNamespace(id=101, success=False)
-    coordinator._process_webhook_data(failed_event)
+    coordinator._process_webhook_events([failed_event])
     check(
         "failed webhook does not change state", coordinator.data.locked, before_locked
     )
 
-    # _process_webhook_data should call _handle_auto_lock when unlocked event received
+    # an unlocked event from _process_webhook_events calls _handle_auto_lock
     called = {"count": 0}
 
     original_handle_auto_lock = coordinator._handle_auto_lock
@@ -127,12 +132,158 @@ async def main():
         user="user1",
         event=SimpleNamespace(description="unlock by app"),
     )
-    coordinator._process_webhook_data(unlock_event)
+    coordinator._process_webhook_events([unlock_event])
     check_true("unlock event triggers auto-lock handler", called["count"] == 1)
     check("unlock event sets battery level", coordinator.data.battery_level, 77)
     check("unlock event sets last user", coordinator.data.last_user is not None, True)
     coordinator._handle_auto_lock = original_handle_auto_lock
 
+    # each unlock replaces the pending auto-lock timer of the lock
+    scheduled = sys.modules["homeassistant.helpers.event"].scheduled
+    scheduled.clear()
+    timers = coord_mod.auto_lock_timers(hass)
+    coordinator._handle_auto_lock(datetime.now(), datetime.now())
+    coordinator._handle_auto_lock(datetime.now(), datetime.now())
+    check("one auto-lock timer per lock", timers.pending, 1)
+    check("earlier auto-lock timer cancelled", scheduled[0]["cancelled"], True)
+    check("auto-lock timer counts reschedule", timers.rescheduled, 1)
+    scheduled[1]["action"](None)
+    check("auto-lock timer locks", coordinator.data.locked, True)
+    check("fired auto-lock timer is not pending", timers.pending, 0)
+    coordinator.data.locked = False
+    coordinator._handle_auto_lock(datetime.now(), datetime.now())
+    relock_event = SimpleNamespace(**vars(unlock_event))
+    relock_event.state = SimpleNamespace(locked=coord_mod.State.locked)
+    coordinator._process_webhook_events([relock_event])
+    check("lock event cancels auto-lock timer", timers.pending, 0)
+    check("diagnostics counts timers", timers.as_dict()["scheduled"], 3)
+
+    # webhook transitions derive new states instead of mutating the old one
+    config = SimpleNamespace(enabled=False)
+    coordinator.data.auto_lock_seconds = 0
+    coordinator.data.passage_mode_config = config
+    previous = coordinator.data
+    emitted = []
+    coordinator.async_set_updated_data = emitted.append
+    lock_event = SimpleNamespace(
+        id=101,
+        success=True,
+        battery_level=60,
+        state=SimpleNamespace(locked=coord_mod.State.locked),
+        lock_ts=datetime.now(),
+        server_ts=datetime.now(),
+        user="user2",
+        event=SimpleNamespace(description="lock by app"),
+    )
+    coordinator._process_webhook_events([lock_event])
+    del coordinator.async_set_updated_data
+    check("webhook emits pending then final state", len(emitted), 2)
+    check(
+        "pending state shows opposite",
+        (emitted[0].locked, emitted[0].action_pending),
+        (False, True),
+    )
+    check(
+        "final state is locked",
+        (emitted[1].locked, emitted[1].action_pending),
+        (True, False),
+    )
+    check("previous state untouched", previous.battery_level, 77)
+    check_true("states are distinct", emitted[0] is not emitted[1])
+    check_true(
+        "nested config is shared", emitted[1].passage_mode_config is config
+    )
+
+    # a burst of events for one lock is published as a single update
+    emitted = []
+    coordinator.async_set_updated_data = emitted.append
+    burst = [
+        SimpleNamespace(**{**vars(lock_event), "battery_level": level})
+        for level in (59, 58, 57)
+    ]
+    burst_router = coord_mod.WebhookRouter(coord_mod.coordinator_index(hass))
+    routed_count = burst_router.async_route_batch(
+        burst + [SimpleNamespace(id=7, success=True)]
+    )
+    del coordinator.async_set_updated_data
+    check("batch routes events of known locks", routed_count, 3)
+    check(
+        "batch publishes the last transition only",
+        [state.action_pending for state in emitted],
+        [True, False],
+    )
+    check("batch ends in last event state", emitted[-1].battery_level, 57)
+    check("batch counts unmatched", burst_router.as_dict()["unmatched_locks"], {7: 1})
+
+    # passcodes are listed once and then kept in step with our own edits
+    class PasscodeApi:
+        def __init__(self):
+            self.list_calls = 0
+
+        async def list_passcodes(self, lock_id, is_parse=True):
+            self.list_calls += 1
+            return {"list": [{"keyboardPwdId": 1, "keyboardPwdName": "a"}]}
+
+    passcode_api = PasscodeApi()
+    cached = coord_mod.LockUpdateCoordinator(hass, passcode_api, 77)
+    await cached.async_list_passcodes(is_parse=False)
+    cached.passcodes.added(
+        SimpleNamespace(passcode_name="b", type="3", start_minute=1, end_minute=2),
+        {"keyboardPwdId": 2, "keyboardPwd": "123456"},
+    )
+    cached.passcodes.changed(1, {"errcode": 0}, keyboardPwdName="a2", keyboardPwd=None)
+    cached.passcodes.removed(2, {"errcode": 0})
+    cached.passcodes.added(
+        SimpleNamespace(passcode_name="c", type="1", start_minute=0, end_minute=0),
+        {"keyboardPwdId": 3},
+    )
+    listed = await cached.async_list_passcodes()
+    check("passcodes listed from cloud once", passcode_api.list_calls, 1)
+    check(
+        "cache follows create/change/delete",
+        [(code["keyboardPwdId"], code["keyboardPwdName"]) for code in listed],
+        [(1, "a2"), (3, "c")],
+    )
+    cached.passcodes.removed(3, None)
+    await cached.async_list_passcodes()
+    check("failed edit invalidates cache", passcode_api.list_calls, 2)
+    await cached.async_list_passcodes(refresh=True)
+    check("refresh bypasses cache", passcode_api.list_calls, 3)
+    cached.passcodes.ttl = timedelta(0)
+    await cached.async_list_passcodes()
+    check("expired cache is reloaded", passcode_api.list_calls, 4)
+    cached.async_unregister_webhook()
+
+    # the webhook router hands events to the coordinator of their lock only
+    router = coord_mod.webhook_router(hass)
+    check_true(
+        "router looks locks up in the coordinator index",
+        router.index is coord_mod.coordinator_index(hass),
+    )
+    routed = []
+    coordinator._process_webhook_events = routed.extend
+    routed_event = SimpleNamespace(id=101)
+    check(
+        "router matches registered lock", router.async_route_batch([routed_event]), 1
+    )
+    check_true("router delivers event", routed == [routed_event])
+    check(
+        "router rejects unknown lock",
+        router.async_route_batch([SimpleNamespace(id=5)]),
+        0,
+    )
+    check(
+        "router counts unmatched events", router.as_dict()["unmatched_locks"], {5: 1}
+    )
+    coordinator.async_unregister_webhook()
+    router.async_route_batch([routed_event])
+    check("unregistered coordinator gets no events", len(routed), 1)
+    check_true(
+        "unregistered coordinator leaves the index",
+        101 not in coord_mod.coordinator_index(hass).by_lock_id,
+    )
+    del coordinator._process_webhook_events
+
     # _handle_auto_lock with disabled auto-lock does nothing
     coordinator.data.auto_lock_seconds = -1
     coordinator.data.locked = False
@@ -145,9 +296,374 @@ async def main():
     coordinator.data.locked = False
     now = datetime.now()
     coordinator._handle_auto_lock(now, now + timedelta(seconds=2))
-    await asyncio.sleep(0.05)
+    check("late event auto-locks without delay", scheduled[-1]["delay"], 0)
+    scheduled[-1]["action"](None)
     check("auto-lock eventually sets locked True", coordinator.data.locked, True)
 
+    # fleet: one lock/list per account, lock/detail only for missing fields
+    class FakeDetails(SimpleNamespace):
+        def copy(self, update=None):
+            return FakeDetails(**{**vars(self), **(update or {})})
+
+    class FleetApi:
+        def __init__(self):
+            self.list_calls = 0
+            self.detail_calls = 0
+            self.details = {}
+            self.fetched = {}
+            self.list_fails = False
+            self.responses = SimpleNamespace(
+                age=lambda path, lock_id: time.monotonic() - self.fetched[lock_id]
+            )
+
+        async def list_locks(self):
+            self.list_calls += 1
+            await asyncio.sleep(0)
+            if self.list_fails:
+                raise RuntimeError("lock/list failed")
+            return [
+                {
+                    "lockId": 1,
+                    "lockAlias": "Front",
+                    "lockMac": "M1",
+                    "electricQuantity": 80,
+                },
+                {
+                    "lockId": 2,
+                    "lockAlias": "Back",
+                    "lockMac": "M2",
+                    "electricQuantity": 60,
+                },
+            ]
+
+        async def get_lock(self, lock_id, fresh=False):
+            # stands in for the response cache of TTLockApi
+            if not fresh and lock_id in self.details:
+                return self.details[lock_id]
+            self.detail_calls += 1
+            self.fetched[lock_id] = time.monotonic()
+            self.details[lock_id] = FakeDetails(
+                name="detail",
+                mac=f"MAC{lock_id}",
+                model="M1",
+                featureValue=None,
+                battery_level=0,
+                hardwareRevision="hw",
+                firmwareRevision="fw",
+                autoLockTime=5,
+            )
+            return self.details[lock_id]
+
+        async def get_lock_state(self, lock_id):
+            return SimpleNamespace(locked=coord_mod.State.locked)
+
+        async def get_lock_passage_mode_config(self, lock_id):
+            return None
+
+    fleet_api = FleetApi()
+    fleet = coord_mod.LockFleetCoordinator(hass, fleet_api)
+    front = coord_mod.LockUpdateCoordinator(hass, fleet_api, 1, fleet)
+    back = coord_mod.LockUpdateCoordinator(hass, fleet_api, 2, fleet)
+    front.data, back.data = await asyncio.gather(
+        front._async_update_data(), back._async_update_data()
+    )
+    check("fleet shares one lock/list call", fleet_api.list_calls, 1)
+    check("first refresh fetches details once per lock", fleet_api.detail_calls, 2)
+    check("newer detail is not overridden by list row", front.data.name, "detail")
+
+    fleet._last_update = None
+    front.data, back.data = await asyncio.gather(
+        front._async_update_data(), back._async_update_data()
+    )
+    check("next refresh refetches lock/list", fleet_api.list_calls, 2)
+    check("next refresh skips lock/detail", fleet_api.detail_calls, 2)
+    check("newer list row overrides detail name", front.data.name, "Front")
+    check("list row provides battery", back.data.battery_level, 60)
+    check("detail provides model", back.data.model, "M1")
+    back_row = fleet.rows.pop(2)
+    await back._async_update_data()
+    check("lock missing from lock/list refetches details", fleet_api.detail_calls, 3)
+    fleet.rows[2] = back_row
+
+    fleet_api.list_fails = True
+    fleet._last_update = None
+    failed_list = await front._async_update_data()
+    check("failed lock/list drops the rows", fleet.rows, {})
+    check("failed lock/list falls back to lock/detail", fleet_api.detail_calls, 4)
+    check("fallback uses detail values", failed_list.name, "detail")
+    await back._async_update_data()
+    check("failed lock/list is not retried at once", fleet_api.list_calls, 3)
+    fleet_api.list_fails = False
+    fleet._last_update = None
+    await front._async_update_data()
+
+    # entity_id index follows entity add/remove, lock_id index the coordinator
+    index_hass = SimpleNamespace(data={})
+    indexed = coord_mod.LockUpdateCoordinator(index_hass, fleet_api, 42)
+    lock_entity = SimpleNamespace(entity_id="lock.ttlock_42")
+    battery_entity = SimpleNamespace(entity_id="sensor.ttlock_42_battery")
+    indexed.async_add_entity(lock_entity)
+    indexed.async_add_entity(battery_entity)
+    check_true(
+        "coordinator_for finds entity",
+        coord_mod.coordinator_for(index_hass, "sensor.ttlock_42_battery") is indexed,
+    )
+    check_true(
+        "lock index finds coordinator",
+        coord_mod.coordinator_index(index_hass).by_lock_id[42] is indexed,
+    )
+    check("coordinator lists its entities", len(indexed.entities), 2)
+    indexed.async_remove_entity(lock_entity)
+    check(
+        "removed entity is not found",
+        coord_mod.coordinator_for(index_hass, "lock.ttlock_42"),
+        None,
+    )
+    indexed.async_remove_entity(battery_entity)
+    check_true(
+        "lock stays indexed without entities",
+        coord_mod.coordinator_index(index_hass).by_lock_id.get(42) is indexed,
+    )
+    indexed.async_unregister_webhook()
+    check(
+        "lock unindexed when unregistered",
+        coord_mod.coordinator_index(index_hass).by_lock_id.get(42),
+        None,
+    )
+    entries_hass = SimpleNamespace(
+        data={
+            "javis_lock": {
+                "e1": {"locks": [front]},
+                "e2": {"locks": [back]},
+                "index": object(),
+            }
+        }
+    )
+    check(
+        "all_coordinators of every entry",
+        len(coord_mod.all_coordinators(entries_hass)),
+        2,
+    )
+    check_true(
+        "all_coordinators of one entry",
+        coord_mod.all_coordinators(entries_hass, "e2") == [back],
+    )
+
+    # adaptive polling within an account-wide budget
+    scheduler = coord_mod.PollScheduler(budget=1000)
+
+    def minutes(scheduler, lock_id):
+        # nominal interval, before the phase alignment
+        return scheduler.as_dict()["intervals"][lock_id] / 60
+
+    def wanted(scheduler, lock_id):
+        scheduler.interval(lock_id)
+        return minutes(scheduler, lock_id)
+
+    check("no webhooks yet polls as quiet", wanted(scheduler, 1), 15)
+    scheduler.note_webhook(1)
+    check("idle lock with webhooks backs off", wanted(scheduler, 1), 360)
+    scheduler.note_action(1)
+    check("lock polls often after an action", wanted(scheduler, 1), 2)
+    scheduler._last_action[1] -= coord_mod.POLL_ACTIVE_WINDOW.total_seconds()
+    scheduler.note_missed_event(1)
+    check("missed webhook polls as quiet", wanted(scheduler, 1), 15)
+    scheduler._missed.clear()
+    scheduler.last_webhook -= coord_mod.WEBHOOK_QUIET_AFTER.total_seconds() + 1
+    check("quiet webhook stream polls as quiet", wanted(scheduler, 1), 15)
+    scheduler.budget = 10
+    for lock_id in range(2, 5):
+        scheduler.interval(lock_id)
+    check("budget stretches busy intervals", scheduler.stretch, 1.6)
+    check("stretched interval", wanted(scheduler, 1), 24)
+
+    # refreshes are aligned to a fixed per-lock phase of the wall clock
+    nows = [time.time() + offset for offset in (0, 100, 1000)]
+    delays = [scheduler.interval(1, now).total_seconds() for now in nows]
+    phase = coord_mod.poll_phase(1) * 1440
+    check_true(
+        "refreshes land on one phase",
+        all(
+            abs((now + delay - phase + 1) % 1440 - 1) < 1e-3
+            for now, delay in zip(nows, delays)
+        ),
+    )
+    check_true(
+        "delay stays within half an interval of it",
+        all(720 <= delay < 2160 for delay in delays),
+    )
+    # a new scheduler, as after a restart, lands on the same epoch-based slot
+    restarted = coord_mod.PollScheduler()
+    slot = (time.time() + restarted.interval(7).total_seconds()) % 900
+    check_true(
+        "phase survives a restart", abs(slot - coord_mod.poll_phase(7) * 900) < 0.5
+    )
+    phases = sorted(coord_mod.poll_phase(lock_id) for lock_id in range(1000, 1040))
+    gaps = [b - a for a, b in zip(phases, phases[1:] + [phases[0] + 1])]
+    check_true("phases of 40 locks are spread out", max(gaps) < 3 / 40)
+    for _ in range(3):
+        scheduler.note_refresh(1)
+    histogram = scheduler.as_dict()["refresh_rate_histogram"]
+    check("histogram counts a burst", histogram, {0: 59, 3: 1})
+
+    polled = coord_mod.LockUpdateCoordinator(
+        hass, fleet_api, 1, fleet, scheduler=coord_mod.PollScheduler()
+    )
+    check("initial interval from scheduler", minutes(polled.scheduler, 1), 15)
+    check_true(
+        "initial interval is phase aligned",
+        timedelta(minutes=7.5) <= polled.update_interval < timedelta(minutes=22.5),
+    )
+    polled.data = await polled._async_update_data()
+    polled.data = replace(polled.data, locked=False)
+    polled.scheduler.note_webhook(1)
+    polled.data = await polled._async_update_data()
+    check(
+        "poll noticing an unreported change",
+        sorted(polled.scheduler._missed),
+        [1],
+    )
+    check("refresh sets next interval", minutes(polled.scheduler, 1), 15)
+    polled.scheduler.note_webhook(1)
+    polled.data = await polled._async_update_data()
+    check("refresh backs off with webhooks", minutes(polled.scheduler, 1), 360)
+    check_true("refresh delay follows", polled.update_interval > timedelta(hours=3))
+
+    async def locked_ok(lock_id):
+        return True
+
+    polled.api = SimpleNamespace(lock=locked_ok)
+    await polled.lock()
+    check("action shortens interval", minutes(polled.scheduler, 1), 2)
+    check_true("action delay is short", polled.update_interval < timedelta(minutes=3))
+    check("action reschedules refresh", polled.schedule_calls, 1)
+    check("refreshes are recorded", len(polled.scheduler._refreshes), 3)
+
+    # a large fleet spends the budget on busy locks, idle ones wait a day at most
+    fleet_hass = SimpleNamespace(data={})
+    shared = coord_mod.PollScheduler()
+    doors = [
+        coord_mod.LockUpdateCoordinator(
+            fleet_hass, fleet_api, lock_id, scheduler=shared
+        )
+        for lock_id in range(2000, 2300)
+    ]
+
+    def door_event(door):
+        return SimpleNamespace(**{**vars(unlock_event), "id": door.lock_id})
+
+    shared.note_action(2000)
+    for door in doors[:200]:
+        door._process_webhook_events([door_event(door), door_event(door)])
+    for door in doors[200:]:
+        shared.note_missed_event(door.lock_id)
+    for door in doors:
+        door.update_interval = shared.interval(door.lock_id)
+    intervals = shared.as_dict()["intervals"]
+    check("webhooks confirm the pending action", shared._last_action, {})
+    check(
+        "webhook doors are idle, not active",
+        {intervals[door.lock_id] for door in doors[:200]},
+        {coord_mod.POLL_MAX_INTERVAL.total_seconds()},
+    )
+    check("missed doors share the budget", intervals[2200] / 60, 50)
+    check_true(
+        "no door waits longer than a day",
+        all(door.update_interval <= coord_mod.POLL_MAX_INTERVAL for door in doors),
+    )
+    check_true(
+        "busy doors fit the budget",
+        abs(sum(3600 / intervals[door.lock_id] for door in doors[200:]) - 120) < 1e-6,
+    )
+
+    calls = {door: door.schedule_calls for door in doors}
+    for door in doors[200:290]:
+        door._process_webhook_events([door_event(door)])
+    doors[290].update_interval = shared.interval(2290)
+    check("stretch falls with the load", shared.stretch, 1.0)
+    check("idle doors get budget back", shared.idle_stretch, 1.0)
+    check_true(
+        "doors move forward when the stretch falls",
+        all(door.schedule_calls > calls[door] for door in doors[291:])
+        and doors[-1].update_interval <= timedelta(minutes=22.5),
+    )
+    check_true(
+        "webhook doors move forward too",
+        all(door.update_interval <= timedelta(hours=9) for door in doors[:200]),
+    )
+    for door in doors:
+        door.async_unregister_webhook()
+    check("unloaded doors leave the scheduler", shared.as_dict()["intervals"], {})
+
+    # a lock whose first refresh failed gets placeholder data from lock/list
+    unavailable = coord_mod.LockUpdateCoordinator(hass, fleet_api, 2, fleet)
+    await unavailable.async_set_unavailable()
+    check("unavailable lock is flagged", unavailable.last_update_success, False)
+    check("unavailable lock keeps list name", unavailable.data.name, "Back")
+
+    # refresh sub-requests run concurrently and merge partial results
+    class SlowApi(FleetApi):
+        def __init__(self):
+            super().__init__()
+            self.started = []
+            self.state_delay = 0
+            self.passage_error = None
+
+        async def get_lock(self, lock_id, fresh=False):
+            self.started.append("details")
+            await asyncio.sleep(0.01)
+            return await super().get_lock(lock_id, fresh)
+
+        async def get_lock_state(self, lock_id):
+            self.started.append("state")
+            await asyncio.sleep(self.state_delay)
+            return SimpleNamespace(locked=coord_mod.State.locked)
+
+        async def get_lock_passage_mode_config(self, lock_id):
+            self.started.append("passage")
+            await asyncio.sleep(0.01)
+            if self.passage_error:
+                raise self.passage_error
+            return "passage"
+
+    slow_api = SlowApi()
+    slow = coord_mod.LockUpdateCoordinator(hass, slow_api, 9)
+    slow_api.state_delay = 0.01
+    slow.data = await slow._async_update_data()
+    check(
+        "sub-requests start together",
+        slow_api.started[:3],
+        ["details", "state", "passage"],
+    )
+    check("merged refresh has state", slow.data.locked, True)
+    check("merged refresh has passage mode", slow.data.passage_mode_config, "passage")
+
+    coord_mod.REFRESH_STATE_TIMEOUT = timedelta(seconds=0.05)
+    slow_api.state_delay = 1
+    slow_api.passage_error = RuntimeError("offline")
+    slow.data = replace(slow.data, battery_level=None, locked=False)
+    started = asyncio.get_running_loop().time()
+    slow.data = await slow._async_update_data()
+    check_true(
+        "slow state query is cut at its timeout",
+        asyncio.get_running_loop().time() - started < 0.5,
+    )
+    check("timed out state keeps previous value", slow.data.locked, False)
+    check("failed passage keeps previous", slow.data.passage_mode_config, "passage")
+    check("battery arrives despite slow gateway", slow.data.battery_level, 0)
+
+    async def no_details(lock_id, fresh=False):
+        raise RuntimeError("offline")
+
+    slow_api.get_lock = no_details
+    failing = coord_mod.LockUpdateCoordinator(hass, slow_api, 10)
+    try:
+        await failing._async_update_data()
+        first_failed = False
+    except coord_mod.UpdateFailed:
+        first_failed = True
+    check("first refresh needs details", first_failed, True)
+
     print("\n" + "=" * 64)
     if tests_failed == 0:
         print(f"ALL {tests_run} TESTS PASSED")
@@ -40,7 +40,7 @@ def _install_extra_homeassistant_stubs():
         BATTERY = "battery"
 
     class SensorEntity:
-        pass
+        _attr_native_value = None
 
     sensor.SensorDeviceClass = SensorDeviceClass
     sensor.SensorEntity = SensorEntity
@@ -114,11 +114,20 @@ def _install_component_stubs():
         pass
 
     coord.LockUpdateCoordinator = LockUpdateCoordinator
+    coord.webhook_router = lambda hass: SimpleNamespace(
+        as_dict=lambda: {"routed": 3, "unmatched": 1}
+    )
+    coord.auto_lock_timers = lambda hass: SimpleNamespace(
+        as_dict=lambda: {"pending": 2}
+    )
     sys.modules[f"{PKG}.coordinator"] = coord
 
     const = types.ModuleType(f"{PKG}.const")
     const.DOMAIN = "javis_lock"
     const.TT_LOCKS = "locks"
+    const.TT_SETUP = "setup"
+    const.TT_POLL = "poll"
+    const.TT_API = "api"
     sys.modules[f"{PKG}.const"] = const
 
 
@@ -139,10 +148,14 @@ async def _run_tests():
         last_reason="unlock by app",
         passage_mode_active=lambda *args, **kwargs: True,
     )
+    indexed = []
     fake_coordinator = SimpleNamespace(
         data=lock_data,
         device_info={"id": 1},
         unique_id="javis_lock-1",
+        async_add_entity=indexed.append,
+        async_remove_entity=indexed.remove,
+        write_debounce=0,
     )
 
     lock_entity = lock_mod.Lock(fake_coordinator)
@@ -193,6 +206,11 @@ async def _run_tests():
     passage_entity = bin_mod.PassageMode(fake_coordinator)
     check("passage mode binary sensor on", passage_entity._attr_is_on, True)
 
+    await passage_entity.async_added_to_hass()
+    check("added entity is indexed", passage_entity in indexed, True)
+    await passage_entity.async_will_remove_from_hass()
+    check("removed entity is unindexed", passage_entity in indexed, False)
+
     class DemoEntity(entity_mod.BaseLockEntity):
         def _update_from_coordinator(self):
             self._attr_name = "demo"
@@ -201,6 +219,89 @@ async def _run_tests():
     demo._handle_coordinator_update()
     check("base entity writes HA state", demo._write_called, True)
 
+    # with a debounce window settled updates are merged into one write
+    writes = []
+    scheduled = sys.modules["homeassistant.helpers.event"].scheduled
+    debounced = DemoEntity(SimpleNamespace(**{**vars(fake_coordinator)}))
+    debounced.hass = SimpleNamespace()
+    debounced.coordinator.write_debounce = 0.05
+    debounced.async_write_ha_state = lambda: writes.append(
+        debounced.coordinator.data.action_pending
+    )
+    scheduled.clear()
+    debounced._handle_coordinator_update()
+    debounced._handle_coordinator_update()
+    check("debounced updates are not written at once", writes, [])
+    check("one debounced write scheduled", len(scheduled), 1)
+    scheduled[0]["action"](None)
+    check("debounced write happens once", writes, [False])
+
+    debounced.coordinator.data = SimpleNamespace(**vars(lock_data))
+    debounced.coordinator.data.action_pending = True
+    debounced._handle_coordinator_update()
+    check("pending action is written at once", writes, [False, True])
+
+    # a changed lock state is written at once even with a debounce window
+    relocked = lock_mod.Lock(SimpleNamespace(**{**vars(fake_coordinator)}))
+    relocked.hass = SimpleNamespace()
+    relocked.coordinator.write_debounce = 0.05
+    relocked.coordinator.data = SimpleNamespace(**vars(lock_data))
+    states = []
+    relocked.async_write_ha_state = lambda: states.append(relocked._attr_is_locked)
+    scheduled.clear()
+    relocked.coordinator.data.locked = False
+    relocked._handle_coordinator_update()
+    relocked.coordinator.data.locked = True
+    relocked._handle_coordinator_update()
+    check("unlock and relock are both written", states, [False, True])
+    relocked.coordinator.data.battery_level = 50
+    relocked._handle_coordinator_update()
+    check(
+        "attribute-only change is debounced",
+        (states, len(scheduled)),
+        ([False, True], 1),
+    )
+    relocked.coordinator.last_update_success = False
+    relocked._handle_coordinator_update()
+    check("lost availability is written at once", states, [False, True, True])
+
+    # a webhook burst of sensor changes is merged into one write per entity
+    burst_coordinator = SimpleNamespace(
+        **{**vars(fake_coordinator), "write_debounce": 0.05}
+    )
+    burst_coordinator.data = SimpleNamespace(**vars(lock_data))
+    burst_writes = []
+    burst_entities = []
+    for entity_cls in (
+        lock_mod.Lock,
+        sensor_mod.LockBattery,
+        sensor_mod.LockOperator,
+        sensor_mod.LockTrigger,
+        bin_mod.PassageMode,
+    ):
+        entity = entity_cls(burst_coordinator)
+        entity.hass = SimpleNamespace()
+        entity.async_write_ha_state = lambda entity=entity: burst_writes.append(
+            type(entity).__name__
+        )
+        burst_entities.append(entity)
+    scheduled.clear()
+    for level in range(80, 70, -1):
+        burst_coordinator.data.battery_level = level
+        burst_coordinator.data.last_user = f"user{level}"
+        burst_coordinator.data.last_reason = f"unlock by app {level}"
+        for entity in burst_entities:
+            entity._handle_coordinator_update()
+    check("burst is not written at once", burst_writes, [])
+    for handle in scheduled:
+        if not handle["cancelled"]:
+            handle["action"](None)
+    check(
+        "burst of 10 updates writes each entity once",
+        sorted(burst_writes),
+        sorted(type(entity).__name__ for entity in burst_entities),
+    )
+
     config_entry = SimpleNamespace(
         entry_id="entry-1",
         as_dict=lambda: {"token": "secret", "name": "demo"},
@@ -209,6 +310,13 @@ async def _run_tests():
         data={
             "javis_lock": {
                 "entry-1": {
+                    "setup": {"total_seconds": 1.5, "unavailable": []},
+                    "poll": SimpleNamespace(as_dict=lambda: {"budget": 120}),
+                    "api": SimpleNamespace(
+                        scheduler=SimpleNamespace(as_dict=lambda: {"rate": 10}),
+                        coalescer=SimpleNamespace(as_dict=lambda: {"hits": 3}),
+                        responses=SimpleNamespace(as_dict=lambda: {"entries": 2}),
+                    ),
                     "locks": [
                         SimpleNamespace(
                             as_dict=lambda: {
@@ -229,6 +337,21 @@ async def _run_tests():
         diag["locks"][0]["device"]["adminPwd"],
         "REDACTED",
     )
+    check("diagnostics includes setup timing", diag["setup"]["total_seconds"], 1.5)
+    check("diagnostics includes webhook counters", diag["webhooks"]["unmatched"], 1)
+    check("diagnostics includes pending auto-locks", diag["auto_lock"]["pending"], 2)
+    check("diagnostics includes polling", diag["polling"], {"budget": 120})
+    check("diagnostics includes request lanes", diag["requests"], {"rate": 10})
+    check(
+        "diagnostics includes coalesced requests",
+        diag["coalesced_requests"],
+        {"hits": 3},
+    )
+    check(
+        "diagnostics includes cached responses",
+        diag["cached_responses"],
+        {"entries": 2},
+    )
 
 
 def main():
@@ -169,12 +169,15 @@ def _install_component_stubs():
         pass
 
     class TTLockApi:
-        def __init__(self, hass, session, username, password, url):
+        def __init__(self, hass, session, username, password, url, limit=None):
             self.url = url
 
         async def get_locks(self):
             return [101]
 
+        async def async_close(self, event=None):
+            self.closed = True
+
     api.ComponentOutdatedError = ComponentOutdatedError
     api.TTLockApi = TTLockApi
     sys.modules[f"{PKG}.api"] = api
@@ -184,22 +187,83 @@ def _install_component_stubs():
     const.CONF_WEBHOOK_URL = "webhook_url"
     const.COMPONENT_VERSION = "v1"
     const.DOMAIN = "javis_lock"
-    const.SIGNAL_NEW_DATA = "signal_new"
     const.TT_API = "api"
     const.TT_LOCKS = "locks"
+    const.TT_SETUP = "setup"
+    const.TT_POLL = "poll"
+    const.CONF_SETUP_CONCURRENCY = "setup_concurrency"
+    const.DEFAULT_SETUP_CONCURRENCY = 10
+    const.CONF_CONNECTION_LIMIT = "connection_limit"
+    const.DEFAULT_CONNECTION_LIMIT = 20
+    const.CONF_WRITE_DEBOUNCE = "write_debounce_ms"
+    const.DEFAULT_WRITE_DEBOUNCE = 0
     const.SERVER_URL = "https://api.test"
     sys.modules[f"{PKG}.const"] = const
 
     coordinator = types.ModuleType(f"{PKG}.coordinator")
 
+    class LockFleetCoordinator:
+        def __init__(self, hass, client):
+            self.hass = hass
+
     class LockUpdateCoordinator:
-        def __init__(self, hass, client, lock_id):
+        failing = set()
+        skipped = set()
+        created = []
+        running = 0
+        max_running = 0
+
+        def __init__(
+            self, hass, client, lock_id, fleet=None, write_debounce=0, scheduler=None
+        ):
             self.hass = hass
             self.lock_id = lock_id
+            self.fleet = fleet
+            self.write_debounce = write_debounce
+            self.scheduler = scheduler
+            self.data = None
+            self.last_update_success = True
+            self.setup_seconds = None
+            self.unregistered = False
+            LockUpdateCoordinator.created.append(self)
 
         async def async_config_entry_first_refresh(self):
-            return None
-
+            cls = LockUpdateCoordinator
+            cls.running += 1
+            cls.max_running = max(cls.max_running, cls.running)
+            await asyncio.sleep(0.01)
+            cls.running -= 1
+            if self.lock_id in cls.failing:
+                self.last_update_success = False
+                raise RuntimeError("refresh failed")
+            if self.lock_id in cls.skipped:
+                return
+            self.data = SimpleNamespace(lock_id=self.lock_id)
+
+        def async_unregister_webhook(self):
+            self.unregistered = True
+
+        async def async_set_unavailable(self):
+            self.last_update_success = False
+            self.data = SimpleNamespace(lock_id=self.lock_id)
+
+    class WebhookRouter:
+        def __init__(self):
+            self.events = []
+
+        def async_route_batch(self, events):
+            self.events.append(events)
+            return len(events)
+
+    router = WebhookRouter()
+    coordinator.LockFleetCoordinator = LockFleetCoordinator
+    coordinator.PollScheduler = lambda: SimpleNamespace(budget=120)
+    coordinator.webhook_router = lambda hass: router
+    cancelled_timers = []
+    coordinator.auto_lock_timers = lambda hass: SimpleNamespace(
+        async_cancel=cancelled_timers.append
+    )
+    coordinator.cancelled_timers = cancelled_timers
     coordinator.LockUpdateCoordinator = LockUpdateCoordinator
     sys.modules[f"{PKG}.coordinator"] = coordinator
 
@@ -208,6 +272,8 @@ def _install_component_stubs():
     class WebhookEvent:
         @classmethod
         def parse_obj(cls, obj):
+            if obj.get("recordType") == -1:
+                raise ValueError("invalid record")
             return SimpleNamespace(**obj)
 
     models.WebhookEvent = WebhookEvent
@@ -231,11 +297,28 @@ def _install_component_stubs():
     sys.modules[f"{PKG}.services"] = services
 
 
+class FakeEntry:
+    def __init__(self, entry_id, data, options=None):
+        self.entry_id = entry_id
+        self.data = data
+        self.options = options or {}
+        self.on_unload = []
+        self.update_listeners = []
+
+    def async_on_unload(self, func):
+        self.on_unload.append(func)
+
+    def add_update_listener(self, listener):
+        self.update_listeners.append(listener)
+        return lambda: self.update_listeners.remove(listener)
+
+
 class FakeConfigEntries:
     def __init__(self):
         self.updated = []
         self.forwarded = []
         self.unloaded = []
+        self.reloaded = []
 
     async def async_forward_entry_setups(self, entry, platforms):
         self.forwarded.append((entry.entry_id, tuple(platforms)))
@@ -248,6 +331,9 @@ class FakeConfigEntries:
         entry.data = data
         self.updated.append((entry.entry_id, data))
 
+    async def async_reload(self, entry_id):
+        self.reloaded.append(entry_id)
+
 
 class FakeBus:
     def __init__(self):
@@ -255,6 +341,7 @@ class FakeBus:
 
     def async_listen_once(self, event, cb):
         self.once_calls.append((event, cb))
+        return lambda: self.once_calls.remove((event, cb))
 
 
 class FakeSession:
@@ -295,7 +382,7 @@ async def _run_async_tests(mod):
         config_entries=FakeConfigEntries(),
         _session=FakeSession(),
     )
-    entry = SimpleNamespace(
+    entry = FakeEntry(
         entry_id="entry-1", data={"username": "u", "password": "p", "url": "x"}
     )
 
@@ -312,6 +399,107 @@ async def _run_async_tests(mod):
         "javis_lock" in hass.data and "entry-1" in hass.data["javis_lock"],
     )
     check_true("platform forwarding called", len(hass.config_entries.forwarded) == 1)
+    check("listeners removed on unload", len(entry.on_unload), 2)
+    entry.on_unload[0]()
+    check("stop listener removed on unload", hass.bus.once_calls, [])
+    await entry.update_listeners[0](hass, entry)
+    check("changed options reload the entry", hass.config_entries.reloaded, ["entry-1"])
+    setup_locks = hass.data["javis_lock"]["entry-1"]["locks"]
+    check_true(
+        "coordinators share the account fleet",
+        setup_locks[0].fleet is not None
+        and all(lock.fleet is setup_locks[0].fleet for lock in setup_locks),
+    )
+    check_true(
+        "coordinators share the account poll scheduler",
+        all(
+            lock.scheduler is hass.data["javis_lock"]["entry-1"]["poll"]
+            for lock in setup_locks
+        ),
+    )
+
+    # first refreshes run concurrently, bounded, and failures stay unavailable
+    class ManyLocksApi:
+        def __init__(self, hass, session, username, password, url, limit=None):
+            pass
+
+        async def async_close(self, event=None):
+            pass
+
+        async def get_locks(self):
+            return [1, 2, 3, 4, 5]
+
+    coordinator_cls = sys.modules[f"{PKG}.coordinator"].LockUpdateCoordinator
+    coordinator_cls.failing = {3}
+    old_api = mod.TTLockApi
+    mod.TTLockApi = ManyLocksApi
+    many_hass = SimpleNamespace(
+        state="running",
+        data={},
+        bus=FakeBus(),
+        config_entries=FakeConfigEntries(),
+        _session=FakeSession(),
+    )
+    many_entry = FakeEntry(
+        entry_id="entry-6",
+        data={"username": "u", "password": "p", "url": "x", "setup_concurrency": 4},
+        options={"setup_concurrency": 2},
+    )
+    mod.WebhookHandler.setup = fake_setup
+    many_ok = await mod.async_setup_entry(many_hass, many_entry)
+    mod.WebhookHandler.setup = original_setup
+    mod.TTLockApi = old_api
+    coordinator_cls.failing = set()
+    many_data = many_hass.data["javis_lock"]["entry-6"]
+    check("failed lock does not abort setup", many_ok, True)
+    check("first refresh concurrency is bounded", coordinator_cls.max_running, 2)
+    check("failed lock is kept", len(many_data["locks"]), 5)
+    check("failed lock reported unavailable", many_data["setup"]["unavailable"], [3])
+    check_true(
+        "setup time recorded",
+        many_data["setup"]["total_seconds"] >= 0
+        and all(lock.setup_seconds is not None for lock in many_data["locks"]),
+    )
+
+    # coordinators that setup drops or that a failed setup created unregister
+    mod.TTLockApi = ManyLocksApi
+    coordinator_cls.skipped = {2}
+    coordinator_cls.created = []
+    skip_hass = SimpleNamespace(
+        state="running",
+        data={},
+        bus=FakeBus(),
+        config_entries=FakeConfigEntries(),
+        _session=FakeSession(),
+    )
+    skip_entry = FakeEntry(
+        entry_id="entry-7", data={"username": "u", "password": "p", "url": "x"}
+    )
+    mod.WebhookHandler.setup = fake_setup
+    await mod.async_setup_entry(skip_hass, skip_entry)
+    check(
+        "skipped lock is unregistered",
+        [lock.lock_id for lock in coordinator_cls.created if lock.unregistered],
+        [2],
+    )
+
+    async def forward_fails(entry, platforms):
+        raise RuntimeError("platform setup failed")
+
+    coordinator_cls.created = []
+    skip_hass.data = {}
+    skip_hass.config_entries.async_forward_entry_setups = forward_fails
+    failed_ok = await mod.async_setup_entry(skip_hass, skip_entry)
+    mod.WebhookHandler.setup = original_setup
+    mod.TTLockApi = old_api
+    coordinator_cls.skipped = set()
+    check("failed setup returns False", failed_ok, False)
+    check_true(
+        "failed setup unregisters every lock",
+        len(coordinator_cls.created) == 5
+        and all(lock.unregistered for lock in coordinator_cls.created),
+    )
+    check("failed setup leaves no entry data", skip_hass.data["javis_lock"], {})
 
     webhook_handler = mod.WebhookHandler(
         hass,
@@ -322,6 +510,8 @@ async def _run_async_tests(mod):
     )
 
     class FakeRequest:
+        content_type = "application/x-www-form-urlencoded"
+
         async def post(self):
             class _PostData(dict):
                 def getall(self, key, default=None):
@@ -353,12 +543,72 @@ async def _run_async_tests(mod):
             return ""
 
     await webhook_handler.handle_webhook(hass, "wid", FakeRequest())
-    dispatcher = sys.modules["homeassistant.helpers.dispatcher"]
-    check_true("webhook dispatches event", len(dispatcher.sent) >= 1)
+    router = sys.modules[f"{PKG}.coordinator"].webhook_router(hass)
+    check_true("webhook routes event", len(router.events) >= 1)
+
+    class JsonRequest:
+        def __init__(self, content_type, body):
+            self.content_type = content_type
+            self.body = body
+
+        async def text(self):
+            return self.body
+
+    router.events.clear()
+    records = [{"lockId": 1, "success": 1}, {"lockId": 2, "success": 1}]
+    await webhook_handler.handle_webhook(
+        hass, "wid", JsonRequest("application/json", json.dumps(records))
+    )
+    ndjson = "\n".join(json.dumps(record) for record in records) + "\n"
+    await webhook_handler.handle_webhook(
+        hass, "wid", JsonRequest("application/x-ndjson", ndjson)
+    )
+    check(
+        "json array and ndjson each routed as one batch",
+        [len(batch) for batch in router.events],
+        [2, 2],
+    )
+
+    router.events.clear()
+    mixed = records + [{"lockId": 3, "recordType": -1, "success": 1}]
+    await webhook_handler.handle_webhook(
+        hass, "wid", JsonRequest("application/json", json.dumps(mixed))
+    )
+    check(
+        "bad record is skipped, valid ones routed",
+        [[event.lockId for event in batch] for batch in router.events],
+        [[1, 2]],
+    )
+    router.events.clear()
+    corrupt = ndjson.replace("\n", '\n{"lockId": 3, "succ\n', 1)
+    await webhook_handler.handle_webhook(
+        hass, "wid", JsonRequest("application/x-ndjson", corrupt)
+    )
+    check(
+        "corrupt ndjson line is skipped, the rest routed",
+        [[event.lockId for event in batch] for batch in router.events],
+        [[1, 2]],
+    )
+    check(
+        "single json object parsed",
+        mod.parse_webhook_records('{"a": 1}'),
+        [{"a": 1}],
+    )
 
     # async_unload_entry happy path
+    setup_client = hass.data["javis_lock"]["entry-1"]["api"]
     unload_ok = await mod.async_unload_entry(hass, entry)
     check("async_unload_entry returns True", unload_ok, True)
+    check_true("async_unload_entry closes api client", setup_client.closed)
+    check_true(
+        "async_unload_entry unregisters webhooks",
+        all(lock.unregistered for lock in setup_locks),
+    )
+    check(
+        "async_unload_entry cancels auto-lock timers",
+        sys.modules[f"{PKG}.coordinator"].cancelled_timers,
+        [lock.lock_id for lock in setup_locks],
+    )
     check_true(
         "async_unload_entry removes entry data",
         "entry-1" not in hass.data.get("javis_lock", {}),
@@ -395,7 +645,7 @@ async def _run_async_tests(mod):
         data={},
         _session=FakeSession(),
     )
-    no_url_entry = SimpleNamespace(
+    no_url_entry = FakeEntry(
         entry_id="entry-4", data={"url": "x", "webhook_id": "wid4"}
     )
     no_url_handler = mod.WebhookHandler(
@@ -419,7 +669,10 @@ async def _run_async_tests(mod):
 
     # async_setup_entry returns False when no lock is returned
     class NoLocksApi:
-        def __init__(self, hass, session, username, password, url):
+        def __init__(self, hass, session, username, password, url, limit=None):
+            pass
+
+        async def async_close(self, event=None):
             pass
 
         async def get_locks(self):
@@ -434,7 +687,7 @@ async def _run_async_tests(mod):
         config_entries=FakeConfigEntries(),
         _session=FakeSession(),
     )
-    no_lock_entry = SimpleNamespace(
+    no_lock_entry = FakeEntry(
         entry_id="entry-5", data={"username": "u", "password": "p", "url": "x"}
     )
     no_lock_ok = await mod.async_setup_entry(no_lock_hass, no_lock_entry)
@@ -442,7 +695,10 @@ async def _run_async_tests(mod):
 
     # async_setup_entry handles ComponentOutdatedError and notifies
     class OutdatedApi:
-        def __init__(self, hass, session, username, password, url):
+        def __init__(self, hass, session, username, password, url, limit=None):
+            pass
+
+        async def async_close(self, event=None):
             pass
 
         async def get_locks(self):
@@ -458,7 +714,7 @@ async def _run_async_tests(mod):
         config_entries=FakeConfigEntries(),
         _session=FakeSession(),
     )
-    outdated_entry = SimpleNamespace(
+    outdated_entry = FakeEntry(
         entry_id="entry-6", data={"username": "u", "password": "p", "url": "x"}
     )
     outdated_ok = await mod.async_setup_entry(outdated_hass, outdated_entry)
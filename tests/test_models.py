@@ -6,6 +6,7 @@ Run: python tests/test_models.py
 import sys
 import types
 import importlib.util
+from copy import deepcopy
 from datetime import datetime, timedelta
 
 from _component_test_stubs import PKG, clear_modules, install_package_root, load_module
@@ -86,9 +87,62 @@ def main():
     weekend = models.Passcode.parse_obj(weekend_raw)
     check("cyclic passcode not forced expired", weekend.expired, False)
 
+    permanent_raw = {**passcode_raw, "keyboardPwdId": 3, "keyboardPwdType": 2}
+    no_end_raw = {**passcode_raw, "keyboardPwdId": 4, "endDate": None}
+    table = models.PasscodeTable.from_payload(
+        {"list": [passcode_raw, weekend_raw, permanent_raw, no_end_raw]}
+    )
+    now_ms = int(datetime.now().timestamp() * 1000)
+    check("passcode table rows", len(table), 4)
+    check("passcode table id column", list(table.ids), [1, 2, 3, 4])
+    check("passcode table expiry", table.expired(now_ms), [0])
+    check(
+        "passcode table agrees with model",
+        table.expired(now_ms),
+        [
+            index
+            for index, raw in enumerate([passcode_raw, weekend_raw, permanent_raw])
+            if models.Passcode.parse_obj(raw).expired
+        ],
+    )
+    check("passcode table builds model", table.passcode(0).name, "temp")
+
     ev = models.Event.validate(1)
     check("event action mapping", ev.action, models.Action.unlock)
     check("event description mapping", ev.description, "unlock by app")
+    check_true("events are shared per record type", models.Event.validate(1) is ev)
+    check("unknown event id", models.Event(9999).description, "unknown")
+    check(
+        "event table matches events",
+        [
+            (info.action, info.description)
+            for info in models.EVENT_TABLE
+            if info is not None
+        ],
+        list(models.Event.EVENTS.values()),
+    )
+
+    webhook_raw = {
+        "lockId": 1,
+        "lockMac": "AA:BB",
+        "serverDate": 1767225600000,
+        "lockDate": 1767225600000,
+        "recordType": 11,
+        "success": True,
+    }
+    locked = models.WebhookEvent.parse_obj(webhook_raw)
+    check_true("lock event reuses locked state", locked.state is models.LOCKED)
+    unlocked = models.WebhookEvent.parse_obj({**webhook_raw, "recordType": 4})
+    check_true("unlock event reuses unlocked state", unlocked.state is models.UNLOCKED)
+    failed = models.WebhookEvent.parse_obj({**webhook_raw, "success": False})
+    check("failed event has no state", failed.state.locked, None)
+    sensor = models.WebhookEvent.parse_obj({**webhook_raw, "recordType": 31})
+    check_true("other events share unknown state", sensor.state is failed.state)
+    try:
+        models.LOCKED.locked = models.State.unlocked
+        check_true("shared state should be immutable", False)
+    except TypeError:
+        check_true("shared state is immutable", True)
 
     try:
         models.Event.validate(9999)
@@ -109,6 +163,55 @@ def main():
     check("passage config default start minute", pmc.start_minute, 0)
     check("passage config default end minute", pmc.end_minute, 0)
 
+    pmv = models.PassageModeView(
+        {"passageMode": 1, "startDate": None, "weekDays": [1, 2], "isAllDay": 2}
+    )
+    check("passage view enum", pmv.enabled, models.OnOff.on)
+    check("passage view runs validators", pmv.start_minute, 0)
+    check("passage view validates missing always field", pmv.end_minute, 0)
+    check("passage view default", pmv.auto_unlock, models.OnOff.unknown)
+    check("passage view matches model", pmv.week_days, [1, 2])
+    check(
+        "passage view validates odd lists",
+        models.PassageModeView({"weekDays": ["1"]}).week_days,
+        [1],
+    )
+
+    lock_raw = {
+        "lockId": 7,
+        "lockName": "S31",
+        "lockMac": "AA:BB",
+        "electricQuantity": "80",
+        "modelNum": "SN9161",
+        "lockSound": 1,
+        "date": 0,
+        "adminPwd": "secret",
+    }
+    lock_view = models.LockView(lock_raw)
+    lock_model = models.Lock.parse_obj(lock_raw)
+    check("lock view coerces like model", lock_view.battery_level, 80)
+    check("lock view enum", lock_view.lockSound, lock_model.lockSound)
+    check("lock view default", lock_view.name, "Lock")
+    check("lock view model field", lock_view.model, "SN9161")
+    check(
+        "lock view parses only read fields",
+        sorted(lock_view._values),
+        ["battery_level", "lockSound", "model", "name"],
+    )
+    copied = lock_view.copy(update={"name": "Front"})
+    check("lock view copy overrides", (copied.name, copied.mac), ("Front", "AA:BB"))
+    check("lock view survives deepcopy", deepcopy(copied).name, "Front")
+    try:
+        models.LockView({"lockId": "x"}).id
+        check_true("invalid lock view field should fail", False)
+    except ValueError:
+        check_true("invalid lock view field rejected", True)
+    try:
+        models.LockView({}).mac
+        check_true("missing lock view field should fail", False)
+    except ValueError:
+        check_true("missing lock view field rejected", True)
+
     features = models.Features.from_feature_value("3")
     check_true("features parsing returns flag", bool(features))
 
@@ -0,0 +1,254 @@
+"""Script tests for the local unlock record store.
+
+Run: python tests/test_record_store.py
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+import types
+from types import SimpleNamespace
+
+from _component_test_stubs import (
+    PKG,
+    clear_modules,
+    install_package_root,
+    load_module,
+    stub_homeassistant_minimal,
+)
+
+
+tests_run = 0
+tests_failed = 0
+
+
+def check(test_name, actual, expected):
+    global tests_run, tests_failed
+    tests_run += 1
+    if actual == expected:
+        print(f"  PASS: {test_name}")
+    else:
+        tests_failed += 1
+        print(f"  FAIL: {test_name}")
+        print(f"        Expected: {expected!r}")
+        print(f"        Actual  : {actual!r}")
+
+
+def _install_stubs():
+    sys.modules["homeassistant.const"].EVENT_HOMEASSISTANT_STOP = "stop"
+
+    storage = types.ModuleType("homeassistant.helpers.storage")
+    storage.STORAGE_DIR = ".storage"
+    sys.modules["homeassistant.helpers.storage"] = storage
+
+    const = types.ModuleType(f"{PKG}.const")
+    const.DOMAIN = "javis_lock"
+    const.RECORD_STORE_FILE = "records.db"
+    const.RECORD_SYNC_OVERLAP = 2
+    const.TT_RECORDS = "records"
+    sys.modules[f"{PKG}.const"] = const
+
+    api = types.ModuleType(f"{PKG}.api")
+    api.TTLockApi = object
+    sys.modules[f"{PKG}.api"] = api
+
+
+class FakeApi:
+    def __init__(self, records):
+        self.records = records
+        self.start_dates = []
+
+    async def iter_unlock_records(self, lock_id, start_date=0):
+        self.start_dates.append(start_date)
+        newest_first = sorted(
+            (r for r in self.records if r["lockDate"] >= start_date),
+            key=lambda r: r["lockDate"],
+            reverse=True,
+        )
+        for i in range(0, len(newest_first), 2):
+            yield newest_first[i : i + 2]
+
+
+def _record(record_id, lock_date):
+    return {
+        "recordId": record_id,
+        "lockId": 1,
+        "lockDate": lock_date,
+        "serverDate": lock_date + 5,
+        "recordType": 7,
+        "username": "user1",
+        "success": 1,
+    }
+
+
+async def _run_tests(store_mod, tmp_dir):
+    async def add_executor_job(func, *args):
+        return func(*args)
+
+    listeners = []
+    hass = SimpleNamespace(
+        data={},
+        config=SimpleNamespace(path=lambda *parts: "/".join((tmp_dir,) + parts[1:])),
+        bus=SimpleNamespace(
+            async_listen_once=lambda event, func: listeners.append((event, func))
+        ),
+        async_add_executor_job=add_executor_job,
+    )
+
+    store = store_mod.record_store(hass)
+    check("store is shared", store_mod.record_store(hass) is store, True)
+    check("store closes on stop", listeners, [("stop", store.async_close)])
+    check("empty store has no high-water mark", await store.async_high_water(1), 0)
+
+    api = FakeApi([_record(i, 1000 + i) for i in range(1, 6)])
+    first = await store.async_sync(api, 1)
+    check(
+        "first sync stores everything",
+        first,
+        {"fetched": 5, "added": 5, "high_water": 1005},
+    )
+
+    api.records.append(_record(6, 1006))
+    second = await store.async_sync(api, 1)
+    check("second sync starts below high-water mark", api.start_dates[-1], 1003)
+    check("second sync only adds new records", second["added"], 1)
+    check("high-water mark advances", await store.async_high_water(1), 1006)
+    check("other locks are independent", await store.async_high_water(2), 0)
+    late_api = FakeApi([_record(21, 2000), _record(22, 2001)])
+    await store.async_sync(late_api, 3)
+    late_api.records.append(_record(23, 2000))
+    late = await store.async_sync(late_api, 3)
+    check("record uploaded late is added", late["added"], 1)
+    check("late record keeps the mark", late["high_water"], 2001)
+
+    class BrokenApi(FakeApi):
+        async def iter_unlock_records(self, lock_id, start_date=0):
+            yield [_record(9, 2000)]
+            raise RuntimeError("page failed")
+
+    try:
+        await store.async_sync(BrokenApi([]), 1)
+    except RuntimeError:
+        pass
+    check(
+        "failed sync keeps the high-water mark", await store.async_high_water(1), 1006
+    )
+    check(
+        "records of a failed sync are kept",
+        store._connection().execute("SELECT COUNT(*) FROM records").fetchone()[0],
+        10,
+    )
+
+    # indexed queries with range filters and cursor pagination
+    other = [
+        {**_record(100 + i, 1000 + i), "lockId": 2, "username": "user2"}
+        for i in range(1, 4)
+    ]
+    await store.async_sync(FakeApi(other), 2)
+    page = await store.async_query(lock_ids=[1], start_ts=1002, end_ts=1006, limit=2)
+    check(
+        "range query is newest first",
+        [r["recordId"] for r in page["records"]],
+        [5, 4],
+    )
+    page = await store.async_query(
+        lock_ids=[1], start_ts=1002, end_ts=1006, limit=2, cursor=page["next_cursor"]
+    )
+    check(
+        "cursor continues the range", [r["recordId"] for r in page["records"]], [3, 2]
+    )
+    check("last page has no cursor", page["next_cursor"], None)
+    rejected = []
+    for bad_cursor in ("1:2", "a:b:c", "1:2:3:4"):
+        try:
+            await store.async_query(cursor=bad_cursor)
+        except ValueError:
+            rejected.append(bad_cursor)
+    check("malformed cursors are rejected", len(rejected), 3)
+    by_user = await store.async_query(username="user2")
+    check(
+        "username filter",
+        [r["recordId"] for r in by_user["records"]],
+        [103, 102, 101],
+    )
+    by_type = await store.async_query(record_types=[8])
+    check("record type filter", by_type["records"], [])
+    plan = " ".join(
+        str(row)
+        for row in store._connection().execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM records WHERE username = ?"
+            " AND lock_ts >= ?",
+            ("user2", 0),
+        )
+    )
+    check("username query uses index", "records_by_user" in plan, True)
+    plan = " ".join(
+        str(row)
+        for row in store._connection().execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM records"
+            " WHERE (lock_ts, lock_id, record_id) < (?, ?, ?)"
+            " ORDER BY lock_ts DESC, lock_id DESC, record_id DESC LIMIT 10",
+            (1005, 1, 5),
+        )
+    )
+    check("unfiltered page uses time index", "records_by_time" in plan, True)
+    check("unfiltered page needs no sort", "TEMP B-TREE" in plan, False)
+    analyzed = []
+    store._connection().set_trace_callback(analyzed.append)
+    await store.async_sync(FakeApi([_record(7, 1007)]), 1)
+    check(
+        "sync does not analyze",
+        [sql for sql in analyzed if "ANALYZE" in sql.upper()],
+        [],
+    )
+
+    # closing waits for the database call in flight
+    closed_during = []
+
+    def slow_count():
+        time.sleep(0.05)
+        closed_during.append(store._conn is None)
+        return store._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    async def thread_executor(func, *args):
+        return await asyncio.to_thread(func, *args)
+
+    hass.async_add_executor_job = thread_executor
+    stored = store._connection().execute("SELECT COUNT(*) FROM records").fetchone()[0]
+    counting = asyncio.ensure_future(store._run(slow_count))
+    await asyncio.sleep(0)
+    await store.async_close()
+    check(
+        "close waits for the call in flight",
+        (await counting, closed_during),
+        (stored, [False]),
+    )
+    check("store is closed", store._conn, None)
+
+
+def main():
+    print("\n" + "=" * 64)
+    print("TEST RECORD STORE")
+    print("=" * 64)
+
+    clear_modules(PKG)
+    install_package_root()
+    stub_homeassistant_minimal()
+    _install_stubs()
+    store_mod = load_module("record_store", "record_store.py")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        asyncio.run(_run_tests(store_mod, tmp_dir))
+
+    print("\n" + "=" * 64)
+    if tests_failed == 0:
+        print(f"ALL {tests_run} TESTS PASSED")
+    else:
+        print(f"FAILED: {tests_failed}/{tests_run}")
+    print("=" * 64 + "\n")
+    raise SystemExit(0 if tests_failed == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
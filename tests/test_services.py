@@ -85,7 +85,15 @@ async def main():
             )
             return {"ok": True}
 
-    fake_coordinator = SimpleNamespace(lock_id=123456, api=FakeApi())
+    added = []
+    fake_coordinator = SimpleNamespace(
+        lock_id=123456,
+        api=FakeApi(),
+        passcodes=SimpleNamespace(
+            added=lambda config, res: added.append(res),
+            changed=lambda passcode_id, res, **fields: None,
+        ),
+    )
     services.coordinator_for = lambda hass, entity_id: fake_coordinator
 
     svc = services.Services(hass=SimpleNamespace())
@@ -133,6 +141,7 @@ async def main():
     )
     check("type<=2 returns api response", result_ok, {"ok": True, "lock_id": 123456})
     check_true("add_passcode called once", len(fake_coordinator.api.add_calls) == 1)
+    check("created passcode goes to cache", added, [{"ok": True, "lock_id": 123456}])
     if fake_coordinator.api.add_calls:
         first_call = fake_coordinator.api.add_calls[0]
         check("startDate type<=2", first_call["start"], 0)
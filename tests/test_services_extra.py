@@ -4,6 +4,8 @@ Run: python tests/test_services_extra.py
 """
 
 import asyncio
+import sys
+from datetime import datetime, timezone
 from types import SimpleNamespace
 
 from _component_test_stubs import (
@@ -55,38 +57,83 @@ async def main():
     stub_component_modules_for_services()
     services = load_module("services", "services.py")
 
-    class FakeCode:
-        def __init__(self, code_id, name, expired):
-            self.id = code_id
-            self.name = name
-            self.expired = expired
+    PASSCODE_ROWS = [
+        {
+            "keyboardPwdId": 1,
+            "keyboardPwdName": "expired-code",
+            "keyboardPwdType": 3,
+            "endDate": 1000,
+        },
+        {
+            "keyboardPwdId": 2,
+            "keyboardPwdName": "active-code",
+            "keyboardPwdType": 3,
+            "endDate": 2**62,
+        },
+    ]
 
     class FakeApi:
         def __init__(self):
             self.deleted = []
             self.refresh_called = 0
+            self.invalidated = []
+            self.responses = SimpleNamespace(
+                invalidate=lambda lock_id: self.invalidated.append(lock_id)
+            )
+            self.fail_delete = False
+            self.server_codes = []
+            # per add_passcode call: (store the code, return a response)
+            self.add_outcomes = []
+            self.add_calls = 0
 
         async def list_passcodes(self, lock_id, is_parse=True):
-            if is_parse:
-                return [
-                    FakeCode(1, "expired-code", True),
-                    FakeCode(2, "active-code", False),
-                ]
-            return {"list": [{"id": 1}]}
+            return {"list": PASSCODE_ROWS + self.server_codes}
+
+        async def add_passcode(self, lock_id, config):
+            self.add_calls += 1
+            stored, answered = (
+                self.add_outcomes.pop(0) if self.add_outcomes else (True, True)
+            )
+            code = {
+                "keyboardPwdId": 500 + self.add_calls,
+                "keyboardPwd": "123456",
+                "keyboardPwdName": config.passcode_name,
+                "keyboardPwdType": int(config.type),
+                "startDate": config.start_minute,
+                "endDate": config.end_minute,
+            }
+            if stored:
+                self.server_codes.append(code)
+            return code if answered else None
 
         async def delete_passcode(self, lock_id, code_id):
             self.deleted.append((lock_id, code_id))
-            return {"ok": True}
+            return None if self.fail_delete else {"ok": True}
 
         async def list_unlock_records(self, lock_id, page_no, page_size):
             return {"lock_id": lock_id, "page": page_no, "size": page_size}
 
     class FakeCoordinator:
-        def __init__(self):
-            self.lock_id = 1001
+        def __init__(self, lock_id=1001):
+            self.lock_id = lock_id
             self.api = FakeApi()
             self.refresh_count = 0
 
+            self.passcode_events = []
+            self.passcodes = SimpleNamespace(
+                removed=lambda passcode_id, res: self.passcode_events.append(
+                    ("removed", passcode_id)
+                ),
+                added=lambda config, res: self.passcode_events.append(
+                    ("added", res and res["keyboardPwdId"])
+                ),
+            )
+            self.list_calls = []
+
+        async def async_list_passcodes(self, is_parse=True, refresh=False):
+            self.list_calls.append(refresh)
+            return await self.api.list_passcodes(self.lock_id, is_parse)
+
         async def async_request_refresh(self):
             self.refresh_count += 1
 
@@ -120,15 +167,116 @@ async def main():
     res_list = await svc.handle_list_passcodes(
         SimpleNamespace(data={"entity_id": ["lock.ttlock_abc"]})
     )
-    check("list passcodes returns api payload", res_list, {"list": [{"id": 1}]})
+    check("list passcodes returns api payload", res_list, {"list": PASSCODE_ROWS})
 
     res_cleanup = await svc.handle_cleanup_passcodes(
         SimpleNamespace(data={"entity_id": ["lock.ttlock_abc"]})
     )
     check(
-        "cleanup removes only expired names", res_cleanup, {"removed": ["expired-code"]}
+        "cleanup removes only expired names", res_cleanup["removed"], ["expired-code"]
+    )
+    check("cleanup reports no failures", res_cleanup["failed"], 0)
+    check(
+        "cleanup reports per-lock result",
+        res_cleanup["locks"][1001]["removed"],
+        ["expired-code"],
     )
     check("cleanup delete calls", coordinator.api.deleted, [(1001, 1)])
+    check(
+        "cleanup deletes run in the bulk lane",
+        sys.modules[f"{PKG}.scheduling"].lanes_entered.count("bulk"),
+        1,
+    )
+    check("cleanup updates cache", coordinator.passcode_events, [("removed", 1)])
+
+    # without entity_id every lock is swept; failures are reported per lock
+    other, broken = FakeCoordinator(2002), FakeCoordinator(3003)
+    broken.api.fail_delete = True
+    services.all_coordinators = lambda hass, entry_id=None: [other, broken]
+    res_all = await svc.handle_cleanup_passcodes(SimpleNamespace(data={}))
+    check("cleanup sweeps every lock", sorted(res_all["locks"]), [2002, 3003])
+    check("cleanup all removed names", res_all["removed"], ["expired-code"])
+    check("cleanup all counts failures", res_all["failed"], 1)
+    check(
+        "cleanup failure names the code",
+        res_all["locks"][3003]["failed"],
+        [{"id": 1, "name": "expired-code", "error": "Delete passcode fail."}],
+    )
+    check("cleanup all deletes each lock", other.api.deleted, [(2002, 1)])
+
+    # bulk provisioning: a lost response is not created twice, failures retry
+    fresh, lost, down = (FakeCoordinator(lock_id) for lock_id in (11, 12, 13))
+    lost.api.add_outcomes = [(True, False)]
+    down.api.add_outcomes = [(False, False)] * 3
+    services.all_coordinators = lambda hass, entry_id=None: (
+        [fresh, lost, down] if entry_id == "entry1" else []
+    )
+    res_bulk = await svc.handle_bulk_create_passcode(
+        SimpleNamespace(
+            data={
+                "config_entry_id": "entry1",
+                "passcode_name": "cleaner",
+                "type": "2",
+                "concurrency": "2",
+            }
+        )
+    )
+    check("bulk counts created locks", res_bulk["created"], 2)
+    check("bulk counts failed locks", res_bulk["failed"], 1)
+    check(
+        "bulk first attempt result",
+        res_bulk["locks"][11],
+        {"ok": True, "keyboardPwdId": 501, "keyboardPwd": "123456", "attempts": 1},
+    )
+    check("bulk finds code of lost response", res_bulk["locks"][12]["ok"], True)
+    check("bulk does not create twice", len(lost.api.server_codes), 1)
+    check("bulk lists then refreshes passcodes", lost.list_calls, [False, True])
+    check(
+        "bulk gives up after all attempts",
+        res_bulk["locks"][13],
+        {"ok": False, "error": "Create passcode fail.", "attempts": 3},
+    )
+    check("bulk retries failed creates", down.api.add_calls, 3)
+
+    # an older code of the same name is not taken for the one being created
+    for namesake in (
+        {"keyboardPwdType": 2, "startDate": 0, "endDate": 0},
+        {"keyboardPwdType": 3, "startDate": 1000, "endDate": 2000},
+    ):
+        retried = FakeCoordinator(14)
+        retried.api.server_codes = [
+            {"keyboardPwdId": 400, "keyboardPwdName": "cleaner", **namesake}
+        ]
+        retried.api.add_outcomes = [(False, False)]
+        res_retry = await svc._provision_passcode(
+            retried,
+            services.AddPasscodeConfig(
+                type=str(namesake["keyboardPwdType"]),
+                passcodeName="cleaner",
+                startDate=3000 if namesake["startDate"] else 0,
+                endDate=4000 if namesake["endDate"] else 0,
+            ),
+        )
+        check(
+            f"bulk ignores older type {namesake['keyboardPwdType']} namesake",
+            (res_retry["keyboardPwdId"], res_retry["attempts"]),
+            (502, 2),
+        )
+    check(
+        "bulk rejects bad concurrency",
+        "error"
+        in await svc.handle_bulk_create_passcode(
+            SimpleNamespace(
+                data={"passcode_name": "x", "type": "2", "concurrency": "0"}
+            )
+        ),
+        True,
+    )
+
+    await svc.handle_list_passcodes(
+        SimpleNamespace(data={"entity_id": ["lock.ttlock_abc"], "refresh": True})
+    )
+    check("list passcodes forwards refresh", coordinator.list_calls[-1], True)
 
     res_unlock_records = await svc.handle_list_unlock_records(
         SimpleNamespace(
@@ -151,6 +299,78 @@ async def main():
         SimpleNamespace(data={"entity_id": ["lock.ttlock_abc"]})
     )
     check("update lock requests refresh", coordinator.refresh_count, 1)
+    check("update lock drops cached responses", coordinator.api.invalidated, [1001])
+
+    # sync_unlock_records syncs every selected lock once
+    class FakeStore:
+        def __init__(self):
+            self.synced = []
+
+        async def async_sync(self, api, lock_id):
+            self.synced.append(lock_id)
+            return {"fetched": 3, "added": 2, "high_water": 1000}
+
+    store = FakeStore()
+    services.record_store = lambda hass: store
+    res_sync = await svc.handle_sync_unlock_records(
+        SimpleNamespace(data={"entity_id": ["lock.ttlock_abc", "sensor.ttlock_abc"]})
+    )
+    check(
+        "sync unlock records reports per lock",
+        res_sync,
+        {"locks": {1001: {"fetched": 3, "added": 2, "high_water": 1000}}},
+    )
+    check("sync unlock records once per lock", store.synced, [1001])
+
+    # query_unlock_records turns service fields into store filters
+    async def fake_query(**kwargs):
+        store.query = kwargs
+        return {"records": [], "next_cursor": None}
+
+    store.async_query = fake_query
+    res_query = await svc.handle_query_unlock_records(
+        SimpleNamespace(
+            data={
+                "entity_id": ["lock.ttlock_abc"],
+                "username": "user1",
+                "record_type": "7,8",
+                "start_time": datetime(2026, 1, 1, tzinfo=timezone.utc),
+                "limit": "5000",
+                "cursor": "1:2:3",
+            }
+        )
+    )
+    check("query returns store page", res_query, {"records": [], "next_cursor": None})
+    check(
+        "query filters",
+        store.query,
+        {
+            "lock_ids": [1001],
+            "username": "user1",
+            "record_types": [7, 8],
+            "start_ts": 1767225600000,
+            "end_ts": None,
+            "limit": 1000,
+            "cursor": "1:2:3",
+        },
+    )
+    res_bad_query = await svc.handle_query_unlock_records(
+        SimpleNamespace(data={"record_type": "door"})
+    )
+    check("invalid query returns error", "error" in res_bad_query, True)
+
+    async def bad_cursor_query(**kwargs):
+        raise ValueError(f"invalid cursor {kwargs['cursor']!r}")
+
+    store.async_query = bad_cursor_query
+    res_bad_cursor = await svc.handle_query_unlock_records(
+        SimpleNamespace(data={"cursor": "1:2"})
+    )
+    check(
+        "invalid cursor returns error",
+        res_bad_cursor,
+        {"error": "Invalid query: invalid cursor '1:2'"},
+    )
 
     services.coordinator_for = lambda hass, entity_id: None
     err_res = await svc.handle_list_unlock_records(